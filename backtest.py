@@ -0,0 +1,172 @@
+import itertools
+import os
+import sys
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+import match_store
+import metrics_engine
+
+# 回测：读取 match_data 下所有赛事文件夹中已记录赛果（Win/Lose）的盘口，
+# 按策略（分数 Kelly、最低期望收益、单注上限）重放下注，统计每届赛事和总体的 ROI、命中率和最大回撤。
+# 参数网格在进程池中并行回测，每个进程只接收一次盘口数据。
+
+DATA_ROOT = "match_data"
+
+
+def recorded_winners(store):
+    """从 profit_stats.json 和 kelly.json 中的 Win/Lose 推出每场比赛的胜方（TeamA / TeamB）"""
+    winners = {}
+    for row in store.data["kelly"]["kelly"]:
+        if row.get("MatchResult") in ("Win", "Lose"):
+            other = "TeamB" if row["Team"] == "TeamA" else "TeamA"
+            winners[row["MatchID"]] = row["Team"] if row["MatchResult"] == "Win" else other
+    for row in store.data["profit_stats"].get("stats", []):
+        match = store.get_match(row["MatchID"])
+        if match is None or row.get("Result") not in ("Win", "Lose"):
+            continue
+        side = "TeamA" if match["TeamA"] == row["Team"] else "TeamB"
+        other = "TeamB" if side == "TeamA" else "TeamA"
+        winners[row["MatchID"]] = side if row["Result"] == "Win" else other
+    return winners
+
+
+def load_markets(match_folder):
+    """返回该赛事中有双方小黑盒赔率和赛果的盘口，按比赛时间排序"""
+    store = match_store.get_store(match_folder)
+    data, metrics = metrics_engine.compute_tournament(match_folder)
+    winners = recorded_winners(store)
+    rows = []
+    for i, match_id in enumerate(data["MatchID"]):
+        if match_id not in winners or np.isnan(metrics["LittleBlackBox_Rake"][i]):
+            continue
+        rows.append((data["MatchTime"][i], i, winners[match_id] == "TeamA"))
+    rows.sort()
+    index = np.array([i for _, i, _ in rows], dtype=np.int64)
+    times = [t for t, _, _ in rows]
+    return {
+        "folder": match_folder,
+        "slate": np.unique(times, return_inverse=True)[1] if times else np.zeros(0, dtype=np.int64),
+        "odds": np.column_stack([data["TeamA_LittleBlackBox_Odds"][index], data["TeamB_LittleBlackBox_Odds"][index]]),
+        "ev": np.column_stack([metrics["TeamA_Expected_Profit"][index], metrics["TeamB_Expected_Profit"][index]]),
+        "kelly": np.column_stack([metrics["TeamA_Kelly"][index], metrics["TeamB_Kelly"][index]]),
+        "a_won": np.array([won for _, _, won in rows], dtype=bool)
+    }
+
+
+def load_all(data_root=DATA_ROOT):
+    folders = match_store.list_folders(data_root)
+    return [load_markets(folder) for folder in folders]
+
+
+def run_tournament(markets, fractions, min_evs, caps, balance):
+    """同时回测多组策略（参数为长度 S 的数组），返回 (S, 盘口数) 的投注额、收益和是否命中。
+    按时间逐轮下注：同一时间的比赛用该轮开始时的资金按 Kelly 下注，总投注不超过当前资金"""
+    ev, kelly, odds = markets["ev"], markets["kelly"], markets["odds"]
+    fractions, min_evs, caps = (np.asarray(x, dtype=np.float64)[:, None] for x in (fractions, min_evs, caps))
+    with np.errstate(invalid='ignore'):
+        eligible = np.where((ev[None] >= min_evs[:, :, None]) & (kelly[None] > 0), kelly[None], 0.0)
+    side = np.argmax(eligible, axis=2)  # 两边都满足时只下 Kelly 较大的一边
+    bet_kelly = np.take_along_axis(eligible, side[:, :, None], axis=2)[:, :, 0]
+    bet_odds = np.where(side == 0, odds[:, 0], odds[:, 1])
+    won = (side == 0) == markets["a_won"]
+
+    bankroll = np.full((len(fractions), 1), float(balance))
+    stakes = np.zeros(bet_kelly.shape)
+    # 盘口已按时间排序，每轮是一段连续区间；所有策略在同一次循环里推进
+    bounds = np.flatnonzero(np.diff(markets["slate"])) + 1
+    for lo, hi in zip(np.concatenate([[0], bounds]), np.concatenate([bounds, [bet_kelly.shape[1]]])):
+        slate_stakes = np.minimum(fractions * bet_kelly[:, lo:hi] * bankroll, caps)
+        total = slate_stakes.sum(axis=1, keepdims=True)
+        over = total > bankroll
+        slate_stakes *= np.where(over, bankroll / np.where(over, total, 1.0), 1.0)
+        stakes[:, lo:hi] = slate_stakes
+        bankroll += np.where(won[:, lo:hi], slate_stakes * bet_odds[:, lo:hi], -slate_stakes).sum(axis=1, keepdims=True)
+        np.maximum(bankroll, 0.0, out=bankroll)
+
+    profits = np.where(won, stakes * bet_odds, -stakes)
+    return {"stakes": stakes, "profits": profits, "won": won & (stakes > 0)}
+
+
+def max_drawdown(profits, balance):
+    equity = balance + np.concatenate([np.zeros((len(profits), 1)), np.cumsum(profits, axis=1)], axis=1)
+    peak = np.maximum.accumulate(equity, axis=1)
+    return np.max((peak - equity) / peak, axis=1)
+
+
+def summarize(bets, balance):
+    """每组策略一份统计；没有下注的盘口投注额和收益为 0，不影响回撤"""
+    placed = (bets["stakes"] > 0).sum(axis=1)
+    staked = bets["stakes"].sum(axis=1)
+    profit = bets["profits"].sum(axis=1)
+    drawdown = max_drawdown(bets["profits"], balance)
+    hits = bets["won"].sum(axis=1)
+    return [{
+        "bets": int(placed[s]),
+        "staked": round(float(staked[s]), 2),
+        "profit": round(float(profit[s]), 2),
+        "roi": float(profit[s] / staked[s]) if staked[s] else 0.0,
+        "hit_rate": float(hits[s] / placed[s]) if placed[s] else 0.0,
+        "max_drawdown": float(drawdown[s])
+    } for s in range(len(placed))]
+
+
+def backtest_many(tournaments, strategies, balance=25000, per_tournament=True):
+    """strategies 为 [(fraction, min_ev, cap), ...]。每届赛事从 balance 开始；总体回撤按各届收益依次相加计算"""
+    fractions, min_evs, caps = (np.array(x, dtype=np.float64) for x in zip(*strategies))
+    results = [run_tournament(markets, fractions, min_evs, caps, balance) for markets in tournaments]
+    overall = {key: np.concatenate([r[key] for r in results], axis=1) if results else np.zeros((len(strategies), 0))
+               for key in ("stakes", "profits", "won")}
+    reports = [{"fraction": f, "min_ev": e, "cap": c, "overall": summary}
+               for (f, e, c), summary in zip(strategies, summarize(overall, balance))]
+    if per_tournament:
+        for markets, result in zip(tournaments, results):
+            name = os.path.basename(markets["folder"])
+            for report, summary in zip(reports, summarize(result, balance)):
+                report.setdefault("tournaments", {})[name] = summary
+    return reports
+
+
+def backtest(tournaments, fraction=1.0, min_ev=0.0, cap=5000, balance=25000, per_tournament=True):
+    return backtest_many(tournaments, [(fraction, min_ev, cap)], balance, per_tournament)[0]
+
+
+_worker_tournaments = None
+
+
+def _init_worker(tournaments):
+    global _worker_tournaments
+    _worker_tournaments = tournaments
+
+
+def _run_strategies(args):
+    strategies, balance, per_tournament = args
+    return backtest_many(_worker_tournaments, strategies, balance, per_tournament=per_tournament)
+
+
+def sweep(fractions, min_evs, caps, balance=25000, data_root=DATA_ROOT, workers=None, tournaments=None,
+          per_tournament=True):
+    """参数网格回测，策略平均分给各进程，每个进程内向量化回测，按总体 ROI 从高到低返回；
+    per_tournament 为 True 时每组参数还包含各届赛事的 ROI、命中率和最大回撤"""
+    tournaments = load_all(data_root) if tournaments is None else tournaments
+    strategies = list(itertools.product(fractions, min_evs, caps))
+    workers = max(1, min(workers or os.cpu_count() or 1, len(strategies)))
+    chunks = [(strategies[i::workers], balance, per_tournament) for i in range(workers)]
+    if workers == 1:
+        _init_worker(tournaments)
+        reports = _run_strategies(chunks[0])
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(tournaments,)) as pool:
+            reports = [r for part in pool.map(_run_strategies, chunks) for r in part]
+    return sorted(reports, key=lambda r: r["overall"]["roi"], reverse=True)
+
+
+if __name__ == "__main__":
+    data_root = sys.argv[1] if len(sys.argv) > 1 else DATA_ROOT
+    start = time.time()
+    reports = sweep([0.25, 0.5, 0.75, 1.0], [0.0, 0.02, 0.05, 0.1, 0.2], [1000, 2500, 5000], data_root=data_root)
+    for r in reports[:10]:
+        o = r["overall"]
+        print(f"Kelly x{r['fraction']:<5} EV>={r['min_ev']:<5} 上限 {r['cap']:<6} 注数 {o['bets']:<4} "
+              f"ROI {o['roi']:.2%}  命中率 {o['hit_rate']:.2%}  最大回撤 {o['max_drawdown']:.2%}")
+    print(f"{len(reports)} 组参数，用时 {time.time() - start:.2f} 秒")
@@ -0,0 +1,77 @@
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import fetch_odds
+import driver_pool
+
+# 并行刷新 url_cache.json 中的所有赛事：按赛事文件夹分片，每个工作线程使用自己的浏览器会话。
+
+
+def load_cached_urls(cache_file="url_cache.json"):
+    if not os.path.exists(cache_file):
+        return []
+    with open(cache_file, 'r', encoding='utf-8') as f:
+        return list(json.load(f).keys())
+
+
+def shard_urls(urls, workers):
+    """同一赛事文件夹的 URL 分到同一个分片，避免两个线程同时写一个文件夹"""
+    groups = {}
+    for url in urls:
+        groups.setdefault(fetch_odds.extract_match_name(url), []).append(url)
+    shards = [[] for _ in range(max(1, min(workers, len(groups))))]
+    for group in sorted(groups.values(), key=len, reverse=True):
+        min(shards, key=len).extend(group)
+    return [shard for shard in shards if shard]
+
+
+def _run_shard(shard, extract_mode, backend=None):
+    # network 后端需要开启网络日志的浏览器，每个分片用自己的 capture 会话，不共用 get_capture_pool()
+    name = backend if isinstance(backend, str) or backend is None else getattr(backend, "name", None)
+    capture = (name or os.environ.get(fetch_odds.BACKEND_ENV)) == "network"
+    pool = driver_pool.DriverPool(size=1, capture=capture)
+    statuses = []
+    try:
+        for url in shard:
+            start = time.perf_counter()
+            status = {"url": url, "match_name": fetch_odds.extract_match_name(url)}
+            try:
+                result, filename = fetch_odds.fetch_team_odds(url, extract_mode=extract_mode, pool=pool, backend=backend)
+                status.update({"ok": result == 0, "file": filename})
+            except Exception as e:
+                logging.error(f"抓取 {url} 时出错: {e}")
+                status.update({"ok": False, "file": None, "error": str(e)})
+            status["seconds"] = round(time.perf_counter() - start, 3)
+            statuses.append(status)
+    finally:
+        pool.close()
+    return statuses
+
+
+def fetch_all(urls=None, workers=4, cache_file="url_cache.json", extract_mode="script", backend=None):
+    """刷新给定的 URL（默认全部缓存的 URL），返回每个 URL 的状态和耗时；backend 为后端名称，见 fetch_odds.make_backend"""
+    if urls is None:
+        urls = load_cached_urls(cache_file)
+    if not urls:
+        print("没有需要抓取的 URL")
+        return []
+
+    start = time.perf_counter()
+    shards = shard_urls(urls, workers)
+    with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+        results = list(executor.map(lambda shard: _run_shard(shard, extract_mode, backend), shards))
+    statuses = [status for shard in results for status in shard]
+    elapsed = time.perf_counter() - start
+
+    print(f"共抓取 {len(statuses)} 个 URL，{len(shards)} 个工作线程，总耗时 {elapsed:.2f} 秒")
+    for status in statuses:
+        flag = "成功" if status["ok"] else "失败"
+        print(f"  [{flag}] {status['match_name']} {status['seconds']:.2f}s {status['url']}")
+    return statuses
+
+
+if __name__ == "__main__":
+    fetch_all(sys.argv[1:] or None)
@@ -0,0 +1,384 @@
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+import data_processor
+import match_store
+import metrics_engine
+import update_json
+
+# 数据流程的基准测试：生成 10 ~ 10000 场比赛的合成赛事文件夹（赔率和小黑盒赔率按真实胜率加抽成生成），
+# 计时 read_json / calculate_team_metrics / save_results / update_json_files / recompute_folder，
+# 以及两个 GUI 窗口的 load_existing_data（需要 Tk，没有显示器时尝试启动 Xvfb，都没有则跳过）。
+# 结果写成 JSON，可以用 compare 对比两次运行；按规模拟合的增长指数接近 2 的就是二次扫描。
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+DEFAULT_REPEAT = 3
+DEFAULT_OUTPUT = "benchmark_results.json"
+MATCH_NAME = "synthetic_tournament"
+BOOK_MARGIN = 0.05   # 盘口抽成
+LBB_MARGIN = 0.04    # 小黑盒抽成
+LBB_FILLED = 0.8     # 填了小黑盒赔率的比赛比例
+RECENT_DATE = (3, 2)  # 与 ProfitStatsApp.current_date 一致，最近比赛围绕这一天生成
+XVFB_DISPLAY = ":99"
+
+
+def _team_names(count):
+    return [f"Team {i:05d}" for i in range(count)]
+
+
+def synthetic_matches(n_matches, seed=0, start_id=0):
+    """生成 n_matches 场比赛：胜率在 0.08 ~ 0.92 之间，盘口赔率为含抽成的小数赔率"""
+    rng = random.Random(seed)
+    teams = _team_names(max(8, int(math.sqrt(n_matches)) * 4))
+    matches = []
+    # 最多铺开 300 天，每场比赛占一个时间段，最后一天落在 RECENT_DATE，这样收益统计窗口里总有比赛
+    per_day = max(8, -(-n_matches // 300))
+    days = -(-n_matches // per_day)
+    last_day = datetime(2025, *RECENT_DATE)
+    for i in range(n_matches):
+        match_day = last_day - timedelta(days=days - 1 - i // per_day)
+        minutes = 10 * 60 + (i % per_day) * 20
+        team_a, team_b = rng.sample(teams, 2)
+        p = rng.uniform(0.08, 0.92)
+        matches.append({
+            "MatchID": f"{start_id + i:04d}",
+            "MatchName": MATCH_NAME,
+            "MatchTime": f"{match_day:%m-%d} {minutes // 60:02d}:{minutes % 60:02d}",
+            "TeamA": team_a,
+            "TeamB": team_b,
+            "TeamA_Odds": f"{1 / (p * (1 + BOOK_MARGIN)):.2f}",
+            "TeamB_Odds": f"{1 / ((1 - p) * (1 + BOOK_MARGIN)):.2f}",
+            "_p": p
+        })
+    return matches
+
+
+def _lbb_odds(rng, p):
+    """小黑盒赔率是净赔率（不含本金），在真实胜率附近加一点噪声"""
+    p = min(0.95, max(0.05, p + rng.gauss(0, 0.03)))
+    return round(1 / (p * (1 + LBB_MARGIN)) - 1, 2)
+
+
+def generate_tournament(base_dir, n_matches, seed=0):
+    """在 base_dir/match_data/<MATCH_NAME> 下写出完整的赛事文件夹，返回文件夹路径"""
+    rng = random.Random(seed + 1)
+    folder = os.path.join(base_dir, "match_data", MATCH_NAME)
+    os.makedirs(folder, exist_ok=True)
+    matches = synthetic_matches(n_matches, seed)
+    lbb_rows, stats = [], []
+    for match in matches:
+        p = match.pop("_p")
+        if rng.random() < LBB_FILLED:
+            lbb_rows.append({
+                "MatchID": match["MatchID"],
+                "TeamA_LittleBlackBox_Odds": _lbb_odds(rng, p),
+                "TeamA_LittleBlackBox_Rake": "N/A",
+                "TeamB_LittleBlackBox_Odds": _lbb_odds(rng, 1 - p),
+                "TeamB_LittleBlackBox_Rake": "N/A"
+            })
+            if rng.random() < 0.3:
+                team = rng.choice(["TeamA", "TeamB"])
+                stats.append({"MatchID": match["MatchID"], "Team": match[team],
+                              "Coins": float(rng.randrange(100, 5000, 100)),
+                              "Result": rng.choice(["Win", "Lose", ""])})
+    match_store.write_json_atomic(os.path.join(folder, match_store.MATCHES_FILE), {"matches": matches})
+    match_store.write_json_atomic(os.path.join(folder, "littleblackbox_odds.json"), {"littleblackbox": lbb_rows})
+    match_store.write_json_atomic(os.path.join(folder, "profit_stats.json"), {"stats": stats})
+    with contextlib.redirect_stdout(io.StringIO()):
+        metrics_engine.recompute_folder(folder)
+    _forget_store(folder)
+    return folder
+
+
+def _forget_store(folder):
+    # 每次计时都从磁盘冷加载，不使用上一轮缓存的 MatchStore
+    match_store._stores.pop(os.path.normpath(folder), None)
+
+
+def _lbb_lookup(folder):
+    store = match_store.get_store(folder)
+    lookup = {}
+    for match in store.matches:
+        row = store.get_row("littleblackbox_odds", match["MatchID"]) or {}
+        for side in ("TeamA", "TeamB"):
+            value = row.get(f"{side}_LittleBlackBox_Odds", "N/A")
+            lookup[(match["MatchTime"], match[side])] = None if value == "N/A" else value
+    return lookup
+
+
+def compute_all_teams(teams, lbb, full_list=True):
+    """对每支队伍调用 calculate_team_metrics；full_list=True 时按旧的调用方式传入整届赛事的队伍列表"""
+    results = []
+    for i, team in enumerate(teams):
+        opponent = teams[i + 1] if i % 2 == 0 else teams[i - 1]
+        opponent_data = {"team": opponent["Team"], "lbb_odds": lbb.get((opponent["MatchTime"], opponent["Team"]))}
+        result = data_processor.calculate_team_metrics(team["Team"], team["Odds"],
+                                                       lbb.get((team["MatchTime"], team["Team"])),
+                                                       opponent_data, teams if full_list else [opponent])
+        result["MatchTime"] = team["MatchTime"]
+        results.append(result)
+    return results
+
+
+def _timeit(func, repeat, setup=None):
+    """每轮先执行 setup（不计时），返回各轮耗时（秒）"""
+    timings = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func(state)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _entry(name, size, timings, **extra):
+    return {"name": name, "size": size, "repeat": len(timings),
+            "min": min(timings), "median": statistics.median(timings), "mean": statistics.fmean(timings), **extra}
+
+
+def bench_pipeline(base_dir, size, repeat, seed=0):
+    folder = generate_tournament(base_dir, size, seed)
+    matches_file = os.path.join(folder, match_store.MATCHES_FILE)
+    pristine = folder + ".orig"
+    shutil.copytree(folder, pristine)
+
+    def fresh_copy():
+        shutil.rmtree(folder)
+        shutil.copytree(pristine, folder)
+        _forget_store(folder)
+
+    entries = []
+    entries.append(_entry("read_json", size, _timeit(lambda _: data_processor.read_json(matches_file), repeat)))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        teams = data_processor.read_json(matches_file)
+    lbb = _lbb_lookup(folder)
+    entries.append(_entry("calculate_team_metrics", size,
+                          _timeit(lambda _: compute_all_teams(teams, lbb, full_list=True), repeat),
+                          variant="full_list"))
+    entries.append(_entry("calculate_team_metrics", size,
+                          _timeit(lambda _: compute_all_teams(teams, lbb, full_list=False), repeat),
+                          variant="opponent_only"))
+
+    results = compute_all_teams(teams, lbb, full_list=False)
+    entries.append(_entry("save_results", size,
+                          _timeit(lambda _: data_processor.save_results(results, folder, MATCH_NAME), repeat, fresh_copy)))
+
+    new_matches = synthetic_matches(max(1, size // 10), seed + 2, start_id=size)
+    for match in new_matches:
+        match.pop("_p")
+    entries.append(_entry("update_json_files", size,
+                          _timeit(lambda _: update_json.update_json_files(folder, new_matches), repeat, fresh_copy)))
+
+    entries.append(_entry("recompute_folder", size,
+                          _timeit(lambda _: metrics_engine.recompute_folder(folder), repeat, fresh_copy)))
+    fresh_copy()
+    shutil.rmtree(pristine)
+    return entries
+
+
+@contextlib.contextmanager
+def _method_timer(cls, method_name, timings):
+    """在窗口构造期间记录 cls.method_name 每次调用的耗时"""
+    original = getattr(cls, method_name)
+
+    def timed(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(self, *args, **kwargs)
+        finally:
+            timings.append(time.perf_counter() - start)
+
+    setattr(cls, method_name, timed)
+    try:
+        yield
+    finally:
+        setattr(cls, method_name, original)
+
+
+def ensure_display():
+    """返回可用的 DISPLAY 和需要在结束时关闭的 Xvfb 进程；都没有时返回 (None, None)"""
+    if os.environ.get("DISPLAY"):
+        return os.environ["DISPLAY"], None
+    if not shutil.which("Xvfb"):
+        return None, None
+    proc = subprocess.Popen(["Xvfb", XVFB_DISPLAY, "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(1)
+    if proc.poll() is not None:
+        return None, None
+    os.environ["DISPLAY"] = XVFB_DISPLAY
+    return XVFB_DISPLAY, proc
+
+
+def bench_gui(base_dir, size, repeat, seed=0):
+    """BettingApp 和 ProfitStatsApp 的打开时间（构造 + 处理完空闲回调）及其中 load_existing_data 的耗时"""
+    import tkinter as tk
+    import odds_gui
+    import profit_analysis
+    folder = generate_tournament(base_dir, size, seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        teams = data_processor.read_json(os.path.join(folder, match_store.MATCHES_FILE))
+
+    root = tk.Tk()
+    root.withdraw()
+    entries = []
+    cwd = os.getcwd()
+    # BettingApp 按 match_data/<赛事名> 的相对路径找文件夹
+    os.chdir(base_dir)
+    try:
+        for cls, name, make in [
+            (odds_gui.BettingApp, "BettingApp", lambda w: odds_gui.BettingApp(w, teams, MATCH_NAME)),
+            (profit_analysis.ProfitStatsApp, "ProfitStatsApp", lambda w: profit_analysis.ProfitStatsApp(w, folder)),
+        ]:
+            load_timings, open_timings = [], []
+            for _ in range(repeat):
+                _forget_store(folder)
+                _forget_store(os.path.join("match_data", MATCH_NAME))
+                window = tk.Toplevel(root)
+                with _method_timer(cls, "load_existing_data", load_timings), \
+                        contextlib.redirect_stdout(io.StringIO()):
+                    start = time.perf_counter()
+                    make(window)
+                    window.update()
+                    open_timings.append(time.perf_counter() - start)
+                window.destroy()
+            entries.append(_entry(f"{name}.load_existing_data", size, load_timings))
+            entries.append(_entry(f"{name}.open", size, open_timings))
+    finally:
+        os.chdir(cwd)
+        root.destroy()
+    return entries
+
+
+def growth_exponents(entries):
+    """按规模做对数回归，返回 {(name, variant): 指数}；1 左右为线性，2 左右为二次"""
+    series = {}
+    for entry in entries:
+        if entry["size"] > 0 and entry["median"] > 0:
+            series.setdefault((entry["name"], entry.get("variant")), []).append(
+                (math.log(entry["size"]), math.log(entry["median"])))
+    exponents = {}
+    for key, points in series.items():
+        if len(points) < 2:
+            continue
+        xs, ys = zip(*points)
+        mean_x, mean_y = statistics.fmean(xs), statistics.fmean(ys)
+        denom = sum((x - mean_x) ** 2 for x in xs)
+        if denom:
+            exponents[key] = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / denom
+    return exponents
+
+
+def run(sizes=None, repeat=DEFAULT_REPEAT, gui=True, seed=0, output=DEFAULT_OUTPUT):
+    sizes = sizes or DEFAULT_SIZES
+    entries = []
+    skipped = None
+    xvfb = None
+    if gui:
+        display, xvfb = ensure_display()
+        if display is None:
+            skipped = "没有 DISPLAY 也没有 Xvfb，跳过 GUI 基准"
+            print(skipped)
+            gui = False
+    base_dir = tempfile.mkdtemp(prefix="ybb_bench_")
+    try:
+        for size in sizes:
+            start = time.time()
+            entries.extend(bench_pipeline(os.path.join(base_dir, f"pipeline_{size}"), size, repeat, seed))
+            if gui:
+                entries.extend(bench_gui(os.path.join(base_dir, f"gui_{size}"), size, repeat, seed))
+            print(f"{size} 场比赛完成，用时 {time.time() - start:.2f} 秒")
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+        if xvfb is not None:
+            xvfb.terminate()
+
+    report = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sizes": sizes,
+        "repeat": repeat,
+        "seed": seed,
+        "gui_skipped": skipped,
+        "results": entries,
+        "growth": [{"name": name, "variant": variant, "exponent": round(exp, 3)}
+                   for (name, variant), exp in sorted(growth_exponents(entries).items(), key=lambda kv: (kv[0][0], kv[0][1] or ""))]
+    }
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到 {output}")
+    return report
+
+
+def _label(entry):
+    return entry["name"] + (f"[{entry['variant']}]" if entry.get("variant") else "")
+
+
+def print_report(report):
+    for entry in report["results"]:
+        print(f"{_label(entry):<45} n={entry['size']:<6} 中位 {entry['median'] * 1000:>10.2f} ms  "
+              f"最快 {entry['min'] * 1000:>10.2f} ms")
+    for row in report["growth"]:
+        label = row["name"] + (f"[{row['variant']}]" if row["variant"] else "")
+        print(f"{label:<45} 增长指数 {row['exponent']:.2f}")
+
+
+def compare(baseline_path, current_path, threshold=0.1):
+    """对比两次结果的中位耗时，返回 [(名称, 规模, 旧, 新, 比值)]，比值超过 1 + threshold 的标记为变慢"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(current_path, 'r', encoding='utf-8') as f:
+        current = json.load(f)
+    old = {(_label(e), e["size"]): e for e in baseline["results"]}
+    rows = []
+    for entry in current["results"]:
+        key = (_label(entry), entry["size"])
+        if key not in old:
+            continue
+        ratio = entry["median"] / old[key]["median"] if old[key]["median"] > 0 else float("inf")
+        rows.append((key[0], key[1], old[key]["median"], entry["median"], ratio))
+        status = "变慢" if ratio > 1 + threshold else ("变快" if ratio < 1 - threshold else "")
+        print(f"{key[0]:<45} n={key[1]:<6} {old[key]['median'] * 1000:>10.2f} -> "
+              f"{entry['median'] * 1000:>10.2f} ms  x{ratio:.2f} {status}")
+    return rows
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="数据流程和 GUI 加载的基准测试")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_parser = sub.add_parser("run", help="生成合成赛事并计时")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    run_parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--no-gui", action="store_true")
+    run_parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    cmp_parser = sub.add_parser("compare", help="对比两次运行的结果")
+    cmp_parser.add_argument("baseline")
+    cmp_parser.add_argument("current")
+    cmp_parser.add_argument("--threshold", type=float, default=0.1)
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    if args.command == "run":
+        print_report(run(args.sizes, args.repeat, not args.no_gui, args.seed, args.output))
+    else:
+        rows = compare(args.baseline, args.current, args.threshold)
+        sys.exit(1 if any(ratio > 1 + args.threshold for *_, ratio in rows) else 0)
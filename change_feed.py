@@ -0,0 +1,74 @@
+import json
+import logging
+import os
+from datetime import datetime
+import kelly_processor
+import match_store
+import metrics_engine
+
+# 比较每次抓取前后的盘口，得到新增、赔率变化和消失的比赛，只对受影响的 MatchID 重新计算指标。
+# 本次页面上的 MatchID 记录在 last_changes.json 的 page 中，下次抓取据此判断哪些比赛从页面上消失。
+
+CHANGES_FILE = "last_changes.json"
+
+
+def odds_snapshot(matches):
+    return {m["MatchID"]: (m["TeamA_Odds"], m["TeamB_Odds"]) for m in matches}
+
+
+def diff_matches(previous_odds, fetched_matches, previous_page=(), settled=()):
+    """previous_odds 为抓取前的 {MatchID: (TeamA_Odds, TeamB_Odds)}，fetched_matches 为本次页面上的比赛。
+    removed 只包含上次页面上有、这次没有、且还没有赛果（不在 settled 中）的比赛"""
+    changes = {"new": [], "changed": [], "removed": []}
+    seen = set()
+    for match in fetched_matches:
+        match_id = match["MatchID"]
+        seen.add(match_id)
+        current = (match["TeamA_Odds"], match["TeamB_Odds"])
+        entry = {"MatchID": match_id, "MatchTime": match["MatchTime"],
+                 "TeamA": match["TeamA"], "TeamB": match["TeamB"], "new_odds": list(current)}
+        if match_id not in previous_odds:
+            changes["new"].append(entry)
+        elif previous_odds[match_id] != current:
+            entry["old_odds"] = list(previous_odds[match_id])
+            changes["changed"].append(entry)
+    for match_id in previous_page:
+        if match_id not in seen and match_id not in settled and match_id in previous_odds:
+            changes["removed"].append({"MatchID": match_id, "old_odds": list(previous_odds[match_id])})
+    return changes
+
+
+def page_changes(match_folder, previous_odds, fetched_matches):
+    """与上次抓取的页面比较，返回的变化中带有本次页面的 MatchID 列表（page）"""
+    previous_page = load_changes(match_folder).get("page", [])
+    settled = kelly_processor.settled_match_ids(match_store.get_store(match_folder))
+    changes = diff_matches(previous_odds, fetched_matches, previous_page, settled)
+    changes["page"] = [match["MatchID"] for match in fetched_matches]
+    return changes
+
+
+def affected_ids(changes):
+    return [c["MatchID"] for c in changes["new"]] + [c["MatchID"] for c in changes["changed"]]
+
+
+def save_changes(match_folder, changes):
+    payload = dict(changes, FetchedAt=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    match_store.write_json_atomic(os.path.join(match_folder, CHANGES_FILE), payload)
+
+
+def load_changes(match_folder):
+    path = os.path.join(match_folder, CHANGES_FILE)
+    if not os.path.exists(path):
+        return {"new": [], "changed": [], "removed": [], "page": []}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def apply_changes(match_folder, changes):
+    """保存变化记录，并只为新增和赔率变化的比赛重新计算派生指标"""
+    save_changes(match_folder, changes)
+    logging.info(f"盘口变化: 新增 {len(changes['new'])}，赔率变化 {len(changes['changed'])}，消失 {len(changes['removed'])}")
+    match_ids = affected_ids(changes)
+    if not match_ids:
+        return 0
+    return metrics_engine.recompute_folder(match_folder, match_ids)
@@ -0,0 +1,249 @@
+import argparse
+import contextlib
+import json
+import os
+import sys
+
+# 无界面的命令行入口：fetch / watch / backtest / metrics / allocate / import-lbb / simulate / report / store。
+# 只在子命令需要时才导入浏览器或计算模块，不会导入 Tk。
+
+DATA_ROOT = "match_data"
+
+
+def resolve_folders(targets, use_all):
+    if use_all or not targets:
+        import match_store
+        return match_store.list_folders(DATA_ROOT)
+    folders = []
+    for target in targets:
+        folders.append(target if os.path.isdir(target) else os.path.join(DATA_ROOT, target))
+    return folders
+
+
+def emit(record):
+    sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
+
+def cmd_fetch(args, out):
+    import batch_fetch
+    with contextlib.redirect_stdout(sys.stderr):
+        statuses = batch_fetch.fetch_all(args.urls or None, workers=args.workers, backend=args.backend)
+    for status in statuses:
+        out(status)
+    return 0 if all(s["ok"] for s in statuses) else 1
+
+
+def cmd_watch(args, out):
+    import network_capture
+    with contextlib.redirect_stdout(sys.stderr):
+        saves = network_capture.watch(
+            args.url, interval=args.interval, max_seconds=args.seconds,
+            on_update=lambda result, count: out({"url": args.url, "ok": result[0] == 0, "file": result[1], "markets": count}))
+    out({"url": args.url, "saves": saves})
+    return 0
+
+
+def cmd_metrics(args, out):
+    import metrics_engine
+    for folder in resolve_folders(args.targets, args.all):
+        with contextlib.redirect_stdout(sys.stderr):
+            count = metrics_engine.recompute_folder(folder)
+        out({"folder": folder, "recomputed": count})
+    return 0
+
+
+def cmd_allocate(args, out):
+    import kelly_processor
+    for folder in resolve_folders(args.targets, args.all):
+        with contextlib.redirect_stdout(sys.stderr):
+            rows = kelly_processor.allocate(folder, args.coins, cap=args.cap, method=args.method,
+                                            fraction=args.fraction, bankroll=args.bankroll)
+        out({"folder": folder, "coins": args.coins, "allocations": rows})
+    return 0
+
+
+def cmd_import_lbb(args, out):
+    import lbb_import
+    text = sys.stdin.read() if args.file == "-" else open(args.file, 'r', encoding='utf-8').read()
+    lbb_odds = lbb_import.parse_lbb_text(text)
+    for folder in resolve_folders(args.targets, args.all):
+        with contextlib.redirect_stdout(sys.stderr):
+            report = lbb_import.apply_lbb_odds(folder, lbb_odds)
+        out(dict(report, folder=folder))
+    return 0
+
+
+def cmd_simulate(args, out):
+    import monte_carlo
+    for folder in resolve_folders(args.targets, args.all):
+        options = dict(paths=args.paths, rounds=args.rounds, workers=args.workers)
+        if args.seed is not None:
+            # 不指定时 compare_fractions 用默认种子 0，使各个系数在同一随机序列上比较
+            options["seed"] = args.seed
+        with contextlib.redirect_stdout(sys.stderr):
+            if args.fractions:
+                results = monte_carlo.compare_fractions(folder, args.balance, args.fractions, **options)
+            else:
+                results = [monte_carlo.simulate_folder(folder, args.balance, source=args.source, **options)]
+        for result in results:
+            out(dict(result, folder=folder))
+    return 0
+
+
+def cmd_backtest(args, out):
+    import backtest
+    with contextlib.redirect_stdout(sys.stderr):
+        reports = backtest.sweep(args.fractions, args.min_ev, args.caps, balance=args.balance,
+                                 data_root=DATA_ROOT, workers=args.workers, per_tournament=not args.overall_only)
+    for report in reports[:args.top]:
+        out(report)
+    return 0
+
+
+def cmd_report(args, out):
+    import match_store
+    for folder in resolve_folders(args.targets, args.all):
+        store = match_store.get_store(folder)
+        positive_ev = 0
+        for row in store.data["expected_profit_variance"]["profit"]:
+            for team in match_store.TEAM_SIDES:
+                ev = row.get(f"{team}_Expected_Profit", "N/A")
+                if ev != "N/A" and ev > 0:
+                    positive_ev += 1
+        allocated = sum(float(row["Allocated_Coins"]) for row in store.data["kelly"]["kelly"]
+                        if row.get("Allocated_Coins") not in (None, "", "N/A"))
+        out({
+            "folder": folder,
+            "matches": len(store.matches),
+            "markets_with_lbb_odds": sum(1 for row in store.data["littleblackbox_odds"]["littleblackbox"]
+                                         if row.get("TeamA_LittleBlackBox_Odds", "N/A") != "N/A"),
+            "positive_ev_bets": positive_ev,
+            "allocated_coins": round(allocated, 2),
+            "profit_summary": store.data["profit_stats"].get("summary", {})
+        })
+    return 0
+
+
+def cmd_store(args, out):
+    import match_store
+    import sqlite_store
+    db_path = args.db or sqlite_store.db_path_for(DATA_ROOT)
+    with sqlite_store.SQLiteStore(db_path) as db:
+        if args.action == "export":
+            names = [os.path.basename(os.path.normpath(t)) for t in args.targets] or db.tournaments()
+            for name in names:
+                folder = os.path.join(args.to or DATA_ROOT, name)
+                with contextlib.redirect_stdout(sys.stderr):
+                    db.export_folder(name, folder)
+                out({"tournament": name, "folder": folder, "db": db_path})
+            return 0
+
+        # import / migrate 读取 JSON 文件，不受 --store 影响
+        folders = resolve_folders(args.targets, False) if args.targets else [
+            os.path.join(DATA_ROOT, name) for name in sorted(os.listdir(DATA_ROOT))
+            if os.path.exists(os.path.join(DATA_ROOT, name, match_store.MATCHES_FILE))]
+        ok = True
+        for folder in folders:
+            with contextlib.redirect_stdout(sys.stderr):
+                name = db.import_folder(folder)
+            record = {"tournament": name, "folder": folder, "db": db_path}
+            if args.action == "migrate":
+                # 导入后逐表核对行数，全部一致才可以切换到 YBB_STORE=sqlite
+                source = match_store.MatchStore(folder)
+                counts = {"matches_info": (len(source.matches), len(db.get_matches(name))),
+                          "kelly": (len(source.data["kelly"]["kelly"]), len(db.get_allocations(name))),
+                          "profit_stats": (len(source.data["profit_stats"]["stats"]), len(db.get_bet_results(name)))}
+                for key in match_store.METRIC_FILES:
+                    counts[key] = (len(source.data[key][match_store.RESULT_FILES[key][1]]),
+                                   len(db.get_metric_rows(name, key)))
+                record["verified"] = all(a == b for a, b in counts.values())
+                record["rows"] = {key: b for key, (a, b) in counts.items()}
+                ok = ok and record["verified"]
+            out(record)
+        if args.action == "migrate" and ok:
+            out({"db": db_path, "next": f"设置 {match_store.STORE_ENV}=sqlite（或 --store sqlite）后使用数据库"})
+        return 0 if ok else 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="ybb", description="电竞赔率工具命令行模式")
+    parser.add_argument("--profile", action="store_true", help="记录各阶段耗时和计数（JSON lines 和 Prometheus 文本）")
+    parser.add_argument("--profile-dir", default="profile_data", metavar="DIR", help="--profile 的输出目录")
+    parser.add_argument("--store", choices=["json", "sqlite"], default=None,
+                        help="赛事数据的存储后端，默认 json 或环境变量 YBB_STORE")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    fetch = sub.add_parser("fetch", help="抓取赔率（默认 url_cache.json 中的所有 URL）")
+    fetch.add_argument("urls", nargs="*")
+    fetch.add_argument("--workers", type=int, default=4)
+    fetch.add_argument("--backend", choices=["selenium", "http", "http-only", "network"], default=None,
+                       help="http 先不开浏览器直接请求页面，没有赔率时回退到 selenium；默认 selenium 或 YBB_FETCH_BACKEND")
+    fetch.set_defaults(func=cmd_fetch)
+
+    watch = sub.add_parser("watch", help="打开赛事页面并持续从网络数据中接收赔率更新")
+    watch.add_argument("url")
+    watch.add_argument("--interval", type=float, default=2.0, help="保存更新的最短间隔（秒）")
+    watch.add_argument("--seconds", type=float, default=None, help="监听多久后退出，默认一直监听")
+    watch.set_defaults(func=cmd_watch)
+
+    bt = sub.add_parser("backtest", help="用已记录的赛果回测所有赛事，可对参数网格并行回测")
+    bt.add_argument("--fractions", type=float, nargs="+", default=[0.25, 0.5, 1.0])
+    bt.add_argument("--min-ev", type=float, nargs="+", default=[0.0])
+    bt.add_argument("--caps", type=float, nargs="+", default=[5000])
+    bt.add_argument("--balance", type=float, default=25000)
+    bt.add_argument("--workers", type=int, default=None)
+    bt.add_argument("--top", type=int, default=20, help="只输出 ROI 最高的前 N 组参数")
+    bt.add_argument("--overall-only", action="store_true", help="不输出每届赛事的统计，只输出总体")
+    bt.set_defaults(func=cmd_backtest)
+
+    store = sub.add_parser("store", help="在 JSON 文件和 SQLite 数据库之间导入、导出、迁移赛事数据")
+    store.add_argument("action", choices=["import", "export", "migrate"],
+                       help="import：JSON 导入数据库；export：数据库导出为 JSON；migrate：导入全部并逐表核对行数")
+    store.add_argument("targets", nargs="*", help="赛事文件夹或赛事名，默认全部")
+    store.add_argument("--db", default=None, help="数据库文件，默认 match_data/ybb.sqlite3")
+    store.add_argument("--to", default=None, help="export 的输出根目录，默认 match_data")
+    store.set_defaults(func=cmd_store)
+
+    for name, func, help_text in [("metrics", cmd_metrics, "重新计算指标"),
+                                  ("allocate", cmd_allocate, "Kelly 分配"),
+                                  ("import-lbb", cmd_import_lbb, "批量导入小黑盒赔率"),
+                                  ("simulate", cmd_simulate, "蒙特卡洛模拟资金曲线"),
+                                  ("report", cmd_report, "输出赛事汇总")]:
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("targets", nargs="*", help="赛事文件夹或 match_data 下的赛事名，默认全部")
+        p.add_argument("--all", action="store_true")
+        p.set_defaults(func=func)
+        if name == "allocate":
+            p.add_argument("--coins", type=float, required=True)
+            p.add_argument("--cap", type=float, default=5000)
+            p.add_argument("--method", choices=["portfolio", "proportional"], default="portfolio")
+            p.add_argument("--fraction", type=float, default=1.0, help="分数 Kelly 系数，如 0.5 为半 Kelly")
+            p.add_argument("--bankroll", type=float, default=None, help="资金总量，默认等于 --coins")
+        if name == "simulate":
+            p.add_argument("--balance", type=float, required=True, help="初始 coins")
+            p.add_argument("--source", choices=["kelly", "history"], default="kelly")
+            p.add_argument("--fractions", type=float, nargs="*", help="比较多个分数 Kelly 系数，如 0.25 0.5 1")
+            p.add_argument("--paths", type=int, default=100000)
+            p.add_argument("--rounds", type=int, default=1)
+            p.add_argument("--workers", type=int, default=None)
+            p.add_argument("--seed", type=int, default=None)
+        if name == "import-lbb":
+            p.add_argument("--file", default="inputs.json", help="inputs.json 格式的文件，- 表示从标准输入读取")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    import profiling
+    if args.store:
+        import match_store
+        os.environ[match_store.STORE_ENV] = args.store
+    if args.profile:
+        profiling.enable(args.profile_dir)
+    with profiling.run(args.command):
+        return args.func(args, emit)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
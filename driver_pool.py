@@ -0,0 +1,155 @@
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+import profiling
+
+# 保持若干个已启动的 Chrome 会话，多次抓取之间复用，避免每次冷启动浏览器。
+# selenium 在第一次创建浏览器时才导入，只用 HTTP 抓取时不加载。
+# 赔率只需要 DOM：页面在 DOMContentLoaded 后就交给 fetch_odds 等待渲染，图片、字体和音视频不下载。
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+BLOCKED_URL_PATTERNS = ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+                        "*.woff", "*.woff2", "*.ttf", "*.otf", "*.mp4", "*.webm", "*.mp3"]
+
+
+def build_options(capture=False):
+    """capture=True 时开启 performance 日志（网络事件），供 network_capture 读取"""
+    from selenium.webdriver.chrome.options import Options
+    options = Options()
+    options.headless = True
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--ignore-certificate-errors")
+    options.add_argument("--ignore-ssl-errors")
+    options.add_argument(f"user-agent={USER_AGENT}")
+    options.page_load_strategy = "eager"
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    if capture:
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+    return options
+
+
+def block_resources(driver, patterns=BLOCKED_URL_PATTERNS):
+    """通过 DevTools 协议屏蔽图片、字体和音视频请求；不支持时只记录警告"""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+    except Exception as e:
+        logging.warning(f"无法屏蔽静态资源请求: {e}")
+
+
+def create_driver(capture=False):
+    from selenium import webdriver
+    driver = webdriver.Chrome(options=build_options(capture))
+    block_resources(driver)
+    return profiling.instrument_driver(driver)
+
+
+class DriverSession:
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+
+
+class DriverPool:
+    def __init__(self, size=1, max_uses=20, factory=None, capture=False):
+        """capture=True 时会话开启网络日志（供 network 后端使用）；传入 factory 时由 factory 创建浏览器"""
+        self.size = size
+        self.max_uses = max_uses
+        self.capture = capture
+        self.factory = factory or (lambda: create_driver(capture=capture))
+        self._idle = []
+        self._created = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def _is_healthy(self, session):
+        try:
+            session.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, session):
+        try:
+            session.driver.quit()
+        except Exception as e:
+            logging.warning(f"关闭 WebDriver 时出错: {e}")
+        with self._cond:
+            self._created -= 1
+            self._cond.notify()
+
+    def acquire(self, timeout=None):
+        """借出一个健康的会话；池已满且都在使用时等待归还"""
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("WebDriver 会话池已关闭")
+                if self._idle:
+                    session = self._idle.pop()
+                elif self._created < self.size:
+                    self._created += 1
+                    session = None
+                else:
+                    if not self._cond.wait(timeout):
+                        raise TimeoutError("等待空闲 WebDriver 会话超时")
+                    continue
+
+            if session is None:
+                try:
+                    logging.info("启动新的 WebDriver 会话")
+                    return DriverSession(self.factory())
+                except Exception:
+                    with self._cond:
+                        self._created -= 1
+                        self._cond.notify()
+                    raise
+            if self._is_healthy(session):
+                return session
+            logging.warning("WebDriver 会话已失效，重新创建")
+            self._discard(session)
+
+    def release(self, session, failed=False):
+        """归还会话；出错或达到 max_uses 次使用后关闭并在下次借用时重建"""
+        session.uses += 1
+        if failed or session.uses >= self.max_uses or self._closed:
+            self._discard(session)
+            return
+        with self._cond:
+            self._idle.append(session)
+            self._cond.notify()
+
+    @contextmanager
+    def session(self, timeout=None):
+        session = self.acquire(timeout)
+        failed = True
+        try:
+            yield session.driver
+            failed = False
+        finally:
+            self.release(session, failed=failed)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for session in idle:
+            self._discard(session)
+
+
+_default_pool = None
+_default_lock = threading.Lock()
+
+
+def get_default_pool(size=1):
+    """进程内共享的会话池，size 只在第一次创建时生效"""
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = DriverPool(size=size)
+            atexit.register(_default_pool.close)
+        return _default_pool
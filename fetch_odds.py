@@ -1,15 +1,21 @@
+import codecs
+import copy
 import json
 import time
 import os
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+import urllib.request
+import zlib
 import logging
 from datetime import datetime, timedelta
 import update_json
+import match_store
+import driver_pool
+import odds_history
+import change_feed
+import reconcile
+import profiling
+import page_parser
+import fixtures
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -49,122 +55,183 @@ def parse_match_time(time_str, date_str):
 def is_time_close(time1_str, time2_str, threshold_hours=3):
     if time1_str == time2_str:
         return True
-    if time1_str == "未知时间" or time2_str == "未知时间":
-        return False
-    time1 = parse_match_time(*time1_str.split(' ', 1)) if ' ' in time1_str else None
-    time2 = parse_match_time(*time2_str.split(' ', 1)) if ' ' in time2_str else None
-    if time1 and time2:
-        time_diff = abs((time1 - time2).total_seconds() / 3600)
-        return time_diff <= threshold_hours
+    time1 = reconcile.time_key(time1_str)
+    time2 = reconcile.time_key(time2_str)
+    if time1 is not None and time2 is not None:
+        return abs(time1 - time2) <= threshold_hours * 60
     return False
 
-def fetch_team_odds(url="https://cyber-ggbet.com/cn/esports/matches"):
-    match_name = extract_match_name(url)
-    match_folder = os.path.join("match_data", match_name)
-    if not os.path.exists(match_folder):
-        os.makedirs(match_folder)
-    
-    json_filename = os.path.join(match_folder, "matches_info.json")
-    existing_data = {"matches": []}
-    if os.path.exists(json_filename):
-        with open(json_filename, 'r', encoding='utf-8') as file:
-            existing_data = json.load(file)
-
-    options = Options()
-    options.headless = True
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--ignore-certificate-errors")
-    options.add_argument("--ignore-ssl-errors")
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
+TEAM_SELECTOR = f'[data-test="{page_parser.TITLE_TEST}"]'
+ODDS_SELECTOR = f'[data-test="{page_parser.RESULT_TEST}"]'
+TIME_SELECTOR = 'div.text-sm.text-grey-500, div.text-sm.text-grey-500.opacity-100'
+BO_XPATH = f"//div[contains(text(), '{page_parser.BO_TEXT}')]"
+ODDS_BUTTON_SELECTOR = f'[data-test^="{page_parser.BUTTON_TEST_PREFIX}"]'
 
-    try:
-        driver = webdriver.Chrome(options=options)
-    except Exception as e:
-        logging.error(f"初始化 WebDriver 时出错: {e}")
-        return -1, None
+MAX_ATTEMPTS = 3
+WAIT_TIMEOUT = 60      # 最多等待赔率按钮出现的秒数
+SETTLE_SECONDS = 0.8   # 赔率按钮数量保持不变这么久后认为页面已渲染完
+READY_SLICE = 2        # 每次在浏览器里等待的秒数，两次之间检查是否已取消
+POLL_INTERVAL = 0.2    # 不支持异步脚本的 driver 轮询按钮数量的间隔
 
-    max_attempts = 3
-    attempt = 0
-    success = False
-    filtered_teams = []
-    time_elements = []
+# 用 MutationObserver 等待赔率按钮数量稳定：数量变化时把最后一个按钮滚动到可见区域，触发懒加载的列表继续渲染；
+# 数量保持 quietMs 不变且滚动不再移动时返回 ready，到 sliceMs 仍未稳定时返回当前数量
+READY_SCRIPT = """
+const [selector, quietMs, sliceMs, done] = arguments;
+const count = () => document.querySelectorAll(selector).length;
+let last = -1, quietTimer = null, scrolls = 0, finished = false;
+const scrollLazy = () => {
+    const buttons = document.querySelectorAll(selector);
+    if (!buttons.length) return false;
+    const targets = [document.scrollingElement || document.documentElement];
+    for (let el = buttons[0].parentElement; el; el = el.parentElement) {
+        if (el.scrollHeight > el.clientHeight + 1 && /(auto|scroll)/.test(getComputedStyle(el).overflowY)) targets.push(el);
+    }
+    const before = targets.map(el => el.scrollTop);
+    buttons[buttons.length - 1].scrollIntoView({block: 'end'});
+    targets.forEach(el => { el.scrollTop = el.scrollHeight; });
+    const moved = targets.some((el, i) => el.scrollTop !== before[i]);
+    if (moved) scrolls += 1;
+    return moved;
+};
+const finish = ready => {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    clearTimeout(quietTimer);
+    clearTimeout(sliceTimer);
+    done({ready: ready, count: count(), scrolls: scrolls});
+};
+const settle = () => {
+    const n = count();
+    if (n !== last) {
+        last = n;
+        scrollLazy();
+    }
+    clearTimeout(quietTimer);
+    if (n > 0) quietTimer = setTimeout(() => { if (scrollLazy()) settle(); else finish(true); }, quietMs);
+};
+const observer = new MutationObserver(settle);
+observer.observe(document.documentElement, {childList: true, subtree: true});
+const sliceTimer = setTimeout(() => finish(false), sliceMs);
+settle();
+"""
 
-    while attempt < max_attempts and not success:
-        attempt += 1
+# 在浏览器里一次性取出队伍名、赔率、时间和 BO 标记，避免对每个元素单独调用 .text
+EXTRACT_SCRIPT = """
+const text = el => (el.innerText || el.textContent || '').trim();
+const all = sel => Array.from(document.querySelectorAll(sel));
+return JSON.stringify({
+    titles: all(arguments[0]).map(text),
+    results: all(arguments[1]).map(text),
+    times: all(arguments[2]).map(div => Array.from(div.querySelectorAll('div')).map(text)),
+    bo: document.evaluate(arguments[3], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue !== null
+});
+"""
+
+def wait_until_ready(driver, tracker, timeout=WAIT_TIMEOUT, settle=SETTLE_SECONDS):
+    """等待赔率按钮出现且数量在 settle 秒内不再变化（期间滚动懒加载的列表），返回按钮数量。
+    timeout 秒内没有任何按钮时抛出 TimeoutException；有按钮但一直在变化时到 timeout 返回当前数量"""
+    from selenium.common.exceptions import TimeoutException, WebDriverException
+    deadline = time.monotonic() + timeout
+    count = 0
+    while True:
+        tracker.check()
+        remaining = deadline - time.monotonic()
+        slice_seconds = max(0.0, min(READY_SLICE, remaining))
         try:
-            logging.info(f"尝试第 {attempt} 次加载页面: {url}")
-            driver.get(url)
-            
-            WebDriverWait(driver, 60).until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, '[data-test^="odd-button"]'))
-            )
-            
-            title_elements = driver.find_elements(By.CSS_SELECTOR, '[data-test="odd-button__title"]')
-            result_elements = driver.find_elements(By.CSS_SELECTOR, '[data-test="odd-button__result"]')
-            time_elements = driver.find_elements(By.CSS_SELECTOR, 'div.text-sm.text-grey-500, div.text-sm.text-grey-500.opacity-100')
-
-            logging.info(f"第 {attempt} 次提取到的队伍数量: {len(title_elements)}, 赔率数量: {len(result_elements)}, 时间数量: {len(time_elements)}")
-
-            filtered_teams = []
-            min_length = min(len(title_elements), len(result_elements))
-            for i in range(0, min_length, 2):
-                try:
-                    team1_name = title_elements[i].text.strip()
-                    odds1_text = result_elements[i].text.strip()
-                    team2_name = title_elements[i + 1].text.strip() if i + 1 < min_length else ""
-                    odds2_text = result_elements[i + 1].text.strip() if i + 1 < min_length else ""
-
-                    if odds1_text == '-':
-                        odds1_text = '1.0417'
-                    if odds2_text == '-':
-                        odds2_text = '1.0417'
-
-                    if team1_name and not team1_name.startswith(('+', '-')):
-                        filtered_teams.append((team1_name, odds1_text))
-                    if team2_name and not team2_name.startswith(('+', '-')) and i + 1 < min_length:
-                        filtered_teams.append((team2_name, odds2_text))
-                except Exception as e:
-                    logging.error(f"处理队伍对 {i} 时出错: {e}")
-                    continue
+            driver.set_script_timeout(slice_seconds + 5)
+            state = driver.execute_async_script(READY_SCRIPT, ODDS_BUTTON_SELECTOR, int(settle * 1000),
+                                                int(slice_seconds * 1000))
+        except (AttributeError, NotImplementedError, WebDriverException) as e:
+            if isinstance(e, TimeoutException):
+                raise
+            logging.info(f"无法在浏览器中等待页面渲染，改为轮询按钮数量: {e}")
+            return _poll_until_ready(driver, tracker, deadline, settle)
+        count = state.get("count", 0)
+        if state.get("scrolls"):
+            profiling.count("lazy_scrolls", state["scrolls"])
+        if state.get("ready"):
+            return count
+        if time.monotonic() >= deadline:
+            if count:
+                logging.warning(f"赔率按钮数量在 {timeout} 秒内一直在变化，按当前的 {count} 个提取")
+                return count
+            raise TimeoutException(f"{timeout} 秒内没有出现赔率按钮")
 
-            logging.info(f"第 {attempt} 次过滤后的有效队伍数量: {len(filtered_teams)}")
+def _poll_until_ready(driver, tracker, deadline, settle):
+    from selenium.webdriver.common.by import By
+    from selenium.common.exceptions import TimeoutException
+    last, changed = -1, time.monotonic()
+    while True:
+        count = len(driver.find_elements(By.CSS_SELECTOR, ODDS_BUTTON_SELECTOR))
+        now = time.monotonic()
+        if count != last:
+            last, changed = count, now
+        if count and now - changed >= settle:
+            return count
+        if now >= deadline:
+            if count:
+                return count
+            raise TimeoutException("没有出现赔率按钮")
+        tracker.sleep(POLL_INTERVAL)
 
-            expected_time_elements = len(filtered_teams) // 2
-            bo_detected = any(
-                len(driver.find_elements(By.XPATH, f"//div[contains(text(), 'BO')]")) > 0
-                for _ in range(len(time_elements))
-            )
-            if len(time_elements) >= expected_time_elements or (len(time_elements) > 0 and bo_detected):
-                success = True
-            else:
-                logging.warning(f"第 {attempt} 次爬取结果不完整，时间元素数量: {len(time_elements)}，预期: {expected_time_elements}")
-                if attempt < max_attempts:
-                    logging.info("等待 5 秒后重试...")
-                    driver.refresh()
-                    time.sleep(5)
-        except TimeoutException:
-            logging.error(f"第 {attempt} 次页面加载超时，未找到预期元素")
-            if attempt == max_attempts:
-                return -1, None
-        except Exception as e:
-            logging.error(f"第 {attempt} 次加载页面或提取数据时出错: {e}")
-            if attempt == max_attempts:
-                return -1, None
+def extract_page_data(driver):
+    raw = driver.execute_script(EXTRACT_SCRIPT, TEAM_SELECTOR, ODDS_SELECTOR, TIME_SELECTOR, BO_XPATH)
+    return json.loads(raw)
 
-    if not success:
-        logging.error(f"经过 {max_attempts} 次尝试仍未成功爬取完整数据")
-        driver.quit()
-        return -1, None
+def extract_page_data_by_elements(driver):
+    """逐个元素读取的旧提取方式，结果结构与 extract_page_data 相同"""
+    from selenium.webdriver.common.by import By
+    return {
+        "titles": [e.text.strip() for e in driver.find_elements(By.CSS_SELECTOR, TEAM_SELECTOR)],
+        "results": [e.text.strip() for e in driver.find_elements(By.CSS_SELECTOR, ODDS_SELECTOR)],
+        "times": [[part.text.strip() for part in div.find_elements(By.TAG_NAME, 'div')]
+                  for div in driver.find_elements(By.CSS_SELECTOR, TIME_SELECTOR)],
+        "bo": len(driver.find_elements(By.XPATH, BO_XPATH)) > 0
+    }
+
+def filter_teams(page_data):
+    """把页面上的队伍名和赔率两两配对，去掉 +/- 开头的盘口（让分等），"-" 赔率按 1.0417 处理"""
+    titles = page_data["titles"]
+    results = page_data["results"]
+    filtered_teams = []
+    min_length = min(len(titles), len(results))
+    for i in range(0, min_length, 2):
+        try:
+            team1_name = titles[i]
+            odds1_text = results[i]
+            team2_name = titles[i + 1] if i + 1 < min_length else ""
+            odds2_text = results[i + 1] if i + 1 < min_length else ""
+
+            if odds1_text == '-':
+                odds1_text = '1.0417'
+            if odds2_text == '-':
+                odds2_text = '1.0417'
+
+            if team1_name and not team1_name.startswith(('+', '-')):
+                filtered_teams.append((team1_name, odds1_text))
+            if team2_name and not team2_name.startswith(('+', '-')) and i + 1 < min_length:
+                filtered_teams.append((team2_name, odds2_text))
+        except Exception as e:
+            logging.error(f"处理队伍对 {i} 时出错: {e}")
+            continue
+    return filtered_teams
 
-    matches_dict = {}
-    match_index = max([int(m["MatchID"]) for m in existing_data["matches"]] + [0]) if existing_data["matches"] else 0
-    for match in existing_data["matches"]:
-        key = (match["MatchName"], match["MatchTime"], match["TeamA"], match["TeamB"])
-        matches_dict[key] = match
+def is_complete(page_data, filtered_teams):
+    """每场比赛都有时间元素（或页面是 BO 赛程且至少有一个时间）时才算完整，否则需要重试"""
+    time_elements = page_data["times"]
+    expected_time_elements = len(filtered_teams) // 2
+    return len(time_elements) >= expected_time_elements or (len(time_elements) > 0 and page_data["bo"])
 
+def merge_matches(existing_matches, filtered_teams, time_elements, match_name, now=None):
+    """把一次抓取的结果合并到已有比赛列表（原地修改），返回 (全部比赛, 本次抓到的比赛, 新增的比赛)。
+    now 用于解析“今天”“明天”，回放录制的页面时传入录制时间"""
+    now = now or datetime.now()
+    match_index = max([int(m["MatchID"]) for m in existing_matches] + [0]) if existing_matches else 0
+    # 同一对队伍在时间容差内的比赛视为同一场（改期），沿用原来的 MatchID
+    index = reconcile.MatchIndex(existing_matches)
     new_entries = []
+    fetched_matches = []
     for i in range(0, len(filtered_teams), 2):
         try:
             team1_name, odds1_text = filtered_teams[i]
@@ -173,11 +240,10 @@ def fetch_team_odds(url="https://cyber-ggbet.com/cn/esports/matches"):
 
             match_idx = i // 2
             if match_idx < len(time_elements):
-                time_div = time_elements[match_idx]
-                time_parts = time_div.find_elements(By.TAG_NAME, 'div')
+                time_parts = time_elements[match_idx]
                 if len(time_parts) >= 2:
-                    part1 = time_parts[0].text.strip()
-                    part2 = time_parts[1].text.strip()
+                    part1 = time_parts[0]
+                    part2 = time_parts[1]
 
                     if part1.startswith("BO"):
                         match_time = "未知时间"
@@ -187,9 +253,9 @@ def fetch_team_odds(url="https://cyber-ggbet.com/cn/esports/matches"):
                         time_str = part1
                         date_str = part2
                         if date_str == "今天":
-                            match_time = datetime.now().strftime('%m-%d') + ' ' + time_str
+                            match_time = now.strftime('%m-%d') + ' ' + time_str
                         elif date_str == "明天":
-                            tomorrow = datetime.now() + timedelta(days=1)
+                            tomorrow = now + timedelta(days=1)
                             match_time = tomorrow.strftime('%m-%d') + ' ' + time_str
                         elif "月" in date_str:
                             month, day = date_str.split("月")
@@ -207,18 +273,20 @@ def fetch_team_odds(url="https://cyber-ggbet.com/cn/esports/matches"):
                 special_info = None
 
             if team1_name:
-                match_key = (match_name, match_time, team1_name, team2_name)
-                existing_match = matches_dict.get(match_key)
+                existing_match = index.find(team1_name, team2_name, match_time)
 
                 if existing_match:
+                    index.claim(existing_match)
+                    if existing_match["MatchTime"] != match_time:
+                        logging.info(f"比赛改期: {team1_name} vs {team2_name} {existing_match['MatchTime']} -> {match_time}")
+                        index.move(existing_match, match_time)
                     existing_match["TeamA_Odds"] = odds1_text
                     existing_match["TeamB_Odds"] = odds2_text
-                    existing_match["MatchTime"] = match_time
                     if special_info:
                         existing_match["SpecialInfo"] = special_info
                     elif "SpecialInfo" in existing_match:
                         del existing_match["SpecialInfo"]
-                    matches_dict[match_key] = existing_match
+                    fetched_matches.append(existing_match)
                 else:
                     match_index += 1
                     match_id = f"{match_index:04d}"
@@ -233,33 +301,356 @@ def fetch_team_odds(url="https://cyber-ggbet.com/cn/esports/matches"):
                     }
                     if special_info:
                         match_data["SpecialInfo"] = special_info
-                    matches_dict[match_key] = match_data
+                    index.add(match_data)
                     new_entries.append(match_data)
+                    fetched_matches.append(match_data)
         except Exception as e:
             logging.error(f"处理比赛 {i} 时出错: {e}")
             continue
 
-    new_matches_info = {"matches": list(matches_dict.values())}
 
-    if new_matches_info["matches"]:
+    return index.matches, fetched_matches, new_entries
+
+class FetchCancelled(Exception):
+    pass
+
+class FetchProgress:
+    """把抓取各阶段的进度交给回调（如 GUI 的事件队列），并检查是否已被取消"""
+    def __init__(self, callback=None, cancel_event=None):
+        self.callback = callback
+        self.cancel_event = cancel_event
+
+    def report(self, stage, message, **info):
+        if self.callback:
+            self.callback(dict(info, stage=stage, message=message))
+
+    def cancelled(self):
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def check(self):
+        if self.cancelled():
+            raise FetchCancelled()
+
+    def sleep(self, seconds):
+        if self.cancel_event is None:
+            time.sleep(seconds)
+        elif self.cancel_event.wait(seconds):
+            raise FetchCancelled()
+
+class FetchFailed(Exception):
+    """抓取失败，异常信息会作为 failed 阶段的进度消息"""
+
+BACKEND_ENV = "YBB_FETCH_BACKEND"
+HTTP_TIMEOUT = 20
+HTTP_CHUNK_SIZE = 64 * 1024
+
+class SeleniumBackend:
+    """用 Chrome 渲染页面后提取；传入 pool 时从会话池借用浏览器，否则每次启动新的浏览器"""
+    name = "selenium"
+    capture = False  # 是否需要开启网络日志的浏览器
+
+    def __init__(self, pool=None, extract_mode="script", settle=SETTLE_SECONDS, wait_timeout=WAIT_TIMEOUT):
+        self.pool = pool
+        self.extract_mode = extract_mode
+        self.settle = settle
+        self.wait_timeout = wait_timeout
+
+    def _extract(self, driver, url, tracker, recorder):
+        return _extract_with_retries(driver, url, self.extract_mode, tracker, recorder,
+                                     self.settle, self.wait_timeout)
+
+    def fetch(self, url, tracker, recorder=None):
+        if self.pool is None:
+            tracker.report("browser", "正在启动浏览器")
+            try:
+                with profiling.stage("browser_start"):
+                    driver = driver_pool.create_driver(capture=self.capture)
+            except Exception as e:
+                logging.error(f"初始化 WebDriver 时出错: {e}")
+                raise FetchFailed(f"初始化 WebDriver 时出错: {e}")
+            try:
+                return self._extract(driver, url, tracker, recorder)
+            finally:
+                driver.quit()
+
+        tracker.report("browser", "正在等待空闲的浏览器会话")
         try:
-            with open(json_filename, 'w', encoding='utf-8') as file:
-                json.dump(new_matches_info, file, ensure_ascii=False, indent=2)
-            logging.info(f"数据已成功保存到 {json_filename}")
-            
-            if new_entries:
-                update_json.update_json_files(match_folder, new_entries)
+            with profiling.stage("browser_acquire"):
+                session = _acquire_session(self.pool, tracker)
+        except FetchCancelled:
+            raise
+        except Exception as e:
+            logging.error(f"从会话池获取 WebDriver 时出错: {e}")
+            raise FetchFailed(f"从会话池获取 WebDriver 时出错: {e}")
+        failed = True
+        try:
+            page_data = self._extract(session.driver, url, tracker, recorder)
+            failed = False
+            return page_data
+        except FetchCancelled:
+            # 取消不代表浏览器出错，会话照常归还
+            failed = False
+            raise
+        finally:
+            self.pool.release(session, failed=failed)
+
+class HttpBackend:
+    """不开浏览器：HTTP GET 后边下载边解析服务端渲染的 HTML。
+    页面里没有赔率按钮（由 JS 渲染）或结果不完整时交给 fallback（通常是 SeleniumBackend）"""
+    name = "http"
+
+    def __init__(self, fallback=None, timeout=HTTP_TIMEOUT, chunk_size=HTTP_CHUNK_SIZE):
+        self.fallback = fallback
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+
+    def _chunks(self, response, tracker, html_parts):
+        charset = response.headers.get_content_charset() or "utf-8"
+        decoder = codecs.getincrementaldecoder(charset)(errors="replace")
+        gzipped = (response.headers.get("Content-Encoding") or "").lower() == "gzip"
+        inflater = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzipped else None
+        while True:
+            tracker.check()
+            raw = response.read(self.chunk_size)
+            if not raw:
+                break
+            text = decoder.decode(inflater.decompress(raw) if inflater else raw)
+            if html_parts is not None:
+                html_parts.append(text)
+            yield text
+        tail = decoder.decode(inflater.flush() if inflater else b"", final=True)
+        if html_parts is not None:
+            html_parts.append(tail)
+        yield tail
+
+    def _fall_back(self, url, tracker, recorder, reason):
+        if self.fallback is None:
+            logging.error(reason)
+            raise FetchFailed(reason)
+        logging.info(f"{reason}，改用 {self.fallback.name} 抓取")
+        tracker.report("fallback", f"{reason}，改用 {self.fallback.name} 抓取", backend=self.fallback.name)
+        profiling.count("fetch_fallbacks", backend=self.fallback.name)
+        return self.fallback.fetch(url, tracker, recorder)
+
+    def fetch(self, url, tracker, recorder=None):
+        tracker.check()
+        tracker.report("loading", "正在通过 HTTP 获取页面", attempt=1)
+        request = urllib.request.Request(url, headers={
+            "User-Agent": driver_pool.USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml",
+            "Accept-Encoding": "gzip"
+        })
+        html_parts = [] if recorder is not None else None
+        try:
+            with profiling.stage("http_get"), urllib.request.urlopen(request, timeout=self.timeout) as response:
+                page_data, buttons = page_parser.extract_from_stream(self._chunks(response, tracker, html_parts))
+        except FetchCancelled:
+            raise
+        except Exception as e:
+            return self._fall_back(url, tracker, recorder, f"HTTP 获取页面时出错: {e}")
+        if recorder is not None:
+            recorder.save(url, 1, page_data, "http", html="".join(html_parts))
+
+        filtered_teams = filter_teams(page_data)
+        tracker.report("extracted", f"提取到 {len(filtered_teams)} 支队伍、{len(page_data['times'])} 个时间",
+                       teams=len(filtered_teams), times=len(page_data["times"]))
+        if not buttons or not filtered_teams:
+            return self._fall_back(url, tracker, recorder, "页面中没有服务端渲染的赔率")
+        if not is_complete(page_data, filtered_teams):
+            return self._fall_back(url, tracker, recorder,
+                                   f"HTTP 页面结果不完整，时间元素数量: {len(page_data['times'])}，预期: {len(filtered_teams) // 2}")
+        return page_data
+
+def make_backend(backend=None, pool=None, extract_mode="script"):
+    """backend 可以是后端对象，或名称 selenium / http（没有赔率时回退到 selenium）/ http-only /
+    network（从网络响应中取盘口，见 network_capture）；不指定时使用环境变量 YBB_FETCH_BACKEND，默认 selenium"""
+    if backend is not None and not isinstance(backend, str):
+        return backend
+    name = backend or os.environ.get(BACKEND_ENV) or "selenium"
+    if name == "selenium":
+        return SeleniumBackend(pool, extract_mode)
+    if name == "http":
+        return HttpBackend(fallback=SeleniumBackend(pool, extract_mode))
+    if name == "http-only":
+        return HttpBackend()
+    if name == "network":
+        import network_capture
+        # 普通会话池中的浏览器没有开启网络日志，传入的池不是 capture 池时改用共享的 capture 池
+        if pool is not None and not getattr(pool, "capture", False):
+            pool = network_capture.get_capture_pool()
+        return network_capture.NetworkBackend(pool, extract_mode)
+    raise ValueError(f"未知的抓取后端: {name}")
+
+def fetch_team_odds(url="https://cyber-ggbet.com/cn/esports/matches", extract_mode="script", pool=None,
+                    progress=None, cancel_event=None, record_dir=None, backend=None):
+    """抓取赛事赔率并合并到 matches_info.json；传入 pool 时从会话池借用已启动的浏览器。
+    progress 为进度回调，参数是包含 stage 和 message 的 dict；cancel_event 被 set 后尽快停止抓取。
+    record_dir（或环境变量 YBB_RECORD_FIXTURES）不为空时把每次尝试提取到的数据和页面 HTML 录制为回放用的 fixture。
+    backend 见 make_backend"""
+    backend = make_backend(backend, pool, extract_mode)
+    with profiling.run("fetch", match=extract_match_name(url), backend=backend.name):
+        return _fetch_team_odds(url, backend, progress, cancel_event, fixtures.get_recorder(record_dir))
+
+def _fetch_team_odds(url, backend, progress, cancel_event, recorder):
+    tracker = FetchProgress(progress, cancel_event)
+    try:
+        page_data = backend.fetch(url, tracker, recorder)
+        return _save_page(url, page_data, tracker)
+    except FetchFailed as e:
+        tracker.report("failed", str(e))
+        return -1, None
+    except FetchCancelled:
+        logging.info(f"已取消抓取: {url}")
+        tracker.report("cancelled", "已取消")
+        return -1, None
+
+def _acquire_session(pool, tracker):
+    if tracker.cancel_event is None:
+        return pool.acquire()
+    # 分段等待，等待期间也能响应取消
+    while True:
+        tracker.check()
+        try:
+            return pool.acquire(timeout=1)
+        except TimeoutError:
+            continue
+
+def _fetch_with_driver(driver, url, extract_mode, tracker=None, recorder=None,
+                       settle=SETTLE_SECONDS, wait_timeout=WAIT_TIMEOUT, now=None):
+    """用已有的 driver 抓取并保存（回放 fixture 时使用）"""
+    tracker = tracker or FetchProgress()
+    try:
+        page_data = _extract_with_retries(driver, url, extract_mode, tracker, recorder, settle, wait_timeout)
+    except FetchFailed as e:
+        tracker.report("failed", str(e))
+        return -1, None
+    return _save_page(url, page_data, tracker, now)
+
+def _extract_with_retries(driver, url, extract_mode, tracker, recorder=None,
+                          settle=SETTLE_SECONDS, wait_timeout=WAIT_TIMEOUT):
+    """加载页面并等待赔率按钮稳定后提取；结果不完整时不刷新页面，继续等待（并滚动懒加载的列表）后再提取，
+    只有超时或出错时才重新加载。返回完整的页面数据"""
+    from selenium.common.exceptions import TimeoutException
+    max_attempts = MAX_ATTEMPTS
+    attempt = 0
+    success = False
+    page_data = None
+    reload_needed = True
+
+    while attempt < max_attempts and not success:
+        attempt += 1
+        try:
+            tracker.check()
+            if reload_needed:
+                logging.info(f"尝试第 {attempt} 次加载页面: {url}")
+                tracker.report("loading", f"第 {attempt} 次加载页面", attempt=attempt)
+                with profiling.stage("page_get"):
+                    driver.get(url)
+                reload_needed = False
+
+            with profiling.stage("wait"):
+                buttons = wait_until_ready(driver, tracker, wait_timeout, settle)
+            logging.info(f"第 {attempt} 次等待后赔率按钮数量: {buttons}")
+            tracker.report("loaded", "页面已加载", attempt=attempt)
             
-            driver.quit()
-            return 0, json_filename
+            with profiling.stage("extract", mode=extract_mode):
+                if extract_mode == "script":
+                    page_data = extract_page_data(driver)
+                else:
+                    page_data = extract_page_data_by_elements(driver)
+            if recorder is not None:
+                recorder.save(url, attempt, page_data, extract_mode, driver)
+            time_elements = page_data["times"]
+
+            logging.info(f"第 {attempt} 次提取到的队伍数量: {len(page_data['titles'])}, 赔率数量: {len(page_data['results'])}, 时间数量: {len(time_elements)}")
+
+            filtered_teams = filter_teams(page_data)
+
+            logging.info(f"第 {attempt} 次过滤后的有效队伍数量: {len(filtered_teams)}")
+            tracker.report("extracted", f"提取到 {len(filtered_teams)} 支队伍、{len(time_elements)} 个时间",
+                           teams=len(filtered_teams), times=len(time_elements))
+
+            if is_complete(page_data, filtered_teams):
+                success = True
+            else:
+                logging.warning(f"第 {attempt} 次爬取结果不完整，时间元素数量: {len(time_elements)}，预期: {len(filtered_teams) // 2}")
+                if attempt < max_attempts:
+                    logging.info("继续等待页面渲染后重新提取...")
+        except FetchCancelled:
+            raise
+        except TimeoutException:
+            logging.error(f"第 {attempt} 次页面加载超时，未找到预期元素")
+            reload_needed = True
+            if attempt == max_attempts:
+                raise FetchFailed("页面加载超时，未找到预期元素")
         except Exception as e:
-            logging.error(f"保存 JSON 文件时出错: {e}")
-            driver.quit()
+            logging.error(f"第 {attempt} 次加载页面或提取数据时出错: {e}")
+            reload_needed = True
+            if attempt == max_attempts:
+                raise FetchFailed(f"加载页面或提取数据时出错: {e}")
+
+    if not success:
+        logging.error(f"经过 {max_attempts} 次尝试仍未成功爬取完整数据")
+        raise FetchFailed(f"经过 {max_attempts} 次尝试仍未成功爬取完整数据")
+    return page_data
+
+def _save_page(url, page_data, tracker, now=None):
+    """把完整的页面数据合并到赛事文件夹并写盘，返回 (0, 文件名) 或 (-1, None)"""
+    # 写盘之前最后一次检查取消，之后的保存不会被打断
+    tracker.check()
+    match_name = extract_match_name(url)
+    match_folder = os.path.join("match_data", match_name)
+    if not os.path.exists(match_folder):
+        os.makedirs(match_folder)
+
+    # 读取现有比赛到写完结果文件和重算指标都持有文件夹锁，同一赛事的其他抓取和界面写入在此期间等待
+    with match_store.locked(match_folder) as store:
+        json_filename = store.path("matches_info")
+        # 合并在副本上进行，写盘失败时共享的 MatchStore 不会留下一半的修改
+        existing_data = {"matches": copy.deepcopy(store.matches)}
+
+        filtered_teams = filter_teams(page_data)
+        time_elements = page_data["times"]
+        merge_started = profiling.clock()
+        previous_odds = change_feed.odds_snapshot(existing_data["matches"])
+        merged, fetched_matches, new_entries = merge_matches(existing_data["matches"], filtered_teams, time_elements,
+                                                             match_name, now)
+        new_matches_info = {"matches": merged}
+        profiling.record("merge", merge_started)
+        profiling.count("matches_fetched", len(fetched_matches))
+        profiling.count("matches_new", len(new_entries))
+
+        if new_matches_info["matches"]:
+            try:
+                store.matches_data = new_matches_info
+                store.reindex()
+                store.save(["matches_info"])
+                logging.info(f"数据已成功保存到 {json_filename}")
+
+                if fetched_matches:
+                    with profiling.stage("history_append"):
+                        odds_history.append_snapshot(match_folder, fetched_matches)
+            
+                if new_entries:
+                    with profiling.stage("update_json"):
+                        update_json.update_json_files(match_folder, new_entries)
+
+                with profiling.stage("apply_changes"):
+                    change_feed.apply_changes(match_folder, change_feed.page_changes(match_folder, previous_odds, fetched_matches))
+            
+                tracker.report("saved", f"已保存 {len(fetched_matches)} 场比赛", file=json_filename,
+                               matches=len(fetched_matches), new=len(new_entries))
+                return 0, json_filename
+            except Exception as e:
+                store.reload()
+                logging.error(f"保存 JSON 文件时出错: {e}")
+                tracker.report("failed", f"保存 JSON 文件时出错: {e}")
+                return -1, None
+        else:
+            logging.warning("没有有效数据可保存")
+            tracker.report("failed", "没有有效数据可保存")
             return -1, None
-    else:
-        logging.warning("没有有效数据可保存")
-        driver.quit()
-        return -1, None
+
 
 if __name__ == "__main__":
     fetch_team_odds("https://cyber-ggbet.com/cn/esports/tournament/esl-pro-league-season-21-play-in-11-02")
\ No newline at end of file
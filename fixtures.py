@@ -0,0 +1,289 @@
+import argparse
+import functools
+import glob
+import http.server
+import json
+import os
+import threading
+import time
+from datetime import datetime
+import page_parser
+
+# 抓取的录制与回放。录制：每次尝试提取到的数据（和页面 HTML）保存为
+#   <目录>/<赛事名>/<录制时间>/attempt_<n>.json（及 attempt_<n>.html）
+# 回放：ReplayDriver 按顺序把录制的尝试交给 fetch_odds 的同一套流程（提取 → 完整性检查 → 重试 → 合并 → 写盘），
+# 可以离线复现“结果不完整”后继续等待再提取的情况；FixtureServer 用本地 HTTP 服务提供录制的 HTML，可让真实浏览器打开。
+# bench 对所有录制页面离线计时 HTML 解析和合并的吞吐。
+
+RECORD_ENV = "YBB_RECORD_FIXTURES"
+DEFAULT_DIR = "fixtures"
+ATTEMPT_PATTERN = "attempt_*.json"
+
+
+class FixtureRecorder:
+    def __init__(self, root):
+        self.root = root
+        self.session = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+
+    def save(self, url, attempt, page_data, extract_mode, driver=None, html=None):
+        """保存一次尝试；html 为空时从 driver.page_source 读取"""
+        import fetch_odds
+        folder = os.path.join(self.root, fetch_odds.extract_match_name(url), self.session)
+        os.makedirs(folder, exist_ok=True)
+        base = os.path.join(folder, f"attempt_{attempt}")
+        if html is None and driver is not None:
+            try:
+                html = driver.page_source
+            except Exception as e:
+                print(f"读取页面 HTML 时出错: {e}")
+        if html:
+            with open(base + ".html", 'w', encoding='utf-8') as f:
+                f.write(html)
+        with open(base + ".json", 'w', encoding='utf-8') as f:
+            json.dump({"url": url, "attempt": attempt, "recorded_at": datetime.now().isoformat(),
+                       "extract_mode": extract_mode, "has_html": bool(html), "page_data": page_data},
+                      f, ensure_ascii=False, indent=2)
+
+
+def get_recorder(record_dir=None):
+    """record_dir 或环境变量 YBB_RECORD_FIXTURES 不为空时返回录制器，否则返回 None"""
+    record_dir = record_dir or os.environ.get(RECORD_ENV)
+    if not record_dir:
+        return None
+    return FixtureRecorder(DEFAULT_DIR if record_dir in ("1", "true") else record_dir)
+
+
+def load_attempt(path):
+    """读取一次尝试。.json 中没有 page_data 时从同名 .html 解析；也可以直接传入手工保存的 .html"""
+    base, ext = os.path.splitext(path)
+    fixture = {"url": None, "attempt": 1, "recorded_at": None, "page_data": None}
+    if ext == ".json":
+        with open(path, 'r', encoding='utf-8') as f:
+            fixture.update(json.load(f))
+    html_path = base + ".html"
+    if os.path.exists(html_path):
+        with open(html_path, 'r', encoding='utf-8') as f:
+            fixture["html"] = f.read()
+    else:
+        fixture["html"] = None
+    if fixture["page_data"] is None and fixture["html"] is not None:
+        fixture["page_data"] = page_parser.extract_from_html(fixture["html"])
+    return fixture
+
+
+def load_session(folder):
+    """按尝试次数顺序读取一次录制（一个文件夹）的所有尝试"""
+    paths = glob.glob(os.path.join(folder, ATTEMPT_PATTERN))
+    if paths:
+        attempts = [load_attempt(path) for path in paths]
+        attempts.sort(key=lambda a: a["attempt"])
+        return attempts
+    # 手工保存的 HTML 按文件名顺序作为各次尝试
+    attempts = [load_attempt(path) for path in sorted(glob.glob(os.path.join(folder, "*.html")))]
+    for n, attempt in enumerate(attempts, 1):
+        attempt["attempt"] = n
+    return attempts
+
+
+def find_sessions(root):
+    """返回 root 下所有录制文件夹，按赛事名和录制时间排序"""
+    folders = {os.path.dirname(path) for pattern in (ATTEMPT_PATTERN, "*.html")
+               for path in glob.glob(os.path.join(root, "**", pattern), recursive=True)}
+    return sorted(folders)
+
+
+class _Element:
+    __slots__ = ("text", "children")
+
+    def __init__(self, text, children=()):
+        self.text = text
+        self.children = list(children)
+
+    def find_elements(self, by, selector):
+        return self.children
+
+
+class ReplayDriver:
+    """按顺序回放录制的尝试：每次等待页面渲染（execute_async_script）进入下一次尝试，最后一次之后一直停在最后一次"""
+    def __init__(self, attempts):
+        self.attempts = attempts
+        self.position = -1
+        self.current_url = "about:blank"
+
+    @property
+    def current(self):
+        return self.attempts[max(self.position, 0)]
+
+    @property
+    def page_data(self):
+        return self.current["page_data"]
+
+    @property
+    def page_source(self):
+        return self.current.get("html") or ""
+
+    @property
+    def recorded_at(self):
+        value = self.attempts[0].get("recorded_at") if self.attempts else None
+        return datetime.fromisoformat(value) if value else None
+
+    def get(self, url):
+        self.current_url = url
+
+    def refresh(self):
+        pass
+
+    def set_script_timeout(self, seconds):
+        pass
+
+    def execute_async_script(self, script, *args):
+        """代替 fetch_odds.READY_SCRIPT：进入下一次尝试，按钮数量取录制的队伍名和赔率数量"""
+        self.position = min(self.position + 1, len(self.attempts) - 1)
+        count = len(self.page_data["titles"]) + len(self.page_data["results"])
+        return {"ready": count > 0, "count": count, "scrolls": 0}
+
+    def execute_script(self, script, *args):
+        return json.dumps(self.page_data, ensure_ascii=False)
+
+    def find_elements(self, by, selector):
+        import fetch_odds
+        data = self.page_data
+        if selector == fetch_odds.TEAM_SELECTOR:
+            return [_Element(t) for t in data["titles"]]
+        if selector == fetch_odds.ODDS_SELECTOR:
+            return [_Element(t) for t in data["results"]]
+        if selector == fetch_odds.TIME_SELECTOR:
+            return [_Element("", [_Element(part) for part in parts]) for parts in data["times"]]
+        if selector == fetch_odds.BO_XPATH:
+            return [_Element(page_parser.BO_TEXT)] if data["bo"] else []
+        if selector == fetch_odds.ODDS_BUTTON_SELECTOR:
+            return [_Element(t) for t in data["titles"] + data["results"]]
+        return []
+
+    def quit(self):
+        pass
+
+
+def replay(folder, url=None, extract_mode="script"):
+    """用 fetch_odds 的完整流程回放一次录制，结果写入当前目录下的 match_data/<赛事名>（与真实抓取相同）。
+    等待页面渲染不耗时；返回与 fetch_team_odds 相同的 (状态, 文件名)"""
+    import fetch_odds
+    attempts = load_session(folder)
+    if not attempts:
+        print(f"{folder} 中没有录制的页面")
+        return -1, None
+    driver = ReplayDriver(attempts)
+    url = url or attempts[0]["url"]
+    return fetch_odds._fetch_with_driver(driver, url, extract_mode, settle=0, wait_timeout=0,
+                                         now=driver.recorded_at)
+
+
+def parse_and_merge(attempts, existing_matches, match_name, now=None):
+    """不写盘的离线流程：依次检查每次尝试，取第一次完整的结果合并，返回 (尝试次数, 合并结果) 或 (尝试次数, None)"""
+    import fetch_odds
+    for n, attempt in enumerate(attempts[:fetch_odds.MAX_ATTEMPTS], 1):
+        page_data = attempt["page_data"]
+        filtered_teams = fetch_odds.filter_teams(page_data)
+        if fetch_odds.is_complete(page_data, filtered_teams):
+            return n, fetch_odds.merge_matches(existing_matches, filtered_teams, page_data["times"], match_name, now)
+    return min(len(attempts), fetch_odds.MAX_ATTEMPTS), None
+
+
+class FixtureServer:
+    """在本地端口上提供录制目录中的文件，with 块内可用 url_for() 得到某个 HTML 的地址"""
+    def __init__(self, root, host="127.0.0.1", port=0):
+        handler = functools.partial(_QuietHandler, directory=os.path.abspath(root))
+        self.root = os.path.abspath(root)
+        self.httpd = http.server.ThreadingHTTPServer((host, port), handler)
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url_for(self, path):
+        rel = os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, "/")
+        return f"{self.base_url}/{rel}"
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        return False
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def bench(root=DEFAULT_DIR, repeat=3):
+    """对 root 下所有录制离线计时：HTML 解析（有 HTML 的尝试）以及过滤 + 完整性检查 + 合并。
+    同一赛事的多次录制按时间顺序合并到同一个比赛列表，与实际抓取时一样"""
+    import fetch_odds
+    sessions = [(folder, load_session(folder)) for folder in find_sessions(root)]
+    sessions = [(folder, attempts) for folder, attempts in sessions if attempts]
+    pages = [a["html"] for _, attempts in sessions for a in attempts if a.get("html")]
+    report = {"sessions": len(sessions), "attempts": sum(len(a) for _, a in sessions), "html_pages": len(pages)}
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for html in pages:
+            page_parser.extract_from_html(html)
+        timings.append(time.perf_counter() - start)
+    if pages:
+        report["html_parse_seconds"] = min(timings)
+        report["html_pages_per_second"] = len(pages) / min(timings) if min(timings) > 0 else None
+
+    timings, incomplete, merged = [], 0, 0
+    for _ in range(repeat):
+        state = {}
+        incomplete = merged = 0
+        start = time.perf_counter()
+        for folder, attempts in sessions:
+            match_name = fetch_odds.extract_match_name(attempts[0]["url"] or "")
+            if match_name == "unknown_match":
+                match_name = os.path.basename(os.path.dirname(folder))
+            recorded_at = attempts[0].get("recorded_at")
+            now = datetime.fromisoformat(recorded_at) if recorded_at else None
+            tries, result = parse_and_merge(attempts, state.setdefault(match_name, []), match_name, now)
+            incomplete += tries - 1 if result else tries
+            if result:
+                merged += len(result[1])
+        timings.append(time.perf_counter() - start)
+    report.update({"merge_seconds": min(timings), "incomplete_attempts": incomplete, "matches_merged": merged,
+                   "sessions_per_second": len(sessions) / min(timings) if sessions and min(timings) > 0 else None})
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="抓取结果的录制回放")
+    sub = parser.add_subparsers(dest="command", required=True)
+    replay_parser = sub.add_parser("replay", help="用完整抓取流程回放录制文件夹，写入当前目录的 match_data")
+    replay_parser.add_argument("folders", nargs="+")
+    replay_parser.add_argument("--mode", choices=["script", "elements"], default="script")
+    bench_parser = sub.add_parser("bench", help="离线计时解析和合并")
+    bench_parser.add_argument("root", nargs="?", default=DEFAULT_DIR)
+    bench_parser.add_argument("--repeat", type=int, default=3)
+    serve_parser = sub.add_parser("serve", help="用本地 HTTP 服务提供录制的 HTML")
+    serve_parser.add_argument("root", nargs="?", default=DEFAULT_DIR)
+    serve_parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    if args.command == "replay":
+        for folder in args.folders:
+            print(folder, replay(folder, extract_mode=args.mode))
+    elif args.command == "bench":
+        print(json.dumps(bench(args.root, args.repeat), ensure_ascii=False, indent=2))
+    else:
+        with FixtureServer(args.root, port=args.port) as server:
+            print(f"录制的页面: {server.base_url}/")
+            try:
+                threading.Event().wait()
+            except KeyboardInterrupt:
+                pass
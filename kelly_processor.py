@@ -0,0 +1,185 @@
+import numpy as np
+import match_store
+
+# Kelly 分配。
+# portfolio：所有未结束的盘口共用一个资金池，按各盘口输赢组合下的期望对数财富同时求解各注的 Kelly 比例
+#            （可用分数 Kelly），满足每注上限、总预算，以及同一场比赛只下一边。
+# proportional：按 Kelly 值比例分配总 coins，每注上限 5000，超出上限的部分再分给其余队伍。
+
+MAX_COINS_PER_BET = 5000
+ENUMERATE_LIMIT = 12       # 盘口数不超过这个值时枚举全部输赢组合，否则抽样
+SCENARIO_SAMPLES = 20000
+
+
+def kelly_candidates(store):
+    """从 expected_profit_variance.json 和 littleblackbox_odds.json 中取出 Kelly > 0 的投注选项"""
+    candidates = []
+    for row in store.data["expected_profit_variance"]["profit"]:
+        lbb_row = store.get_row("littleblackbox_odds", row["MatchID"]) or {}
+        sides = []
+        for team in match_store.TEAM_SIDES:
+            kelly = row.get(f"{team}_Kelly", "N/A")
+            ev = row.get(f"{team}_Expected_Profit", "N/A")
+            odds = lbb_row.get(f"{team}_LittleBlackBox_Odds", "N/A")
+            if kelly != "N/A" and float(kelly) > 0 and ev != "N/A" and odds != "N/A":
+                sides.append({"MatchID": row["MatchID"], "Team": team, "Kelly": float(kelly),
+                              "Expected_Profit": float(ev), "Odds": float(odds)})
+        # 同一场比赛两边都为正时只保留 Kelly 较大的一边
+        if sides:
+            candidates.append(max(sides, key=lambda c: c["Kelly"]))
+    return candidates
+
+
+def allocate_proportional(kellys, coins, cap=MAX_COINS_PER_BET):
+    allocation = [0.0] * len(kellys)
+    open_idx = [i for i, k in enumerate(kellys) if k > 0]
+    remaining = coins
+    while open_idx and remaining > 1e-9:
+        total = sum(kellys[i] for i in open_idx)
+        capped = [i for i in open_idx if remaining * kellys[i] / total >= cap - allocation[i]]
+        if not capped:
+            for i in open_idx:
+                allocation[i] += remaining * kellys[i] / total
+            break
+        for i in capped:
+            remaining -= cap - allocation[i]
+            allocation[i] = cap
+        open_idx = [i for i in open_idx if i not in capped]
+    return allocation
+
+
+def _scenarios(p, b, samples, seed):
+    """各注输赢组合的收益矩阵（每行一种结果，赢为 b、输为 -1）和概率。
+    盘口数不超过 ENUMERATE_LIMIT 时枚举全部 2^n 种结果，否则抽样，并总是包含全输的一行以保证财富为正"""
+    n = len(p)
+    if n <= ENUMERATE_LIMIT:
+        wins = ((np.arange(2 ** n)[:, None] >> np.arange(n)) & 1).astype(bool)
+        weights = np.prod(np.where(wins, p, 1 - p), axis=1)
+    else:
+        rng = np.random.default_rng(seed)
+        all_lose = float(np.prod(1 - p))
+        wins = np.vstack([np.zeros((1, n), dtype=bool), rng.random((samples, n)) < p])
+        weights = np.concatenate([[all_lose], np.full(samples, (1 - all_lose) / samples)])
+    return np.where(wins, b, -1.0), weights
+
+
+def _project(f, upper, budget):
+    # 投影到 {0 <= f <= upper, sum(f) <= budget}：超出预算时二分求统一的平移量
+    clipped = np.clip(f, 0.0, upper)
+    if clipped.sum() <= budget:
+        return clipped
+    lo, hi = 0.0, float(np.max(f))
+    for _ in range(100):
+        mid = (lo + hi) / 2
+        if np.clip(f - mid, 0.0, upper).sum() > budget:
+            lo = mid
+        else:
+            hi = mid
+    return np.clip(f - hi, 0.0, upper)
+
+
+def _log_growth(f, returns, weights):
+    wealth = 1.0 + returns @ f
+    if np.any(wealth <= 0):
+        return -np.inf, None
+    return float(weights @ np.log(wealth)), wealth
+
+
+def allocate_portfolio(probs, odds, coins, bankroll=None, fraction=1.0, cap=MAX_COINS_PER_BET, tol=1e-10,
+                       samples=SCENARIO_SAMPLES, seed=0, max_iter=2000):
+    """同时 Kelly：在所有盘口输赢组合上最大化共同资金的期望对数财富 E[log(1 + sum(f*X))]，
+    满足 sum(f)*bankroll <= coins、f*bankroll <= cap；fraction < 1 时按比例缩小全 Kelly 的解"""
+    p = np.asarray(probs, dtype=np.float64)
+    b = np.asarray(odds, dtype=np.float64)
+    if len(p) == 0:
+        return np.zeros(0)
+    bankroll = coins if bankroll is None else bankroll
+    fraction = max(fraction, 1e-12)
+    # 缩放后要满足约束，所以全 Kelly 的上限放大 1/fraction；总比例不超过 1，保证全输时财富仍为正
+    upper = np.full(len(p), min(cap, bankroll) / bankroll / fraction)
+    budget = min(coins / bankroll / fraction, 1.0)
+    active = p * (b + 1) - 1 > 0
+    stakes = np.zeros(len(p))
+    if not active.any():
+        return stakes
+
+    returns, weights = _scenarios(p[active], b[active], samples, seed)
+    upper, f = upper[active], np.zeros(int(active.sum()))
+    value, wealth = _log_growth(f, returns, weights)
+    step = 1.0
+    # 投影梯度上升，步长回溯（目标函数为凹函数）
+    for _ in range(max_iter):
+        grad = returns.T @ (weights / wealth)
+        while True:
+            candidate = _project(f + step * grad, upper, budget)
+            new_value, new_wealth = _log_growth(candidate, returns, weights)
+            if new_value >= value + 1e-4 * grad @ (candidate - f) or step < 1e-12:
+                break
+            step /= 2
+        moved = float(np.max(np.abs(candidate - f)))
+        if new_value < value:
+            break
+        f, value, wealth = candidate, new_value, new_wealth
+        if moved < tol:
+            break
+        step *= 2
+    stakes[active] = f
+    return fraction * stakes * bankroll
+
+
+def settled_match_ids(store):
+    """已记录赛果的比赛：kelly.json 的 MatchResult 或 profit_stats.json 的 Result 为 Win/Lose"""
+    settled = {row["MatchID"] for row in store.data["kelly"]["kelly"] if row.get("MatchResult") in ("Win", "Lose")}
+    settled.update(row["MatchID"] for row in store.data["profit_stats"].get("stats", [])
+                   if row.get("Result") in ("Win", "Lose"))
+    return settled
+
+
+def allocate(match_folder, coins, cap=MAX_COINS_PER_BET, save=True, method="portfolio", fraction=1.0, bankroll=None):
+    with match_store.locked(match_folder) as store:
+        settled = settled_match_ids(store)
+        candidates = [c for c in kelly_candidates(store) if c["MatchID"] not in settled]
+        candidates.sort(key=lambda c: c["Kelly"], reverse=True)
+        if method == "proportional":
+            allocation = allocate_proportional([c["Kelly"] for c in candidates], coins, cap)
+        else:
+            # 由期望收益反推胜率：EV = (b + 1) * p - 1
+            odds = np.array([c["Odds"] for c in candidates])
+            probs = (np.array([c["Expected_Profit"] for c in candidates]) + 1) / (odds + 1)
+            allocation = allocate_portfolio(probs, odds, coins, bankroll=bankroll, fraction=fraction, cap=cap)
+
+        rows = []
+        for candidate, amount in zip(candidates, allocation):
+            previous = store.kelly_rows.get((candidate["MatchID"], candidate["Team"]), {})
+            rows.append({
+                "MatchID": candidate["MatchID"],
+                "Team": candidate["Team"],
+                "Kelly": candidate["Kelly"],
+                "Allocated_Coins": f"{amount:.2f}",
+                "MatchResult": previous.get("MatchResult", ""),
+                "Profit": previous.get("Profit", "")
+            })
+
+        if save:
+            # 按 (MatchID, Team) 更新或追加；已结算的行原样保留，
+            # 未结算但不再是候选的行（Kelly 降为 0、看好的一边换了）分配清零，避免留下过期的投注
+            allocated = {(row["MatchID"], row["Team"]) for row in rows}
+            for key, existing in store.kelly_rows.items():
+                if key not in allocated and key[0] not in settled and existing.get("Allocated_Coins") != "0.00":
+                    existing["Allocated_Coins"] = "0.00"
+                    store.mark_dirty("kelly", existing)
+            for row in rows:
+                existing = store.kelly_rows.get((row["MatchID"], row["Team"]))
+                if existing is not None:
+                    existing.update(row)
+                    store.mark_dirty("kelly", existing)
+                else:
+                    store.data["kelly"]["kelly"].append(row)
+            store.reindex()
+            store.save(["kelly"])
+    return rows
+
+
+if __name__ == "__main__":
+    for row in allocate("match_data/esl_pro_league_season_21", 25000):
+        print(row)
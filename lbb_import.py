@@ -0,0 +1,75 @@
+import json
+import os
+import re
+import sys
+import match_store
+import metrics_engine
+
+# 批量导入小黑盒赔率：键为 "MM-DD HH:MM_队伍名"（与 inputs.json 相同），
+# 按时间和队伍匹配到比赛，一次性重新计算受影响的比赛并只写盘一次。
+
+LINE_PATTERN = re.compile(
+    r'^\s*"?(?P<time>\d{2}-\d{2} \d{2}:\d{2})_(?P<team>[^"]+?)"?\s*[:=]?\s*(?P<odds>\d+(?:\.\d+)?)\s*,?\s*$')
+
+
+def parse_lbb_text(text):
+    """解析 JSON 对象或逐行粘贴的 "MM-DD HH:MM_队伍名: 赔率" 文本"""
+    text = text.strip()
+    if text.startswith("{"):
+        try:
+            return {key: float(value) for key, value in json.loads(text).items()}
+        except (ValueError, AttributeError):
+            pass
+    odds = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line in ("{", "}"):
+            continue
+        m = LINE_PATTERN.match(line)
+        if m:
+            odds[f"{m.group('time')}_{m.group('team').strip()}"] = float(m.group("odds"))
+        else:
+            print(f"无法解析的行: {line}")
+    return odds
+
+
+def load_lbb_file(path="inputs.json"):
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse_lbb_text(f.read())
+
+
+def apply_lbb_odds(match_folder, lbb_odds):
+    """把小黑盒赔率写入对应比赛，返回更新的 MatchID 和没有匹配到比赛的键"""
+    updated = {}
+    unmatched = []
+    with match_store.locked(match_folder) as store:
+        for key, odds in lbb_odds.items():
+            match_time, _, team = key.partition("_")
+            found = store.find(match_time, team)
+            if not found:
+                unmatched.append(key)
+                continue
+            match, side = found
+            updated.setdefault(match["MatchID"], {"MatchID": match["MatchID"]})[f"{side}_LittleBlackBox_Odds"] = float(odds)
+
+        for row in updated.values():
+            if store.get_row("littleblackbox_odds", row["MatchID"]) is None:
+                row = dict({"TeamA_LittleBlackBox_Odds": "N/A", "TeamA_LittleBlackBox_Rake": "N/A",
+                            "TeamB_LittleBlackBox_Odds": "N/A", "TeamB_LittleBlackBox_Rake": "N/A"}, **row)
+            store.upsert_row("littleblackbox_odds", row)
+
+        if updated:
+            metrics_engine.recompute_folder(match_folder, list(updated))
+    for key in unmatched:
+        print(f"警告: {key} 没有匹配到任何比赛")
+    return {"updated": sorted(updated), "unmatched": unmatched}
+
+
+def import_file(match_folder, path="inputs.json"):
+    return apply_lbb_odds(match_folder, load_lbb_file(path))
+
+
+if __name__ == "__main__":
+    folder = sys.argv[1] if len(sys.argv) > 1 else os.path.join("match_data", "esl_pro_league_season_21")
+    path = sys.argv[2] if len(sys.argv) > 2 else "inputs.json"
+    print(import_file(folder, path))
@@ -1,12 +1,20 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import fetch_odds
+import driver_pool
 import data_processor
+import match_store
 import odds_gui
 import os
 import json
+import queue
+import threading
 import profit_analysis
 
+# 抓取在后台线程中进行，进度事件放入队列，由 Tk 主循环定时取出显示
+FETCH_POOL_SIZE = 2
+EVENT_POLL_MS = 100
+
 class MainApp:
     def __init__(self, root):
         self.root = root
@@ -21,8 +29,12 @@ class MainApp:
         self.url_combo.grid(row=1, column=0, pady=5, sticky=(tk.W, tk.E))
         self.url_combo.insert(0, "https://cyber-ggbet.com/cn/esports/tournament/esl-pro-league-season-21-play-in-11-02")
 
-        self.fetch_button = ttk.Button(self.main_frame, text="获取/检查赔率数据", command=self.check_or_fetch_odds)
-        self.fetch_button.grid(row=2, column=0, pady=10)
+        button_frame = ttk.Frame(self.main_frame)
+        button_frame.grid(row=2, column=0, pady=10)
+        self.fetch_button = ttk.Button(button_frame, text="获取/检查赔率数据", command=self.check_or_fetch_odds)
+        self.fetch_button.pack(side=tk.LEFT, padx=5)
+        self.cancel_button = ttk.Button(button_frame, text="取消获取", command=self.cancel_fetch, state="disabled")
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
 
         self.analyze_button = ttk.Button(self.main_frame, text="分析赔率", command=self.open_analysis, state="disabled")
         self.analyze_button.grid(row=3, column=0, pady=10)
@@ -40,6 +52,10 @@ class MainApp:
         self.load_url_cache()
         self.load_url_history()
 
+        self.fetch_events = queue.Queue()
+        self.fetch_jobs = {}
+        self.root.after(EVENT_POLL_MS, self.poll_fetch_events)
+
     def load_url_cache(self):
         cache_file = "url_cache.json"
         if os.path.exists(cache_file):
@@ -80,7 +96,7 @@ class MainApp:
 
         cached_file = self.url_cache.get(url)
         print(f"检查缓存路径: {cached_file}")
-        if cached_file and os.path.exists(cached_file):
+        if cached_file and match_store.has_matches(os.path.dirname(cached_file)):
             result = messagebox.askyesno("使用旧数据", f"已找到旧数据（{cached_file}），是否使用？\n选择否将重新联网获取并合并数据。")
             if result:
                 self.status_label.config(text="状态: 使用旧数据")
@@ -88,33 +104,81 @@ class MainApp:
                 self.profit_button.config(state="normal")
                 return
 
+        # 不同 URL 可能对应同一个赛事文件夹，按赛事名判断是否已在获取
+        match_name = fetch_odds.extract_match_name(url)
+        if match_name in self.fetch_jobs:
+            messagebox.showinfo("提示", "该赛事正在获取中")
+            return
+
         self.status_label.config(text="状态: 正在获取数据...")
-        self.fetch_button.config(state="disabled")
-        self.root.update()
+        cancel_event = threading.Event()
+        self.fetch_jobs[match_name] = cancel_event
+        self.cancel_button.config(state="normal")
+        threading.Thread(target=self.fetch_worker, args=(url, cancel_event), daemon=True).start()
 
+    def fetch_worker(self, url, cancel_event):
+        # 在后台线程中运行，只通过 fetch_events 与界面通信
         try:
-            result, filename = fetch_odds.fetch_team_odds(url)
-            print(f"fetch_team_odds 返回的路径: {filename}")
-            if result == 0 and filename:
-                self.status_label.config(text="状态: 数据获取成功")
-                messagebox.showinfo("成功", f"赔率数据已保存到 {filename}")
-                self.update_url_history(url, filename)
-                self.analyze_button.config(state="normal")
-                self.profit_button.config(state="normal")
-            else:
-                self.status_label.config(text="状态: 数据获取失败")
-                messagebox.showerror("失败", "获取数据时出错，请检查日志")
+            result, filename = fetch_odds.fetch_team_odds(
+                url, pool=driver_pool.get_default_pool(FETCH_POOL_SIZE),
+                progress=lambda event: self.fetch_events.put((url, event)), cancel_event=cancel_event)
+            self.fetch_events.put((url, {"stage": "done", "result": result, "file": filename}))
         except Exception as e:
+            self.fetch_events.put((url, {"stage": "error", "message": str(e)}))
+
+    def poll_fetch_events(self):
+        try:
+            while True:
+                url, event = self.fetch_events.get_nowait()
+                self.handle_fetch_event(url, event)
+        except queue.Empty:
+            pass
+        self.root.after(EVENT_POLL_MS, self.poll_fetch_events)
+
+    def handle_fetch_event(self, url, event):
+        match_name = fetch_odds.extract_match_name(url)
+        stage = event["stage"]
+        if stage not in ("done", "error"):
+            self.status_label.config(text=f"状态: {match_name} {event['message']}")
+            return
+
+        cancel_event = self.fetch_jobs.pop(match_name, None)
+        if not self.fetch_jobs:
+            self.cancel_button.config(state="disabled")
+        if stage == "error":
             self.status_label.config(text="状态: 程序出错")
-            messagebox.showerror("错误", f"程序运行出错: {e}")
-        finally:
-            self.fetch_button.config(state="normal")
+            messagebox.showerror("错误", f"程序运行出错: {event['message']}")
+            return
+
+        filename = event["file"]
+        print(f"fetch_team_odds 返回的路径: {filename}")
+        if event["result"] == 0 and filename:
+            self.status_label.config(text=f"状态: {match_name} 数据获取成功")
+            messagebox.showinfo("成功", f"赔率数据已保存到 {filename}")
+            self.update_url_history(url, filename)
+            self.analyze_button.config(state="normal")
+            self.profit_button.config(state="normal")
+        elif cancel_event is not None and cancel_event.is_set():
+            self.status_label.config(text=f"状态: {match_name} 已取消获取")
+        else:
+            self.status_label.config(text=f"状态: {match_name} 数据获取失败")
+            messagebox.showerror("失败", "获取数据时出错，请检查日志")
+
+    def cancel_fetch(self):
+        """取消当前 URL 的抓取；当前 URL 没有在抓取时取消全部"""
+        url = self.url_combo.get().strip()
+        match_name = fetch_odds.extract_match_name(url) if url else None
+        targets = [match_name] if match_name in self.fetch_jobs else list(self.fetch_jobs)
+        for target in targets:
+            self.fetch_jobs[target].set()
+        if targets:
+            self.status_label.config(text="状态: 正在取消...")
 
     def open_analysis(self):
         url = self.url_combo.get().strip()
         cached_file = self.url_cache.get(url)
         print(f"尝试打开分析，文件路径: {cached_file}")
-        if cached_file and os.path.exists(cached_file):
+        if cached_file and match_store.has_matches(os.path.dirname(cached_file)):
             print(f"文件存在，读取数据: {cached_file}")
             teams = data_processor.read_json(cached_file)
             print(f"读取到的队伍数据: {teams}")
@@ -130,7 +194,7 @@ class MainApp:
     def open_profit_analysis(self):
         url = self.url_combo.get().strip()
         cached_file = self.url_cache.get(url)
-        if cached_file and os.path.exists(cached_file):
+        if cached_file and match_store.has_matches(os.path.dirname(cached_file)):
             match_name = fetch_odds.extract_match_name(url)
             match_folder = os.path.join("match_data", match_name)
             profit_window = tk.Toplevel(self.root)
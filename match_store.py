@@ -0,0 +1,291 @@
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+import profiling
+
+# 赛事文件夹的内存索引，各模块共用，避免到处线性扫描 JSON 列表。
+# 每个赛事文件夹有一把锁：后台抓取线程和界面线程共用同一个 MatchStore，读取 → 修改 → 写盘要在 locked() 内完成。
+
+MATCHES_FILE = "matches_info.json"
+STORE_ENV = "YBB_STORE"   # "sqlite" 或 "sqlite:<数据库路径>" 时改用 sqlite_store 中的数据库，默认每个赛事一组 JSON 文件
+
+RESULT_FILES = {
+    "odds_probability": ("odds_probability.json", "odds"),
+    "littleblackbox_odds": ("littleblackbox_odds.json", "littleblackbox"),
+    "expected_profit_variance": ("expected_profit_variance.json", "profit"),
+    "kelly": ("kelly.json", "kelly"),
+    "profit_stats": ("profit_stats.json", "stats")
+}
+
+# 按 MatchID 一行的结果文件
+METRIC_FILES = ("odds_probability", "littleblackbox_odds", "expected_profit_variance")
+
+TEAM_SIDES = ("TeamA", "TeamB")
+
+# 每行的主键：kelly 和 profit_stats 为 (MatchID, Team)，其余为 MatchID
+DATA_KEYS = ("matches_info",) + tuple(RESULT_FILES)
+TEAM_KEYED = ("kelly", "profit_stats")
+
+
+def row_key(key, row):
+    return (row["MatchID"], row["Team"]) if key in TEAM_KEYED else row["MatchID"]
+
+
+def write_json_atomic(filepath, payload):
+    """先写入同目录下的临时文件再替换，避免中途退出时留下写了一半的 JSON"""
+    folder = os.path.dirname(filepath) or "."
+    name = os.path.basename(filepath)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=".json", dir=folder)
+    try:
+        with profiling.stage("json_write", file=name):
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, ensure_ascii=False, indent=2)
+                size = f.tell()
+            os.replace(tmp_path, filepath)
+        profiling.count("bytes_written", size, file=name)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class MatchStore:
+    def __init__(self, match_folder):
+        self.match_folder = match_folder
+        self.lock = folder_lock(match_folder)
+        self.reload()
+
+    def path(self, key):
+        if key == "matches_info":
+            return os.path.join(self.match_folder, MATCHES_FILE)
+        return os.path.join(self.match_folder, RESULT_FILES[key][0])
+
+    def _read(self, filepath, default):
+        if not os.path.exists(filepath):
+            return default
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"加载文件 {filepath} 时出错: {e}")
+            return default
+
+    def _mtimes(self):
+        mtimes = {}
+        for key in ("matches_info",) + tuple(RESULT_FILES):
+            try:
+                mtimes[key] = os.stat(self.path(key)).st_mtime_ns
+            except OSError:
+                mtimes[key] = None
+        return mtimes
+
+    def is_stale(self):
+        return self._mtimes() != self.mtimes
+
+    def reload(self):
+        self.matches_data = self._read(self.path("matches_info"), {"matches": []})
+        self.data = {}
+        for key, (filename, list_key) in RESULT_FILES.items():
+            self.data[key] = self._read(self.path(key), {list_key: []})
+            self.data[key].setdefault(list_key, [])
+        self.reset_tracking()
+        self.reindex()
+        self.modified = set()
+        self.mtimes = self._mtimes()
+
+    def reset_tracking(self):
+        """重新加载时调用：清空行级修改记录，下一次 reindex 作为比较的基准"""
+        self._indexed = None
+        self.dirty = {key: set() for key in DATA_KEYS}    # 自上次保存以来新增或修改的行的主键
+        self.deleted = {key: set() for key in DATA_KEYS}  # 自上次保存以来删除的行的主键
+
+    def mark_saved(self, keys):
+        for key in keys:
+            self.dirty[key].clear()
+            self.deleted[key].clear()
+
+    def row_maps(self):
+        """每个数据键按主键索引的行"""
+        return dict(self.rows, matches_info=self.by_id, kelly=self.kelly_rows, profit_stats=self.stats_rows)
+
+    def mark_dirty(self, key, row):
+        """原地修改某一行后调用，SQLite 后端保存时只写回被标记和新增、替换、删除的行"""
+        self.dirty[key].add(row_key(key, row))
+
+    def _track_changes(self):
+        # 与上次索引比较：新增的、被替换成不同内容的行记为 dirty，消失的行记为 deleted
+        current = self.row_maps()
+        previous = self._indexed
+        if previous is not None:
+            for key, rows in current.items():
+                old_rows = previous[key]
+                for pk, row in rows.items():
+                    old = old_rows.get(pk)
+                    if old is None or (old is not row and old != row):
+                        self.dirty[key].add(pk)
+                        self.deleted[key].discard(pk)
+                for pk in old_rows.keys() - rows.keys():
+                    self.deleted[key].add(pk)
+                    self.dirty[key].discard(pk)
+        self._indexed = {key: dict(rows) for key, rows in current.items()}
+
+    def reindex(self):
+        self.by_id = {}
+        self.by_time_team = {}
+        self.by_team = {}
+        for match in self.matches_data.get("matches", []):
+            self._index_match(match)
+        self.rows = {}
+        for key in METRIC_FILES:
+            list_key = RESULT_FILES[key][1]
+            self.rows[key] = {row["MatchID"]: row for row in self.data[key][list_key]}
+        self.kelly_rows = {(row["MatchID"], row["Team"]): row for row in self.data["kelly"]["kelly"]}
+        self.stats_rows = {(row["MatchID"], row["Team"]): row for row in self.data["profit_stats"]["stats"]}
+        self._track_changes()
+
+    def _index_match(self, match):
+        self.by_id[match["MatchID"]] = match
+        for side in TEAM_SIDES:
+            team = match.get(side)
+            if team:
+                self.by_time_team[(match["MatchTime"], team)] = (match, side)
+                self.by_team.setdefault(team, []).append((match, side))
+
+    @property
+    def matches(self):
+        return self.matches_data.get("matches", [])
+
+    def get_match(self, match_id):
+        return self.by_id.get(match_id)
+
+    def find(self, match_time, team):
+        """按 (MatchTime, Team) 查找，返回 (match, "TeamA"/"TeamB") 或 None"""
+        return self.by_time_team.get((match_time, team))
+
+    def matches_for_team(self, team):
+        return self.by_team.get(team, [])
+
+    def opponent(self, match_time, team):
+        found = self.find(match_time, team)
+        if not found:
+            return None
+        match, side = found
+        return match["TeamB" if side == "TeamA" else "TeamA"] or None
+
+    def get_row(self, key, match_id):
+        return self.rows[key].get(match_id)
+
+    def upsert_row(self, key, row):
+        existing = self.rows[key].get(row["MatchID"])
+        if existing is not None:
+            if any(existing.get(k) != v for k, v in row.items()):
+                existing.update(row)
+                self.modified.add(key)
+                self.dirty[key].add(row["MatchID"])
+            return existing
+        list_key = RESULT_FILES[key][1]
+        self.data[key][list_key].append(row)
+        self.rows[key][row["MatchID"]] = row
+        self._indexed[key][row["MatchID"]] = row
+        self.modified.add(key)
+        self.dirty[key].add(row["MatchID"])
+        self.deleted[key].discard(row["MatchID"])
+        return row
+
+    def add_match(self, match):
+        self.matches_data.setdefault("matches", []).append(match)
+        self._index_match(match)
+        self._indexed["matches_info"][match["MatchID"]] = match
+        self.dirty["matches_info"].add(match["MatchID"])
+        self.deleted["matches_info"].discard(match["MatchID"])
+
+    def update_match_time(self, match_id, new_time):
+        match = self.by_id.get(match_id)
+        if not match:
+            return None
+        match["MatchTime"] = new_time
+        if "SpecialInfo" in match:
+            del match["SpecialInfo"]
+        self.mark_dirty("matches_info", match)
+        self.reindex()
+        return match
+
+    def save(self, keys=None):
+        """写回指定文件；不指定时只写回有条目变化的结果文件"""
+        if keys is None:
+            keys = [key for key in METRIC_FILES if key in self.modified]
+        for key in keys:
+            payload = self.matches_data if key == "matches_info" else self.data[key]
+            write_json_atomic(self.path(key), payload)
+            self.modified.discard(key)
+        self.mark_saved(keys)
+        self.mtimes = self._mtimes()
+
+
+_stores = {}
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def folder_lock(match_folder):
+    """赛事文件夹的可重入锁，同一文件夹总是返回同一把锁"""
+    key = os.path.normpath(match_folder)
+    with _locks_guard:
+        return _locks.setdefault(key, threading.RLock())
+
+
+def backend():
+    """返回 ("json", None) 或 ("sqlite", 数据库路径)；数据库路径为 None 时放在赛事文件夹的上一级目录"""
+    name, _, db_path = os.environ.get(STORE_ENV, "json").partition(":")
+    return ("sqlite", db_path or None) if name == "sqlite" else ("json", None)
+
+
+def open_store(match_folder):
+    """按当前后端新建一个（不共享的）MatchStore"""
+    name, db_path = backend()
+    if name == "sqlite":
+        import sqlite_store
+        return sqlite_store.SQLiteMatchStore(match_folder, db_path)
+    return MatchStore(match_folder)
+
+
+def has_matches(match_folder):
+    """赛事是否已有保存的比赛数据"""
+    if backend()[0] == "sqlite":
+        return bool(get_store(match_folder).matches)
+    return os.path.exists(os.path.join(match_folder, MATCHES_FILE))
+
+
+def list_folders(root):
+    """root 下所有已有比赛数据的赛事文件夹，按名称排序"""
+    name, db_path = backend()
+    if name == "sqlite":
+        import sqlite_store
+        with sqlite_store.SQLiteStore(db_path or sqlite_store.db_path_for(root)) as db:
+            return [os.path.join(root, tournament) for tournament in db.tournaments()]
+    if not os.path.isdir(root):
+        return []
+    return [os.path.join(root, name) for name in sorted(os.listdir(root))
+            if os.path.exists(os.path.join(root, name, MATCHES_FILE))]
+
+
+def get_store(match_folder):
+    """返回赛事文件夹对应的共享 MatchStore，数据被外部修改时自动重新加载"""
+    key = os.path.normpath(match_folder)
+    with folder_lock(match_folder):
+        store = _stores.get(key)
+        if store is None:
+            store = open_store(match_folder)
+            _stores[key] = store
+        elif store.is_stale():
+            store.reload()
+    return store
+
+
+@contextmanager
+def locked(match_folder):
+    """持有赛事文件夹的锁并返回共享的 MatchStore，其他线程在此期间不能读取后写回同一文件夹"""
+    with folder_lock(match_folder):
+        yield get_store(match_folder)
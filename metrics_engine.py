@@ -0,0 +1,179 @@
+import numpy as np
+import match_store
+import profiling
+
+# 批量计算整届赛事的胜率、期望收益、方差、Kelly 和抽成。
+# 所有缺失值用 NaN 表示，只在写回 JSON 时才转换为 "N/A"。
+
+def parse_odds(value):
+    if value == "25":
+        return 25.0
+    if value == "-":
+        return 1.0417
+    if value is None or value == "N/A" or value == "":
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def to_array(values):
+    return np.fromiter((parse_odds(v) for v in values), dtype=np.float64, count=len(values))
+
+
+def load_tournament(match_folder):
+    """从 MatchStore 读取比赛和小黑盒赔率，返回按比赛对齐的数组"""
+    store = match_store.get_store(match_folder)
+    matches = store.matches
+    lbb_rows = store.rows["littleblackbox_odds"]
+
+    empty = {}
+    return {
+        "MatchID": [m["MatchID"] for m in matches],
+        "MatchTime": [m["MatchTime"] for m in matches],
+        "TeamA": [m["TeamA"] for m in matches],
+        "TeamB": [m["TeamB"] for m in matches],
+        "TeamA_Odds": to_array([m["TeamA_Odds"] for m in matches]),
+        "TeamB_Odds": to_array([m["TeamB_Odds"] if m["TeamB"] else "N/A" for m in matches]),
+        "TeamA_LittleBlackBox_Odds": to_array([lbb_rows.get(m["MatchID"], empty).get("TeamA_LittleBlackBox_Odds", "N/A") for m in matches]),
+        "TeamB_LittleBlackBox_Odds": to_array([lbb_rows.get(m["MatchID"], empty).get("TeamB_LittleBlackBox_Odds", "N/A") for m in matches])
+    }
+
+
+def compute_metrics(odds_a, odds_b, lbb_a, lbb_b):
+    """对所有比赛一次性向量化计算，与 data_processor.calculate_team_metrics 的公式一致"""
+    odds_a = np.asarray(odds_a, dtype=np.float64)
+    odds_b = np.asarray(odds_b, dtype=np.float64)
+    lbb_a = np.asarray(lbb_a, dtype=np.float64)
+    lbb_b = np.asarray(lbb_b, dtype=np.float64)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        implied_a = 1 / (odds_a + 1)
+        implied_b = 1 / (odds_b + 1)
+        total = implied_a + implied_b
+        prob_a = np.where(total > 0, implied_a / total, 0.5)
+        prob_b = np.where(total > 0, implied_b / total, 0.5)
+        book_mask = ~(np.isnan(odds_a) | np.isnan(odds_b))
+        prob_a[~book_mask] = np.nan
+        prob_b[~book_mask] = np.nan
+
+        lbb_implied_a = 1 / (lbb_a + 1)
+        lbb_implied_b = 1 / (lbb_b + 1)
+        lbb_total = lbb_implied_a + lbb_implied_b
+        lbb_mask = ~(np.isnan(lbb_a) | np.isnan(lbb_b))
+        rake = np.where(lbb_mask, np.maximum(0.0, lbb_total - 1), np.nan)
+        lbb_prob_a = np.where(lbb_total > 0, lbb_implied_a / lbb_total, 0.5)
+        lbb_prob_b = np.where(lbb_total > 0, lbb_implied_b / lbb_total, 0.5)
+        lbb_prob_a[~lbb_mask] = np.nan
+        lbb_prob_b[~lbb_mask] = np.nan
+
+        valid = book_mask & lbb_mask
+        ev_a = (lbb_a + 1) * prob_a - 1
+        ev_b = (lbb_b + 1) * prob_b - 1
+        var_a = prob_a * (lbb_a - ev_a) ** 2 + (1 - prob_a) * (-1 - ev_a) ** 2
+        var_b = prob_b * (lbb_b - ev_b) ** 2 + (1 - prob_b) * (-1 - ev_b) ** 2
+        kelly_a = np.where(lbb_a != 0, np.maximum(0.0, (prob_a * lbb_a - (1 - prob_a)) / lbb_a), np.nan)
+        kelly_b = np.where(lbb_b != 0, np.maximum(0.0, (prob_b * lbb_b - (1 - prob_b)) / lbb_b), np.nan)
+
+    for arr in (ev_a, ev_b, var_a, var_b, kelly_a, kelly_b):
+        arr[~valid] = np.nan
+    rake_metric = np.where(valid, rake, np.nan)
+
+    # odds_probability.json 中的胜率：两边小黑盒赔率都有时用小黑盒去抽成后的胜率，否则用盘口胜率
+    return {
+        "TeamA_Probability": prob_a,
+        "TeamB_Probability": prob_b,
+        "TeamA_Stored_Probability": np.where(lbb_mask, lbb_prob_a, prob_a),
+        "TeamB_Stored_Probability": np.where(lbb_mask, lbb_prob_b, prob_b),
+        "PlatformRake": rake,
+        "LittleBlackBox_Rake": rake_metric,
+        "TeamA_Expected_Profit": ev_a,
+        "TeamB_Expected_Profit": ev_b,
+        "TeamA_ProfitVariance": var_a,
+        "TeamB_ProfitVariance": var_b,
+        "TeamA_Kelly": kelly_a,
+        "TeamB_Kelly": kelly_b
+    }
+
+
+def compute_tournament(match_folder):
+    data = load_tournament(match_folder)
+    metrics = compute_metrics(data["TeamA_Odds"], data["TeamB_Odds"],
+                              data["TeamA_LittleBlackBox_Odds"], data["TeamB_LittleBlackBox_Odds"])
+    return data, metrics
+
+
+def _value(x, digits=None):
+    if np.isnan(x):
+        return "N/A"
+    x = float(x)
+    return round(x, digits) if digits is not None else x
+
+
+def _kelly(x):
+    # 与 calculate_team_metrics 一致：负 Kelly 截断为整数 0
+    return 0 if x == 0 else _value(x)
+
+
+def to_records(data, metrics, indices=None):
+    """把数组结果转换为三个结果文件的条目，NaN 转为 "N/A" """
+    if indices is None:
+        indices = range(len(data["MatchID"]))
+    records = {key: [] for key in match_store.METRIC_FILES}
+    for i in indices:
+        match_id = data["MatchID"][i]
+        rake = _value(metrics["PlatformRake"][i], 5)
+        records["odds_probability"].append({
+            "MatchID": match_id,
+            "TeamA_Odds": _value(data["TeamA_Odds"][i]),
+            "TeamA_Probability": _value(metrics["TeamA_Stored_Probability"][i]),
+            "TeamA_PlatformRake": rake,
+            "TeamB_Odds": _value(data["TeamB_Odds"][i]),
+            "TeamB_Probability": _value(metrics["TeamB_Stored_Probability"][i]),
+            "TeamB_PlatformRake": rake
+        })
+        records["littleblackbox_odds"].append({
+            "MatchID": match_id,
+            "TeamA_LittleBlackBox_Odds": _value(data["TeamA_LittleBlackBox_Odds"][i]),
+            "TeamA_LittleBlackBox_Rake": rake,
+            "TeamB_LittleBlackBox_Odds": _value(data["TeamB_LittleBlackBox_Odds"][i]),
+            "TeamB_LittleBlackBox_Rake": rake
+        })
+        records["expected_profit_variance"].append({
+            "MatchID": match_id,
+            "TeamA_Expected_Profit": _value(metrics["TeamA_Expected_Profit"][i]),
+            "TeamA_ProfitVariance": _value(metrics["TeamA_ProfitVariance"][i]),
+            "TeamA_Kelly": _kelly(metrics["TeamA_Kelly"][i]),
+            "TeamB_Expected_Profit": _value(metrics["TeamB_Expected_Profit"][i]),
+            "TeamB_ProfitVariance": _value(metrics["TeamB_ProfitVariance"][i]),
+            "TeamB_Kelly": _kelly(metrics["TeamB_Kelly"][i])
+        })
+    return records
+
+
+def recompute_folder(match_folder, match_ids=None):
+    """重新计算赛事文件夹（或其中指定的 MatchID）的全部指标并写回结果文件。
+    读取输入到写回结果都持有文件夹锁，避免把计算期间界面写入的小黑盒赔率覆盖成旧值"""
+    with match_store.locked(match_folder) as store:
+        with profiling.stage("compute"):
+            data, metrics = compute_tournament(match_folder)
+        if match_ids is None:
+            indices = range(len(data["MatchID"]))
+        else:
+            wanted = set(match_ids)
+            indices = [i for i, match_id in enumerate(data["MatchID"]) if match_id in wanted]
+        records = to_records(data, metrics, indices)
+
+        for key in match_store.METRIC_FILES:
+            for record in records[key]:
+                store.upsert_row(key, record)
+        store.save()
+    profiling.count("rows_recomputed", len(records["odds_probability"]))
+
+    print(f"已重新计算 {len(records['odds_probability'])} 场比赛的指标到 {match_folder}")
+    return len(records["odds_probability"])
+
+
+if __name__ == "__main__":
+    recompute_folder("match_data/esl_pro_league_season_21")
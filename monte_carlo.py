@@ -0,0 +1,192 @@
+import contextlib
+import os
+import sys
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+import kelly_processor
+import match_store
+import metrics_engine
+
+# 资金曲线蒙特卡洛模拟：按 kelly.json 的分配（或 profit_stats.json 的历史投注）反复模拟整轮盘口，
+# 统计收益分布、最大回撤和破产概率。每个进程一次向量化模拟一批路径。
+# 胜率默认用 odds_probability.json 中盘口赔率去抽成后的胜率（与 Kelly 计算一致），
+# probability="stored" 时直接用文件中保存的 Probability。
+
+CHUNK_CELLS = 4_000_000  # 每批模拟的 路径 × 轮数 × 投注数 上限，控制内存
+
+
+def _book_probability(row, side):
+    other = "TeamB" if side == "TeamA" else "TeamA"
+    odds = metrics_engine.parse_odds(row.get(f"{side}_Odds", "N/A"))
+    other_odds = metrics_engine.parse_odds(row.get(f"{other}_Odds", "N/A"))
+    implied, other_implied = 1 / (odds + 1), 1 / (other_odds + 1)
+    return implied / (implied + other_implied)
+
+
+def _bet(store, match_id, side, stake, probability):
+    lbb_row = store.get_row("littleblackbox_odds", match_id) or {}
+    prob_row = store.get_row("odds_probability", match_id) or {}
+    odds = metrics_engine.parse_odds(lbb_row.get(f"{side}_LittleBlackBox_Odds", "N/A"))
+    if probability == "stored":
+        prob = metrics_engine.parse_odds(prob_row.get(f"{side}_Probability", "N/A"))
+    else:
+        prob = _book_probability(prob_row, side)
+    if np.isnan(odds) or np.isnan(prob) or stake <= 0:
+        return None
+    return {"MatchID": match_id, "Team": side, "Stake": stake, "Odds": odds, "Probability": prob}
+
+
+def load_bets(match_folder, source="kelly", probability="book"):
+    """返回要模拟的投注列表：source="kelly" 用 kelly.json 中未结算比赛的分配，"history" 用 profit_stats.json 中的投注"""
+    store = match_store.get_store(match_folder)
+    bets = []
+    if source == "history":
+        for row in store.data["profit_stats"].get("stats", []):
+            match = store.get_match(row["MatchID"])
+            if match is None:
+                continue
+            side = "TeamA" if match["TeamA"] == row["Team"] else "TeamB"
+            bets.append(_bet(store, row["MatchID"], side, float(row["Coins"]), probability))
+    else:
+        settled = kelly_processor.settled_match_ids(store)
+        for row in store.data["kelly"]["kelly"]:
+            if row["MatchID"] in settled:
+                continue
+            try:
+                stake = float(row.get("Allocated_Coins", 0))
+            except (TypeError, ValueError):
+                continue
+            if stake <= 0:
+                continue
+            bets.append(_bet(store, row["MatchID"], row["Team"], stake, probability))
+    return in_time_order(store, [bet for bet in bets if bet is not None])
+
+
+def in_time_order(store, bets):
+    """按比赛时间排序（kelly.json 按 Kelly 值排序），模拟时轮内按这个顺序结算"""
+    def match_time(bet):
+        match = store.get_match(bet["MatchID"])
+        return match["MatchTime"] if match else ""
+    return sorted(bets, key=match_time)
+
+
+def _as_arrays(bets):
+    return (np.array([b["Stake"] for b in bets], dtype=np.float64),
+            np.array([b["Odds"] for b in bets], dtype=np.float64),
+            np.array([b["Probability"] for b in bets], dtype=np.float64))
+
+
+def simulate_chunk(stakes, odds, probs, balance, paths, rounds, compound, ruin_level, seed):
+    """模拟 paths 条路径，每条路径连续进行 rounds 轮同样的盘口，返回每条路径的最终收益、最大回撤和是否破产"""
+    rng = np.random.default_rng(seed)
+    n = len(stakes)
+    batch = max(1, CHUNK_CELLS // max(1, rounds * n))
+    profits = np.empty(paths)
+    drawdowns = np.empty(paths)
+    ruined = np.empty(paths, dtype=bool)
+
+    for start in range(0, paths, batch):
+        size = min(batch, paths - start)
+        wins = rng.random((size, rounds, n), dtype=np.float32) < probs.astype(np.float32)
+        returns = np.where(wins, odds, -1.0)
+        if compound:
+            # 每轮按当前资金的同一比例下注，轮内各场比赛按时间顺序结算
+            fractions = stakes / balance
+            within = np.cumsum(returns * fractions, axis=2)
+            growth = np.maximum(1 + within[:, :, -1], 0.0)
+            round_start = balance * np.cumprod(np.concatenate([np.ones((size, 1)), growth[:, :-1]], axis=1), axis=1)
+            equity = np.maximum(round_start[:, :, None] * (1 + within), 0.0).reshape(size, -1)
+        else:
+            equity = balance + np.cumsum((returns * stakes).reshape(size, -1), axis=1)
+        peak = np.maximum.accumulate(np.maximum(equity, balance), axis=1)
+        profits[start:start + size] = equity[:, -1] - balance
+        drawdowns[start:start + size] = np.max((peak - equity) / peak, axis=1)
+        ruined[start:start + size] = np.min(equity, axis=1) <= ruin_level
+    return profits, drawdowns, ruined
+
+
+def summarize(profits, drawdowns, ruined, balance):
+    percentiles = [1, 5, 25, 50, 75, 95, 99]
+    return {
+        "paths": int(len(profits)),
+        "mean_profit": float(np.mean(profits)),
+        "std_profit": float(np.std(profits)),
+        "profit_percentiles": {str(q): float(v) for q, v in zip(percentiles, np.percentile(profits, percentiles))},
+        "prob_loss": float(np.mean(profits < 0)),
+        "mean_roi": float(np.mean(profits) / balance),
+        "median_max_drawdown": float(np.median(drawdowns)),
+        "p95_max_drawdown": float(np.percentile(drawdowns, 95)),
+        "risk_of_ruin": float(np.mean(ruined))
+    }
+
+
+def simulate(stakes, odds, probs, balance, paths=100_000, rounds=1, compound=True, ruin_fraction=0.1,
+             workers=None, seed=None, pool=None):
+    """多进程蒙特卡洛模拟。ruin_fraction 为资金跌到初始资金的多少比例算作破产；
+    传入 pool（ProcessPoolExecutor）时复用它，不再新建进程池"""
+    stakes = np.asarray(stakes, dtype=np.float64)
+    odds = np.asarray(odds, dtype=np.float64)
+    probs = np.asarray(probs, dtype=np.float64)
+    if len(stakes) == 0:
+        raise ValueError("没有可以模拟的投注")
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, paths))
+    ruin_level = balance * ruin_fraction
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    sizes = [paths // workers + (1 if i < paths % workers else 0) for i in range(workers)]
+    args = (stakes, odds, probs, balance)
+
+    if workers == 1:
+        parts = [simulate_chunk(*args, sizes[0], rounds, compound, ruin_level, seeds[0])]
+    else:
+        with contextlib.nullcontext(pool) if pool is not None else ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(simulate_chunk, *args, size, rounds, compound, ruin_level, s)
+                       for size, s in zip(sizes, seeds)]
+            parts = [f.result() for f in futures]
+    profits, drawdowns, ruined = (np.concatenate(x) for x in zip(*parts))
+    return summarize(profits, drawdowns, ruined, balance)
+
+
+def simulate_folder(match_folder, balance, source="kelly", probability="book", **kwargs):
+    bets = load_bets(match_folder, source, probability)
+    stakes, odds, probs = _as_arrays(bets)
+    result = simulate(stakes, odds, probs, balance, **kwargs)
+    result.update({"folder": match_folder, "bets": len(bets), "balance": balance,
+                   "total_stake": float(stakes.sum())})
+    return result
+
+
+def compare_fractions(match_folder, balance, fractions=(0.25, 0.5, 1.0), coins=None, cap=kelly_processor.MAX_COINS_PER_BET,
+                      probability="book", seed=0, **kwargs):
+    """对同一批盘口（与 kelly_processor.allocate 相同，不含已结算的比赛）按不同的分数 Kelly 重新求解投注额并模拟，
+    各个系数使用同一随机种子和同一个进程池"""
+    store = match_store.get_store(match_folder)
+    settled = kelly_processor.settled_match_ids(store)
+    bets = [_bet(store, c["MatchID"], c["Team"], 1.0, probability) for c in kelly_processor.kelly_candidates(store)
+            if c["MatchID"] not in settled]
+    _, odds, probs = _as_arrays(in_time_order(store, [bet for bet in bets if bet is not None]))
+    coins = balance if coins is None else coins
+    workers = kwargs.pop("workers", None) or os.cpu_count() or 1
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) if workers > 1 else contextlib.nullcontext() as pool:
+        for fraction in fractions:
+            stakes = kelly_processor.allocate_portfolio(probs, odds, coins, bankroll=balance, fraction=fraction, cap=cap)
+            keep = stakes > 0
+            if not keep.any():
+                results.append({"fraction": fraction, "total_stake": 0.0})
+                continue
+            result = simulate(stakes[keep], odds[keep], probs[keep], balance, seed=seed, workers=workers, pool=pool,
+                              **kwargs)
+            result.update({"fraction": fraction, "total_stake": float(stakes.sum())})
+            results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    folder = sys.argv[1] if len(sys.argv) > 1 else os.path.join("match_data", "esl_pro_league_season_21")
+    start = time.time()
+    for row in compare_fractions(folder, 25000, rounds=20, paths=50_000):
+        print(f"Kelly x{row['fraction']:<5} 平均收益 {row.get('mean_profit', 0):>10.2f}  "
+              f"中位最大回撤 {row.get('median_max_drawdown', 0):.2%}  破产概率 {row.get('risk_of_ruin', 0):.2%}")
+    print(f"用时 {time.time() - start:.2f} 秒")
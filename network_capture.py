@@ -0,0 +1,313 @@
+import atexit
+import base64
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+import driver_pool
+import fetch_odds
+import profiling
+
+# 从网站自己的网络请求中取赔率：开启 Chrome 的 performance 日志，
+# 读取 Network.responseReceived / loadingFinished 对应的响应体（Network.getResponseBody）和 WebSocket 收到的帧，
+# 交给可替换的盘口解析器，得到结构化的盘口，不需要等待和读取 DOM。
+# NetworkBackend 是一次性抓取（盘口数量稳定后返回），watch() 在浏览器会话打开期间持续接收更新并保存。
+
+POLL_INTERVAL = 0.25   # 读取 performance 日志的间隔（秒）
+SETTLE_SECONDS = 1.5   # 盘口数量保持不变这么久后认为页面数据已经到齐
+CAPTURE_TIMEOUT = 30   # 一次抓取最多等待网络数据的秒数，超时后回退到 DOM 提取
+WATCH_INTERVAL = 2.0   # watch() 保存更新的最短间隔
+JSON_MIME_TYPES = ("application/json", "text/json", "text/plain", "application/javascript")
+
+
+class JsonMarketParser:
+    """通用的 JSON 盘口解析：在任意嵌套的 JSON 中寻找“两个选项、各有名字和赔率”的对象。
+    不同网站的字段名不同，可以修改类属性或继承后重写 parse_payload；
+    只推送赔率变化（只有选项 ID）的增量帧无法用通用规则解析，需要针对网站写解析器"""
+    name_keys = ("name", "title", "team", "teamName", "competitor", "participant", "label")
+    odds_keys = ("odds", "price", "coef", "coefficient", "rate", "value", "k")
+    outcome_keys = ("outcomes", "odds", "selections", "runners", "competitors", "teams", "options")
+    time_keys = ("startTime", "start_time", "start", "startDate", "scheduled", "begin", "time", "date")
+    id_keys = ("id", "matchId", "eventId", "marketId")
+
+    def wants(self, url, mime_type):
+        return any(mime_type.startswith(t) for t in JSON_MIME_TYPES) if mime_type else True
+
+    def parse_payload(self, text):
+        """返回解析出的盘口列表；不是 JSON 时返回空列表"""
+        text = text.strip()
+        if not text or text[0] not in "[{":
+            # socket.io 等协议会在 JSON 前加数字前缀，如 42["odds", {...}]
+            start = min((i for i in (text.find("["), text.find("{")) if i >= 0), default=-1)
+            if start < 0:
+                return []
+            text = text[start:]
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return []
+        markets = []
+        self._walk(data, None, markets)
+        return markets
+
+    def _walk(self, node, parent, markets):
+        if isinstance(node, dict):
+            market = self._market(node, parent)
+            if market:
+                markets.append(market)
+                return
+            for value in node.values():
+                self._walk(value, node, markets)
+        elif isinstance(node, list):
+            for value in node:
+                self._walk(value, parent, markets)
+
+    def _first(self, obj, keys):
+        for key in keys:
+            if key in obj and obj[key] not in (None, ""):
+                return obj[key]
+        return None
+
+    def _name(self, outcome):
+        name = self._first(outcome, self.name_keys)
+        if isinstance(name, dict):
+            name = self._first(name, self.name_keys)
+        return name if isinstance(name, str) and name.strip() else None
+
+    def _odds(self, outcome):
+        value = self._first(outcome, self.odds_keys)
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return None
+        return value if value > 1 else None
+
+    def _market(self, node, parent):
+        for key in self.outcome_keys:
+            outcomes = node.get(key)
+            if not isinstance(outcomes, list) or len(outcomes) != 2:
+                continue
+            if not all(isinstance(o, dict) for o in outcomes):
+                continue
+            names = [self._name(o) for o in outcomes]
+            odds = [self._odds(o) for o in outcomes]
+            if None in names or None in odds:
+                continue
+            market_id = self._first(node, self.id_keys)
+            start = self._start_time(node) or (self._start_time(parent) if isinstance(parent, dict) else None)
+            return {"id": str(market_id) if market_id is not None else None,
+                    "TeamA": names[0].strip(), "TeamB": names[1].strip(),
+                    "TeamA_Odds": f"{odds[0]:g}", "TeamB_Odds": f"{odds[1]:g}", "start": start}
+        return None
+
+    def _start_time(self, obj):
+        value = self._first(obj, self.time_keys)
+        if isinstance(value, (int, float)) and value > 1e9:
+            # 秒或毫秒时间戳
+            return datetime.fromtimestamp(value / 1000 if value > 1e12 else value)
+        if isinstance(value, str):
+            try:
+                parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            except ValueError:
+                return None
+            return parsed.astimezone().replace(tzinfo=None) if parsed.tzinfo else parsed
+        return None
+
+
+class NetworkCapture:
+    """读取一个开启了 performance 日志的 driver 的网络事件，累积最新的盘口"""
+    def __init__(self, driver, parser=None):
+        self.driver = driver
+        self.parser = parser or JsonMarketParser()
+        self.pending = {}   # requestId -> url，等 loadingFinished 后再取响应体
+        self.markets = {}   # 盘口 ID（或队伍对）-> 最新盘口
+        self.order = []     # 盘口第一次出现的顺序
+        self.updated = 0    # 盘口被新增或赔率变化的次数
+        self.available = True
+
+    def _add(self, markets, source):
+        for market in markets:
+            key = market["id"] or (market["TeamA"], market["TeamB"])
+            old = self.markets.get(key)
+            if old is None:
+                self.order.append(key)
+            else:
+                if market["start"] is None:
+                    market["start"] = old["start"]
+                if all(old[k] == market[k] for k in ("TeamA_Odds", "TeamB_Odds", "start")):
+                    continue
+            self.markets[key] = market
+            self.updated += 1
+        if markets:
+            profiling.count("network_markets", len(markets), source=source)
+
+    def _response_body(self, request_id):
+        try:
+            result = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+        except Exception as e:
+            logging.debug(f"读取响应体失败 {request_id}: {e}")
+            return None
+        body = result.get("body", "")
+        if result.get("base64Encoded"):
+            try:
+                body = base64.b64decode(body).decode("utf-8", errors="replace")
+            except ValueError:
+                return None
+        return body
+
+    def drain(self):
+        """丢弃已经缓存的日志（会话中上一个页面留下的）"""
+        try:
+            self.driver.get_log("performance")
+        except Exception:
+            pass
+
+    def poll(self):
+        """处理自上次调用以来的网络事件，返回本次新增或变化的盘口数量"""
+        if not self.available:
+            return 0
+        try:
+            entries = self.driver.get_log("performance")
+        except Exception as e:
+            logging.warning(f"读取 performance 日志失败（driver 没有开启网络日志？）: {e}")
+            self.available = False
+            return 0
+        before = self.updated
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError, TypeError):
+                continue
+            method = message.get("method")
+            params = message.get("params", {})
+            if method == "Network.responseReceived":
+                response = params.get("response", {})
+                if params.get("type") in ("XHR", "Fetch", None) and self.parser.wants(response.get("url", ""), response.get("mimeType", "")):
+                    self.pending[params.get("requestId")] = response.get("url", "")
+            elif method == "Network.loadingFinished":
+                if params.get("requestId") in self.pending:
+                    self.pending.pop(params["requestId"])
+                    body = self._response_body(params["requestId"])
+                    if body:
+                        self._add(self.parser.parse_payload(body), "response")
+            elif method == "Network.loadingFailed":
+                self.pending.pop(params.get("requestId"), None)
+            elif method == "Network.webSocketFrameReceived":
+                payload = params.get("response", {}).get("payloadData", "")
+                if payload:
+                    self._add(self.parser.parse_payload(payload), "websocket")
+        return self.updated - before
+
+    def wait_until_settled(self, tracker, timeout=CAPTURE_TIMEOUT, settle=SETTLE_SECONDS):
+        """一直读取到有盘口且 settle 秒内没有新盘口为止；超时返回 False"""
+        deadline = time.monotonic() + timeout
+        last_change = None
+        while time.monotonic() < deadline and self.available:
+            tracker.check()
+            if self.poll() or (self.markets and last_change is None):
+                last_change = time.monotonic()
+            if last_change is not None and time.monotonic() - last_change >= settle:
+                return True
+            tracker.sleep(POLL_INTERVAL)
+        return bool(self.markets) and self.available
+
+    def page_data(self):
+        """把累积的盘口转换为与 DOM 提取相同的结构，交给 fetch_odds 的同一套合并和保存流程"""
+        titles, results, times = [], [], []
+        for key in self.order:
+            market = self.markets[key]
+            titles += [market["TeamA"], market["TeamB"]]
+            results += [market["TeamA_Odds"], market["TeamB_Odds"]]
+            start = market["start"]
+            times.append([start.strftime("%H:%M"), f"{start.month}月 {start.day}"] if start else [])
+        return {"titles": titles, "results": results, "times": times, "bo": False}
+
+    def snapshot(self):
+        return tuple((key, self.markets[key]["TeamA_Odds"], self.markets[key]["TeamB_Odds"]) for key in self.order)
+
+
+class NetworkBackend(fetch_odds.SeleniumBackend):
+    """从网络响应和 WebSocket 帧中取盘口；没有取到时在同一个浏览器中回退到 DOM 提取。
+    需要开启了 performance 日志的浏览器（driver_pool.create_driver(capture=True) 或 get_capture_pool()）"""
+    name = "network"
+    capture = True
+
+    def __init__(self, pool=None, extract_mode="script", parser=None, timeout=CAPTURE_TIMEOUT):
+        super().__init__(pool, extract_mode)
+        self.parser = parser
+        self.timeout = timeout
+
+    def _extract(self, driver, url, tracker, recorder):
+        capture = NetworkCapture(driver, self.parser)
+        capture.drain()
+        tracker.report("loading", "正在加载页面并读取网络数据", attempt=1)
+        with profiling.stage("page_get"):
+            driver.get(url)
+        with profiling.stage("network_wait"):
+            settled = capture.wait_until_settled(tracker, self.timeout)
+        if settled:
+            page_data = capture.page_data()
+            filtered_teams = fetch_odds.filter_teams(page_data)
+            tracker.report("extracted", f"从网络数据中取到 {len(capture.markets)} 个盘口",
+                           teams=len(filtered_teams), times=len(page_data["times"]))
+            if recorder is not None:
+                recorder.save(url, 1, page_data, "network", driver)
+            if filtered_teams:
+                return page_data
+        logging.info("网络数据中没有找到盘口，改用 DOM 提取")
+        tracker.report("fallback", "网络数据中没有找到盘口，改用 DOM 提取", backend="selenium")
+        return super()._extract(driver, url, tracker, recorder)
+
+
+_capture_pool = None
+_capture_lock = threading.Lock()
+
+
+def get_capture_pool(size=1):
+    """进程内共享的、开启了网络日志的会话池"""
+    global _capture_pool
+    with _capture_lock:
+        if _capture_pool is None:
+            _capture_pool = driver_pool.DriverPool(size=size, capture=True)
+            atexit.register(_capture_pool.close)
+        return _capture_pool
+
+
+def watch(url, parser=None, interval=WATCH_INTERVAL, cancel_event=None, on_update=None, max_seconds=None):
+    """打开页面后持续读取网络数据，盘口有变化时合并保存到赛事文件夹并调用 on_update(结果, 盘口数量)。
+    cancel_event 被 set 或达到 max_seconds 后关闭浏览器，返回保存的次数"""
+    tracker = fetch_odds.FetchProgress(None, cancel_event)
+    driver = driver_pool.create_driver(capture=True)
+    capture = NetworkCapture(driver, parser)
+    deadline = time.monotonic() + max_seconds if max_seconds else None
+    saves = 0
+    last = ()
+    try:
+        driver.get(url)
+        while deadline is None or time.monotonic() < deadline:
+            tracker.check()
+            capture.poll()
+            snapshot = capture.snapshot()
+            if snapshot and snapshot != last:
+                with profiling.run("watch", match=fetch_odds.extract_match_name(url)):
+                    result = fetch_odds._save_page(url, capture.page_data(), tracker)
+                last = snapshot
+                saves += 1
+                if on_update:
+                    on_update(result, len(snapshot))
+            if not capture.available:
+                logging.error("浏览器没有开启网络日志，停止监听")
+                break
+            tracker.sleep(interval)
+    except fetch_odds.FetchCancelled:
+        logging.info(f"已停止监听: {url}")
+    finally:
+        driver.quit()
+    return saves
+
+
+if __name__ == "__main__":
+    import sys
+    watch(sys.argv[1] if len(sys.argv) > 1 else "https://cyber-ggbet.com/cn/esports/tournament/esl-pro-league-season-21-play-in-11-02",
+          on_update=lambda result, count: print(f"已保存 {count} 个盘口: {result}"))
@@ -1,15 +1,50 @@
 import tkinter as tk
 from tkinter import ttk, font, messagebox
 import data_processor
-import json
+import match_store
+import write_behind
+import lbb_import
 import os
 
+def to_float(value):
+    return float(value) if value != "N/A" else "N/A"
+
+def format_row(values):
+    return (
+        values["MatchTime"],
+        values["Team"],
+        f"{values['Odds']:.2f}" if isinstance(values['Odds'], (int, float)) else "",
+        f"{values['LittleBlackBox_Odds']:.2f}" if isinstance(values['LittleBlackBox_Odds'], (int, float)) else "",
+        f"{values['Probability']:.2f}" if isinstance(values['Probability'], (int, float)) else "",
+        f"{values['Expected_Profit'] * 100:.2f}%" if isinstance(values['Expected_Profit'], (int, float)) else "",
+        f"{values['ProfitVariance']:.2f}" if isinstance(values['ProfitVariance'], (int, float)) else "",
+        f"{values['Kelly']:.9f}" if isinstance(values['Kelly'], (int, float)) else "",
+        f"{values['LittleBlackBox_Rake']:.3%}" if isinstance(values['LittleBlackBox_Rake'], (int, float)) else ""
+    )
+
+def format_result(result):
+    return (
+        result["MatchTime"],
+        result["Team"],
+        f"{result['Odds']:.2f}" if isinstance(result['Odds'], (int, float)) and result['Odds'] != "N/A" else str(result['Odds']) if result['Odds'] != "N/A" else "N/A",
+        f"{result['LittleBlackBox_Odds']:.2f}" if result['LittleBlackBox_Odds'] != "N/A" else "N/A",
+        f"{result['Probability']:.2f}" if result['Probability'] != "N/A" else "N/A",
+        f"{result['Expected_Profit'] * 100:.2f}%" if result['Expected_Profit'] != "N/A" else "N/A",
+        f"{result['ProfitVariance']:.2f}" if result['ProfitVariance'] != "N/A" else "N/A",
+        f"{result['Kelly']:.9f}" if result['Kelly'] != "N/A" else "N/A",
+        f"{result['LittleBlackBox_Rake']:.3%}" if result['LittleBlackBox_Rake'] != "N/A" else "N/A"
+    )
+
+# 大赛事下窗口先显示出来：表格每次空闲时插入一批行，输入页在第一次选中时才创建
+TREE_CHUNK_ROWS = 200
+
 class BettingApp:
-    def __init__(self, root, teams, match_name):
+    def __init__(self, root, teams, match_name, lazy=True):
         self.root = root
         self.root.title("小黑盒赔率分析")
         self.teams = teams
         self.match_name = match_name
+        self.lazy = lazy
         self.table_font = font.Font(family="Arial", size=12)
         self.input_font = font.Font(family="Arial", size=16)
         root.option_add("*Font", self.table_font)
@@ -26,205 +61,216 @@ class BettingApp:
         
         self.tree.pack(side=tk.TOP, pady=10, fill="both", expand=True)
 
-        match_folder = os.path.join("match_data", match_name)
-        self.matches_file = os.path.join(match_folder, "matches_info.json")
-        self.result_files = {
-            "odds_probability": os.path.join(match_folder, "odds_probability.json"),
-            "littleblackbox_odds": os.path.join(match_folder, "littleblackbox_odds.json"),
-            "expected_profit_variance": os.path.join(match_folder, "expected_profit_variance.json")
-        }
+        self.match_folder = os.path.join("match_data", match_name)
 
         self.results = {}
         self.load_existing_data()
 
+        self.saver = write_behind.WriteBehindSaver(root, self.match_folder)
+        root.protocol("WM_DELETE_WINDOW", self.on_close)
+        root.bind("<Destroy>", self._on_destroy, add="+")
+
         self.tree_items = {}
+        self.row_values = {}
         self.special_info_entries = {}
         self.entries = {}
+        # 同一支队伍有多场比赛时与原来的逐个查找一样取第一场
+        self.team_index = {}
+        for i, team in enumerate(teams):
+            self.team_index.setdefault(team["Team"], i)
+        # 小黑盒赔率的输入值与 Entry 分开保存，没有创建的输入页也能参与计算
+        self.lbb_values = {}
+        for team in teams:
+            values = self.results.get((team["MatchTime"], team["Team"]))
+            if values and values["LittleBlackBox_Odds"] != "N/A":
+                self.lbb_values[team["Team"]] = str(values["LittleBlackBox_Odds"])
 
         self.odds_changed = self.check_odds_changed()
 
-        with open(self.matches_file, 'r', encoding='utf-8') as f:
-            matches_data = json.load(f)
-
-        for i in range(0, len(teams), 2):
-            match_time = teams[i]["MatchTime"]
-            team1 = teams[i]
-            team2 = teams[i + 1] if i + 1 < len(teams) else None
-            
-            team1_key = (match_time, team1["Team"])
-            team1_values = self.results.get(team1_key, {
-                "MatchTime": match_time,
-                "Team": team1["Team"],
-                "Odds": float(team1["Odds"]) if team1["Odds"] != "N/A" else "N/A",
-                "LittleBlackBox_Odds": "N/A",
-                "Probability": "N/A",
-                "Expected_Profit": "N/A",
-                "ProfitVariance": "N/A",
-                "Kelly": "N/A",
-                "LittleBlackBox_Rake": "N/A"
-            })
-            
-            item1 = self.tree.insert("", "end", values=(
-                team1_values["MatchTime"],
-                team1_values["Team"],
-                f"{team1_values['Odds']:.2f}" if isinstance(team1_values['Odds'], (int, float)) else "",
-                f"{team1_values['LittleBlackBox_Odds']:.2f}" if isinstance(team1_values['LittleBlackBox_Odds'], (int, float)) else "",
-                f"{team1_values['Probability']:.2f}" if isinstance(team1_values['Probability'], (int, float)) else "",
-                f"{team1_values['Expected_Profit'] * 100:.2f}%" if isinstance(team1_values['Expected_Profit'], (int, float)) else "",
-                f"{team1_values['ProfitVariance']:.2f}" if isinstance(team1_values['ProfitVariance'], (int, float)) else "",
-                f"{team1_values['Kelly']:.9f}" if isinstance(team1_values['Kelly'], (int, float)) else "",
-                f"{team1_values['LittleBlackBox_Rake']:.3%}" if isinstance(team1_values['LittleBlackBox_Rake'], (int, float)) else ""
-            ))
-            self.tree_items[team1["Team"]] = item1
-            
-            if team2:
-                team2_key = (match_time, team2["Team"])
-                team2_values = self.results.get(team2_key, {
-                    "MatchTime": match_time,
-                    "Team": team2["Team"],
-                    "Odds": float(team2["Odds"]) if team2["Odds"] != "N/A" else "N/A",
-                    "LittleBlackBox_Odds": "N/A",
-                    "Probability": "N/A",
-                    "Expected_Profit": "N/A",
-                    "ProfitVariance": "N/A",
-                    "Kelly": "N/A",
-                    "LittleBlackBox_Rake": "N/A"
-                })
-                item2 = self.tree.insert("", "end", values=(
-                    team2_values["MatchTime"],
-                    team2_values["Team"],
-                    f"{team2_values['Odds']:.2f}" if isinstance(team2_values['Odds'], (int, float)) else "",
-                    f"{team2_values['LittleBlackBox_Odds']:.2f}" if isinstance(team2_values['LittleBlackBox_Odds'], (int, float)) else "",
-                    f"{team2_values['Probability']:.2f}" if isinstance(team2_values['Probability'], (int, float)) else "",
-                    f"{team2_values['Expected_Profit'] * 100:.2f}%" if isinstance(team2_values['Expected_Profit'], (int, float)) else "",
-                    f"{team2_values['ProfitVariance']:.2f}" if isinstance(team2_values['ProfitVariance'], (int, float)) else "",
-                    f"{team2_values['Kelly']:.9f}" if isinstance(team2_values['Kelly'], (int, float)) else "",
-                    f"{team2_values['LittleBlackBox_Rake']:.3%}" if isinstance(team2_values['LittleBlackBox_Rake'], (int, float)) else ""
-                ))
-                self.tree_items[team2["Team"]] = item2
-            if i + 2 < len(teams):
-                self.tree.insert("", "end", values=("", "", "", "", "", "", "", "", ""))
+        self.matches = match_store.get_store(self.match_folder).matches
 
         input_frame = tk.Frame(main_frame)
         input_frame.pack(side=tk.BOTTOM, pady=10, fill="both", expand=True)
+        ttk.Button(input_frame, text="批量导入小黑盒赔率", command=self.open_bulk_import).pack(anchor="w", pady=5)
         self.notebook = ttk.Notebook(input_frame)
         self.notebook.pack(fill="both", expand=True)
 
+        self.pages = []
+        self.built_pages = set()
         for i in range(0, len(teams), 2):
             page = tk.Frame(self.notebook)
             self.notebook.add(page, text=f"第 {i//2 + 1} 组")
-            match = matches_data["matches"][i // 2] if i // 2 < len(matches_data["matches"]) else {}
-
-            if "SpecialInfo" in match and match["SpecialInfo"]:
-                special_frame = tk.Frame(page)
-                special_frame.pack(pady=5)
-                tk.Label(special_frame, text=f"特殊信息 ({match['SpecialInfo']}):", font=self.input_font).pack(side=tk.LEFT)
-                special_entry = tk.Entry(special_frame, width=20, font=self.input_font)
-                special_entry.pack(side=tk.LEFT)
-                special_entry.bind("<Return>", lambda event, m=match: self.update_special_info(m, special_entry))
-                self.special_info_entries[match["MatchID"]] = special_entry
-
-            for j in range(2):
-                if i + j < len(teams):
-                    team = teams[i + j]["Team"]
-                    odds = teams[i + j]["Odds"]
-                    frame = tk.Frame(page)
-                    frame.pack(pady=5)
-                    tk.Label(frame, text=f"{team} (赔率: {odds})", width=30, anchor="w", font=self.input_font).pack(side=tk.LEFT)
-                    tk.Label(frame, text="小黑盒赔率:", font=self.input_font).pack(side=tk.LEFT)
-                    entry = tk.Entry(frame, width=10, font=self.input_font)
-                    entry.pack(side=tk.LEFT)
-                    self.entries[team] = entry
-                    team_key = (teams[i + j]["MatchTime"], team)
-                    if team_key in self.results and self.results[team_key]["LittleBlackBox_Odds"] != "N/A":
-                        entry.insert(0, str(self.results[team_key]["LittleBlackBox_Odds"]))
-                    entry.bind("<Return>", lambda event, t=team, p=page, idx=i//2, next_idx=j+1: self.handle_enter(t, p, idx, next_idx))
+            self.pages.append(page)
+
+        self._tree_pos = 0
+        if lazy:
+            self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+            if self.pages:
+                self._build_page(0)
+            self._fill_tree_chunk()
+        else:
+            self._insert_rows(len(teams))
+            for page_idx in range(len(self.pages)):
+                self._build_page(page_idx)
+
+    def _team_values(self, team):
+        return self.results.get((team["MatchTime"], team["Team"]), {
+            "MatchTime": team["MatchTime"],
+            "Team": team["Team"],
+            "Odds": float(team["Odds"]) if team["Odds"] != "N/A" else "N/A",
+            "LittleBlackBox_Odds": "N/A",
+            "Probability": "N/A",
+            "Expected_Profit": "N/A",
+            "ProfitVariance": "N/A",
+            "Kelly": "N/A",
+            "LittleBlackBox_Rake": "N/A"
+        })
+
+    def _insert_rows(self, count):
+        """从上次的位置继续插入 count 支队伍的行，每场比赛之间插入空行"""
+        end = min(self._tree_pos + count, len(self.teams))
+        for i in range(self._tree_pos, end):
+            team = self.teams[i]
+            values = format_row(self._team_values(team))
+            item = self.tree.insert("", "end", values=values)
+            self.tree_items[team["Team"]] = item
+            self.row_values[item] = values
+            if i % 2 == 1 and i + 1 < len(self.teams):
+                self.tree.insert("", "end", values=("", "", "", "", "", "", "", "", ""))
+        self._tree_pos = end
+
+    def _fill_tree_chunk(self):
+        if not self.tree.winfo_exists():
+            return
+        self._insert_rows(TREE_CHUNK_ROWS)
+        if self._tree_pos < len(self.teams):
+            self.root.after_idle(self._fill_tree_chunk)
+
+    def _set_row(self, item, values):
+        """只更新与上次显示不同的单元格"""
+        old = self.row_values.get(item, ())
+        for col, value in enumerate(values):
+            if col >= len(old) or old[col] != value:
+                self.tree.set(item, col, value)
+        self.row_values[item] = tuple(values)
+
+    def _on_tab_changed(self, event):
+        current = self.notebook.select()
+        if current:
+            self._build_page(self.notebook.index(current))
+
+    def _build_page(self, page_idx):
+        if page_idx in self.built_pages or page_idx >= len(self.pages):
+            return
+        self.built_pages.add(page_idx)
+        page = self.pages[page_idx]
+        i = page_idx * 2
+        match = self.matches[page_idx] if page_idx < len(self.matches) else {}
+
+        if "SpecialInfo" in match and match["SpecialInfo"]:
+            special_frame = tk.Frame(page)
+            special_frame.pack(pady=5)
+            tk.Label(special_frame, text=f"特殊信息 ({match['SpecialInfo']}):", font=self.input_font).pack(side=tk.LEFT)
+            special_entry = tk.Entry(special_frame, width=20, font=self.input_font)
+            special_entry.pack(side=tk.LEFT)
+            special_entry.bind("<Return>", lambda event, m=match: self.update_special_info(m, special_entry))
+            self.special_info_entries[match["MatchID"]] = special_entry
+
+        for j in range(2):
+            if i + j < len(self.teams):
+                team = self.teams[i + j]["Team"]
+                odds = self.teams[i + j]["Odds"]
+                frame = tk.Frame(page)
+                frame.pack(pady=5)
+                tk.Label(frame, text=f"{team} (赔率: {odds})", width=30, anchor="w", font=self.input_font).pack(side=tk.LEFT)
+                tk.Label(frame, text="小黑盒赔率:", font=self.input_font).pack(side=tk.LEFT)
+                entry = tk.Entry(frame, width=10, font=self.input_font)
+                entry.pack(side=tk.LEFT)
+                self.entries[team] = entry
+                if self.lbb_values.get(team):
+                    entry.insert(0, self.lbb_values[team])
+                entry.bind("<Return>", lambda event, t=team, p=page, idx=page_idx, next_idx=j+1: self.handle_enter(t, p, idx, next_idx))
+
+    def _lbb_float(self, team):
+        value = self.lbb_values.get(team) if team else None
+        return float(value) if value else None
+
+    def on_close(self):
+        self.saver.flush()
+        self.root.destroy()
+
+    def _on_destroy(self, event):
+        if event.widget is self.root:
+            self.saver.flush()
 
     def load_existing_data(self):
-        """加载所有 JSON 文件并合并到 self.results"""
-        with open(self.matches_file, 'r', encoding='utf-8') as f:
-            matches_data = json.load(f)
-            for match in matches_data["matches"]:
-                match_id = match["MatchID"]
-                match_time = match["MatchTime"]
-                for team_key, team_name in [("TeamA", match["TeamA"]), ("TeamB", match["TeamB"])]:
-                    if team_name:
-                        key = (match_time, team_name)
-                        odds = match[f"{team_key}_Odds"]
-                        self.results[key] = {
-                            "MatchID": match_id,
-                            "MatchTime": match_time,
-                            "Team": team_name,
-                            "Odds": float(odds) if odds != "N/A" else "N/A",
-                            "LittleBlackBox_Odds": "N/A",
-                            "Probability": "N/A",
-                            "Expected_Profit": "N/A",
-                            "ProfitVariance": "N/A",
-                            "Kelly": "N/A",
-                            "LittleBlackBox_Rake": "N/A"
-                        }
-
-        # 加载 odds_probability.json
-        if os.path.exists(self.result_files["odds_probability"]):
-            with open(self.result_files["odds_probability"], 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                for item in data.get("odds", []):
-                    match_id = item["MatchID"]
-                    for team_key in ["TeamA", "TeamB"]:
-                        odds_key = f"{team_key}_Odds"
-                        team_name = next((t["Team"] for t in self.teams if str(t["Odds"]) == str(item[odds_key])), None)
-                        if team_name:
-                            match_time = next(t["MatchTime"] for t in self.teams if t["Team"] == team_name)
-                            key = (match_time, team_name)
-                            if key in self.results:
-                                self.results[key].update({
-                                    "Probability": float(item[f"{team_key}_Probability"]) if item[f"{team_key}_Probability"] != "N/A" else "N/A",
-                                    "LittleBlackBox_Rake": float(item[f"{team_key}_PlatformRake"]) if item[f"{team_key}_PlatformRake"] != "N/A" else "N/A"
-                                })
-
-        # 加载 littleblackbox_odds.json
-        if os.path.exists(self.result_files["littleblackbox_odds"]):
-            with open(self.result_files["littleblackbox_odds"], 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                for item in data.get("littleblackbox", []):
-                    match_id = item["MatchID"]
-                    for team_key in ["TeamA", "TeamB"]:
-                        lbb_odds_key = f"{team_key}_LittleBlackBox_Odds"
-                        team_name = next((m[team_key] for m in matches_data["matches"] if m["MatchID"] == match_id), None)
-                        if team_name:
-                            match_time = next(m["MatchTime"] for m in matches_data["matches"] if m["MatchID"] == match_id)
-                            key = (match_time, team_name)
-                            if key in self.results:
-                                self.results[key].update({
-                                    "LittleBlackBox_Odds": float(item[lbb_odds_key]) if item[lbb_odds_key] != "N/A" else "N/A"
-                                })
-
-        # 加载 expected_profit_variance.json
-        if os.path.exists(self.result_files["expected_profit_variance"]):
-            with open(self.result_files["expected_profit_variance"], 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                for item in data.get("profit", []):
-                    match_id = item["MatchID"]
-                    for team_key in ["TeamA", "TeamB"]:
-                        exp_profit_key = f"{team_key}_Expected_Profit"
-                        var_key = f"{team_key}_ProfitVariance"
-                        kelly_key = f"{team_key}_Kelly"
-                        team_name = next((m[team_key] for m in matches_data["matches"] if m["MatchID"] == match_id), None)
-                        if team_name:
-                            match_time = next(m["MatchTime"] for m in matches_data["matches"] if m["MatchID"] == match_id)
-                            key = (match_time, team_name)
-                            if key in self.results:
-                                self.results[key].update({
-                                    "Expected_Profit": float(item[exp_profit_key]) if item[exp_profit_key] != "N/A" else "N/A",
-                                    "ProfitVariance": float(item[var_key]) if item[var_key] != "N/A" else "N/A",
-                                    "Kelly": float(item[kelly_key]) if item[kelly_key] != "N/A" else "N/A"
-                                })
+        """从共享的 MatchStore 加载所有结果并合并到 self.results"""
+        store = match_store.get_store(self.match_folder)
+        for match in store.matches:
+            match_id = match["MatchID"]
+            odds_row = store.get_row("odds_probability", match_id) or {}
+            lbb_row = store.get_row("littleblackbox_odds", match_id) or {}
+            profit_row = store.get_row("expected_profit_variance", match_id) or {}
+            for team_key, team_name in [("TeamA", match["TeamA"]), ("TeamB", match["TeamB"])]:
+                if not team_name:
+                    continue
+                key = (match["MatchTime"], team_name)
+                self.results[key] = {
+                    "MatchID": match_id,
+                    "MatchTime": match["MatchTime"],
+                    "Team": team_name,
+                    "Odds": to_float(match[f"{team_key}_Odds"]),
+                    "LittleBlackBox_Odds": to_float(lbb_row.get(f"{team_key}_LittleBlackBox_Odds", "N/A")),
+                    "Probability": to_float(odds_row.get(f"{team_key}_Probability", "N/A")),
+                    "Expected_Profit": to_float(profit_row.get(f"{team_key}_Expected_Profit", "N/A")),
+                    "ProfitVariance": to_float(profit_row.get(f"{team_key}_ProfitVariance", "N/A")),
+                    "Kelly": to_float(profit_row.get(f"{team_key}_Kelly", "N/A")),
+                    "LittleBlackBox_Rake": to_float(odds_row.get(f"{team_key}_PlatformRake", "N/A"))
+                }
+
+    def open_bulk_import(self):
+        dialog = tk.Toplevel(self.root)
+        dialog.title("批量导入小黑盒赔率")
+        tk.Label(dialog, text='每行一个 "MM-DD HH:MM_队伍名": 赔率，或粘贴 inputs.json 的内容').pack(anchor="w")
+        text = tk.Text(dialog, width=60, height=20)
+        text.pack(fill="both", expand=True)
+        if os.path.exists("inputs.json"):
+            with open("inputs.json", 'r', encoding='utf-8') as f:
+                text.insert("1.0", f.read())
+        ttk.Button(dialog, text="导入", command=lambda: self.bulk_import(text.get("1.0", tk.END), dialog)).pack(pady=5)
+
+    def bulk_import(self, text, dialog=None):
+        # 先写入尚未保存的修改，再一次性导入并重新计算
+        self.saver.flush()
+        report = lbb_import.apply_lbb_odds(self.match_folder, lbb_import.parse_lbb_text(text))
+        self.results = {}
+        self.load_existing_data()
+        self.refresh_rows()
+        if dialog is not None:
+            dialog.destroy()
+        message = f"已更新 {len(report['updated'])} 场比赛"
+        if report["unmatched"]:
+            message += "\n未匹配到比赛:\n" + "\n".join(report["unmatched"])
+        messagebox.showinfo("批量导入", message)
+
+    def refresh_rows(self):
+        for team in self.teams:
+            values = self.results.get((team["MatchTime"], team["Team"]))
+            if not values:
+                continue
+            if values["LittleBlackBox_Odds"] != "N/A":
+                self.lbb_values[team["Team"]] = str(values["LittleBlackBox_Odds"])
+            entry = self.entries.get(team["Team"])
+            if entry is not None and values["LittleBlackBox_Odds"] != "N/A":
+                entry.delete(0, tk.END)
+                entry.insert(0, self.lbb_values[team["Team"]])
+            # 还没有插入表格的行会在插入时读取最新结果
+            item = self.tree_items.get(team["Team"])
+            if item:
+                self._set_row(item, format_row(values))
 
     def check_odds_changed(self):
-        with open(self.matches_file, 'r', encoding='utf-8') as f:
-            matches_data = json.load(f)
-        
-        for match in matches_data["matches"]:
+        for match in match_store.get_store(self.match_folder).matches:
             match_id = match["MatchID"]
             for team_key in ["TeamA", "TeamB"]:
                 team_name = match[team_key]
@@ -232,8 +278,8 @@ class BettingApp:
                     continue
                 key = (match["MatchTime"], team_name)
                 current_odds = float(match[f"{team_key}_Odds"]) if match[f"{team_key}_Odds"] != "N/A" else "N/A"
-                current_lbb_odds = self.entries.get(team_name, tk.Entry()).get()
-                current_lbb_odds = float(current_lbb_odds) if current_lbb_odds else "N/A"
+                current_lbb_odds = self._lbb_float(team_name)
+                current_lbb_odds = current_lbb_odds if current_lbb_odds is not None else "N/A"
                 if key in self.results:
                     stored_odds = float(self.results[key]["Odds"]) if self.results[key]["Odds"] != "N/A" else "N/A"
                     stored_lbb_odds = self.results[key].get("LittleBlackBox_Odds", "N/A")
@@ -244,31 +290,27 @@ class BettingApp:
     def update_special_info(self, match, entry):
         new_time = entry.get().strip()
         if new_time:
-            with open(self.matches_file, 'r', encoding='utf-8') as f:
-                matches_data = json.load(f)
-            for m in matches_data["matches"]:
-                if m["MatchID"] == match["MatchID"]:
-                    m["MatchTime"] = new_time
-                    if "SpecialInfo" in m:
-                        del m["SpecialInfo"]
-                    break
-            with open(self.matches_file, 'w', encoding='utf-8') as f:
-                json.dump(matches_data, f, ensure_ascii=False, indent=2)
+            with match_store.locked(self.match_folder) as store:
+                store.update_match_time(match["MatchID"], new_time)
+                store.save(["matches_info"])
             
             for team in [match["TeamA"], match["TeamB"]]:
                 if team in self.tree_items:
                     item = self.tree_items[team]
-                    values = list(self.tree.item(item, "values"))
+                    values = list(self.row_values[item])
                     values[0] = new_time
-                    self.tree.item(item, values=tuple(values))
+                    self._set_row(item, values)
 
     def handle_enter(self, team, page, page_idx, next_idx):
-        # 更新当前队伍
+        # 更新当前队伍，本页两个输入框中的值同步到 lbb_values
+        team_idx = self.team_index[team]
+        for t in self.teams[team_idx - team_idx % 2:team_idx - team_idx % 2 + 2]:
+            if t["Team"] in self.entries:
+                self.lbb_values[t["Team"]] = self.entries[t["Team"]].get().strip()
         self.calculate_for_team(team, page_idx)
-        lbb_odds = self.entries[team].get()
+        lbb_odds = self.lbb_values[team]
+        match_time = self.teams[team_idx]["MatchTime"]
         if lbb_odds:
-            team_idx = next(i for i, t in enumerate(self.teams) if t["Team"] == team)
-            match_time = self.teams[team_idx]["MatchTime"]
             team_key = (match_time, team)
             if team_key in self.results:
                 self.results[team_key]["LittleBlackBox_Odds"] = float(lbb_odds)
@@ -277,7 +319,7 @@ class BettingApp:
         opponent_idx = team_idx + 1 if team_idx % 2 == 0 else team_idx - 1
         if opponent_idx < len(self.teams):
             opponent = self.teams[opponent_idx]["Team"]
-            opp_lbb_odds = self.entries[opponent].get()
+            opp_lbb_odds = self.lbb_values.get(opponent)
             if opp_lbb_odds:  # 如果对手的小黑盒赔率已输入，同步更新两支队伍
                 opp_key = (match_time, opponent)
                 if opp_key in self.results:
@@ -286,9 +328,14 @@ class BettingApp:
                 self.calculate_for_team(team, page_idx)
                 self.calculate_for_team(opponent, page_idx)
 
-        # 保存到结果文件
-        match_folder = os.path.join("match_data", self.match_name)
-        data_processor.save_results(list(self.results.values()), match_folder, self.match_name)
+        # 只记录本场比赛为已修改，由 WriteBehindSaver 空闲后统一写盘
+        found = match_store.get_store(self.match_folder).find(match_time, team)
+        if found:
+            match = found[0]
+            team1 = self.results.get((match_time, match["TeamA"]))
+            team2 = self.results.get((match_time, match["TeamB"]))
+            if team1 and team2:
+                self.saver.mark_dirty(match["MatchID"], team1, team2)
         
         current_entries = [self.entries[t] for t in self.entries if t in [self.teams[page_idx * 2]["Team"], 
                                                                         self.teams[page_idx * 2 + 1]["Team"]] 
@@ -300,6 +347,7 @@ class BettingApp:
                                                                                  self.teams[page_idx * 2 + 1]["Team"]] 
                             if page_idx * 2 + 1 < len(self.teams))
             if all_filled and page_idx < (len(self.teams) - 1) // 2:
+                self._build_page(page_idx + 1)
                 self.notebook.select(page_idx + 1)
                 next_page_entries = [self.entries[t] for t in self.entries if t in [self.teams[(page_idx + 1) * 2]["Team"], 
                                                                                    self.teams[(page_idx + 1) * 2 + 1]["Team"]] 
@@ -308,32 +356,22 @@ class BettingApp:
                     next_page_entries[0].focus_set()
 
     def calculate_for_team(self, team, page_idx):
-        odds = next(t["Odds"] for t in self.teams if t["Team"] == team)
-        lbb_odds = self.entries[team].get()
-        lbb_odds = float(lbb_odds) if lbb_odds else None
-        
-        team_idx = next(i for i, t in enumerate(self.teams) if t["Team"] == team)
+        team_idx = self.team_index[team]
+        odds = self.teams[team_idx]["Odds"]
+        lbb_odds = self._lbb_float(team)
+
         opponent_idx = team_idx + 1 if team_idx % 2 == 0 else team_idx - 1
         opponent = self.teams[opponent_idx]["Team"] if opponent_idx < len(self.teams) else None
-        opp_lbb_odds = self.entries[opponent].get() if opponent else None
-        opp_lbb_odds = float(opp_lbb_odds) if opp_lbb_odds else None
+        opp_lbb_odds = self._lbb_float(opponent)
 
         opponent_data = {"team": opponent, "lbb_odds": opp_lbb_odds}
         match_time = self.teams[team_idx]["MatchTime"]
-        result = data_processor.calculate_team_metrics(team, odds, lbb_odds, opponent_data, self.teams)
+        # 只把对手传进去，避免在整届赛事的队伍列表里线性查找
+        pair = [self.teams[opponent_idx]] if opponent else []
+        result = data_processor.calculate_team_metrics(team, odds, lbb_odds, opponent_data, pair)
         
         result["MatchTime"] = match_time
         item = self.tree_items.get(team)
         if item:
-            self.tree.item(item, values=(
-                result["MatchTime"],
-                result["Team"],
-                f"{result['Odds']:.2f}" if isinstance(result['Odds'], (int, float)) and result['Odds'] != "N/A" else str(result['Odds']) if result['Odds'] != "N/A" else "N/A",
-                f"{result['LittleBlackBox_Odds']:.2f}" if result['LittleBlackBox_Odds'] != "N/A" else "N/A",
-                f"{result['Probability']:.2f}" if result['Probability'] != "N/A" else "N/A",
-                f"{result['Expected_Profit'] * 100:.2f}%" if result['Expected_Profit'] != "N/A" else "N/A",
-                f"{result['ProfitVariance']:.2f}" if result['ProfitVariance'] != "N/A" else "N/A",
-                f"{result['Kelly']:.9f}" if result['Kelly'] != "N/A" else "N/A",
-                f"{result['LittleBlackBox_Rake']:.3%}" if result['LittleBlackBox_Rake'] != "N/A" else "N/A"
-            ))
+            self._set_row(item, format_result(result))
         self.results[(match_time, team)] = result
\ No newline at end of file
@@ -0,0 +1,150 @@
+import os
+import time
+import numpy as np
+import match_store
+import profiling
+
+# 每次抓取后把所有盘口的赔率追加到赛事文件夹下的 odds_history.bin。
+# 定长二进制记录，可以直接 np.memmap 读取，不需要解析历史快照。
+# odds_history.idx 是按 (MatchID, 记录位置) 排序的索引，追加时合并进去，
+# 查询一场比赛只在索引上二分，不需要对整个历史文件排序。
+
+HISTORY_FILE = "odds_history.bin"
+INDEX_FILE = "odds_history.idx"
+
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("match_id", "<u4"),
+    ("odds_a", "<f4"),
+    ("odds_b", "<f4")
+])
+
+INDEX_DTYPE = np.dtype([
+    ("match_id", "<u4"),
+    ("position", "<u4")
+])
+
+
+def _odds_value(value):
+    if value == "-":
+        return 1.0417
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def history_path(match_folder):
+    return os.path.join(match_folder, HISTORY_FILE)
+
+
+def index_path(match_folder):
+    return os.path.join(match_folder, INDEX_FILE)
+
+
+def _record_count(path):
+    return os.path.getsize(path) // RECORD_DTYPE.itemsize if os.path.exists(path) else 0
+
+
+def _read_index(match_folder, count):
+    """读取与 count 条记录对应的索引；索引不存在或条数不一致（旧文件、写到一半）时返回 None"""
+    path = index_path(match_folder)
+    if not os.path.exists(path) or os.path.getsize(path) != count * INDEX_DTYPE.itemsize:
+        return None
+    return np.fromfile(path, dtype=INDEX_DTYPE)
+
+
+def _write_index(match_folder, index):
+    path = index_path(match_folder)
+    tmp_path = path + ".tmp"
+    index.tofile(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def build_index(records):
+    """按 MatchID 稳定排序的索引，同一场比赛的记录按追加顺序（即时间顺序）排列"""
+    order = np.argsort(records["match_id"], kind="stable")
+    index = np.empty(len(records), dtype=INDEX_DTYPE)
+    index["match_id"] = records["match_id"][order]
+    index["position"] = order
+    return index
+
+
+def _merge_index(index, match_ids, start):
+    # 新记录的位置都在已有记录之后，插到同一 MatchID 区间的末尾即可保持 (MatchID, 位置) 有序
+    order = np.argsort(match_ids, kind="stable")
+    added = np.empty(len(match_ids), dtype=INDEX_DTYPE)
+    added["match_id"] = match_ids[order]
+    added["position"] = start + order
+    at = np.searchsorted(index["match_id"], added["match_id"], side="right")
+    return np.insert(index, at, added)
+
+
+def append_snapshot(match_folder, matches, timestamp=None):
+    """把本次抓取到的每个盘口作为一条记录追加到历史文件并更新索引，返回写入的条数"""
+    timestamp = time.time() if timestamp is None else timestamp
+    records = np.empty(len(matches), dtype=RECORD_DTYPE)
+    for i, match in enumerate(matches):
+        records[i] = (timestamp, int(match["MatchID"]),
+                      _odds_value(match["TeamA_Odds"]), _odds_value(match["TeamB_Odds"]))
+    path = history_path(match_folder)
+    with match_store.folder_lock(match_folder):
+        start = _record_count(path)
+        index = _read_index(match_folder, start)
+        with open(path, 'ab') as f:
+            records.tofile(f)
+        if index is None:
+            index = build_index(np.fromfile(path, dtype=RECORD_DTYPE, count=start + len(records)))
+        else:
+            index = _merge_index(index, records["match_id"], start)
+        _write_index(match_folder, index)
+    profiling.count("bytes_written", records.nbytes, file=HISTORY_FILE)
+    return len(records)
+
+
+class OddsHistory:
+    def __init__(self, match_folder):
+        self.match_folder = match_folder
+        self.path = history_path(match_folder)
+        self.records = self._map()
+        self._index = None
+
+    def _map(self):
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < RECORD_DTYPE.itemsize:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        count = os.path.getsize(self.path) // RECORD_DTYPE.itemsize
+        return np.memmap(self.path, dtype=RECORD_DTYPE, mode='r', shape=(count,))
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def index(self):
+        # 正常情况下直接 memmap 追加时维护的索引；没有索引的旧历史文件只排序一次并保存
+        if self._index is None:
+            count = len(self.records)
+            path = index_path(self.match_folder)
+            if count and os.path.exists(path) and os.path.getsize(path) == count * INDEX_DTYPE.itemsize:
+                self._index = np.memmap(path, dtype=INDEX_DTYPE, mode='r', shape=(count,))
+            else:
+                self._index = build_index(self.records)
+                if count:
+                    with match_store.folder_lock(self.match_folder):
+                        if _record_count(self.path) == count:
+                            _write_index(self.match_folder, self._index)
+        return self._index
+
+    def match_history(self, match_id):
+        """返回某场比赛按时间排列的 (timestamp, odds_a, odds_b) 记录"""
+        ids = self.index["match_id"]
+        match_id = int(match_id)
+        lo = np.searchsorted(ids, match_id, side="left")
+        hi = np.searchsorted(ids, match_id, side="right")
+        return self.records[np.asarray(self.index["position"][lo:hi])]
+
+    def match_ids(self):
+        ids = np.asarray(self.index["match_id"])
+        return ids[np.r_[True, ids[1:] != ids[:-1]]] if len(ids) else ids
+
+    def snapshot_times(self):
+        return np.unique(self.records["timestamp"])
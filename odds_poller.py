@@ -0,0 +1,145 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import fetch_odds
+import driver_pool
+import batch_fetch
+import match_store
+
+# 后台赔率轮询：不依赖 Tk，按赛事的开赛时间自适应调整刷新间隔，
+# 连续失败或页面没有变化时退避，并限制同时抓取的数量。
+
+
+def match_datetime(match_time, now):
+    if not match_time or match_time == "未知时间":
+        return None
+    try:
+        date, clock = match_time.split(' ', 1)
+        month, day = date.split('-')
+        return datetime(now.year, int(month), int(day), *map(int, clock.split(':')))
+    except ValueError:
+        return None
+
+
+def folder_signature(match_folder):
+    """已保存的比赛和赔率的摘要，用于判断页面是否有变化"""
+    if not match_store.has_matches(match_folder):
+        return None
+    matches = match_store.get_store(match_folder).matches
+    key = sorted((m["MatchID"], m["MatchTime"], m["TeamA_Odds"], m["TeamB_Odds"]) for m in matches)
+    return hashlib.sha1(json.dumps(key, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class TournamentState:
+    def __init__(self, url):
+        self.url = url
+        self.match_name = fetch_odds.extract_match_name(url)
+        self.match_folder = os.path.join("match_data", self.match_name)
+        self.failures = 0
+        self.unchanged = 0
+        self.last_signature = folder_signature(self.match_folder)
+        self.interval = None
+
+
+class OddsPoller:
+    def __init__(self, urls=None, cache_file="url_cache.json", max_concurrency=2,
+                 min_interval=60, base_interval=600, max_interval=3600, extract_mode="script"):
+        if urls is None:
+            urls = batch_fetch.load_cached_urls(cache_file)
+        self.states = [TournamentState(url) for url in urls]
+        self.max_concurrency = max_concurrency
+        self.min_interval = min_interval
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.extract_mode = extract_mode
+        self.pool = None
+        self.executor = None
+        self.folder_locks = {}
+
+    def next_interval(self, state, now=None):
+        """离最近一场未开始的比赛越近刷新越频繁，失败和无变化时按指数退避"""
+        now = now or datetime.now()
+        upcoming = []
+        if match_store.has_matches(state.match_folder):
+            for match in match_store.get_store(state.match_folder).matches:
+                dt = match_datetime(match["MatchTime"], now)
+                if dt and dt >= now:
+                    upcoming.append((dt - now).total_seconds())
+
+        if upcoming:
+            interval = min(self.base_interval, max(self.min_interval, min(upcoming) / 10))
+        else:
+            interval = self.base_interval
+        interval *= 2 ** min(state.failures, 6)
+        interval *= 1.5 ** min(state.unchanged, 6)
+        return min(self.max_interval, interval)
+
+    async def poll_once(self, state, semaphore):
+        loop = asyncio.get_running_loop()
+        # 同一个赛事文件夹的多个 URL 不能同时写入
+        folder_lock = self.folder_locks.setdefault(state.match_folder, asyncio.Lock())
+        async with folder_lock, semaphore:
+            start = time.perf_counter()
+            try:
+                result, filename = await loop.run_in_executor(
+                    self.executor, lambda: fetch_odds.fetch_team_odds(state.url, self.extract_mode, self.pool))
+            except Exception as e:
+                logging.error(f"轮询 {state.url} 时出错: {e}")
+                result = -1
+            elapsed = time.perf_counter() - start
+
+        if result != 0:
+            state.failures += 1
+            logging.warning(f"{state.match_name} 抓取失败（连续 {state.failures} 次），耗时 {elapsed:.1f} 秒")
+            return
+
+        state.failures = 0
+        signature = folder_signature(state.match_folder)
+        if signature == state.last_signature:
+            state.unchanged += 1
+        else:
+            state.unchanged = 0
+            state.last_signature = signature
+        logging.info(f"{state.match_name} 已刷新，耗时 {elapsed:.1f} 秒，连续无变化 {state.unchanged} 次")
+
+    async def _run_tournament(self, state, semaphore, stop_event):
+        while not stop_event.is_set():
+            await self.poll_once(state, semaphore)
+            state.interval = self.next_interval(state)
+            logging.info(f"{state.match_name} 下次刷新在 {state.interval:.0f} 秒后")
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=state.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self, stop_event=None):
+        if not self.states:
+            logging.warning("没有需要轮询的赛事")
+            return
+        stop_event = stop_event or asyncio.Event()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.pool = driver_pool.DriverPool(size=self.max_concurrency)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        try:
+            await asyncio.gather(*(self._run_tournament(state, semaphore, stop_event) for state in self.states))
+        finally:
+            self.executor.shutdown(wait=True)
+            self.pool.close()
+
+
+def main(urls=None):
+    poller = OddsPoller(urls or None)
+    try:
+        asyncio.run(poller.run())
+    except KeyboardInterrupt:
+        logging.info("轮询已停止")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,151 @@
+from html.parser import HTMLParser
+
+# 不用浏览器，直接从页面 HTML 中取出与 fetch_odds.EXTRACT_SCRIPT 相同结构的数据：
+# {"titles": [...], "results": [...], "times": [[时间, 日期], ...], "bo": bool}
+# 用于回放录制的页面和不开浏览器的 HTTP 抓取；fetch_odds 的 CSS 选择器也由这里的常量拼出，两边保持一致。
+
+TITLE_TEST = "odd-button__title"
+RESULT_TEST = "odd-button__result"
+BUTTON_TEST_PREFIX = "odd-button"
+TIME_CLASSES = {"text-sm", "text-grey-500"}
+BO_TEXT = "BO"
+
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+             "param", "source", "track", "wbr"}
+SKIP_TAGS = {"script", "style", "template", "noscript"}
+
+
+class _Frame:
+    __slots__ = ("tag", "text", "on_close", "time_group", "seen_text")
+
+    def __init__(self, tag):
+        self.tag = tag
+        self.text = None        # 需要取文本时为片段列表
+        self.on_close = []      # 元素结束时用取到的文本依次调用
+        self.time_group = None  # 时间 div 收集到的各个子 div 文本
+        self.seen_text = False
+
+
+class OddsExtractor(HTMLParser):
+    """流式提取：边读边处理，不建立 DOM，只为需要取文本的元素保留文本片段。
+    可以分块 feed()，适合直接读 HTTP 响应；结果在 close() 之后的 data 里"""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.titles, self.results, self.times = [], [], []
+        self.bo = False
+        self.buttons = 0
+        self.stack = []
+        self.capturing = []   # 正在收集文本的元素
+        self.skip_depth = 0
+
+    @property
+    def data(self):
+        return {"titles": self.titles, "results": self.results, "times": self.times, "bo": self.bo}
+
+    def _capture(self, frame, target, index):
+        """元素结束时把它的文本写入 target[index]"""
+        if frame.text is None:
+            frame.text = []
+            self.capturing.append(frame)
+        frame.on_close.append(lambda text: target.__setitem__(index, text))
+
+    def handle_starttag(self, tag, attrs):
+        if self.skip_depth or tag in SKIP_TAGS:
+            if tag in SKIP_TAGS:
+                self.skip_depth += 1
+            return
+        attrs = dict(attrs)
+        test = attrs.get("data-test") or ""
+        if test.startswith(BUTTON_TEST_PREFIX):
+            self.buttons += 1
+        if tag in VOID_TAGS:
+            return
+        frame = _Frame(tag)
+        if test == TITLE_TEST or test == RESULT_TEST:
+            target = self.titles if test == TITLE_TEST else self.results
+            target.append("")
+            self._capture(frame, target, len(target) - 1)
+        if tag == "div":
+            # 所有外层时间 div 都要收集这个 div 的文本（querySelectorAll('div') 包含所有后代 div）
+            for group in (f.time_group for f in self.stack if f.time_group is not None):
+                group.append("")
+                self._capture(frame, group, len(group) - 1)
+            if TIME_CLASSES <= set((attrs.get("class") or "").split()):
+                frame.time_group = []
+                self.times.append(frame.time_group)
+        self.stack.append(frame)
+
+    def handle_startendtag(self, tag, attrs):
+        if self.skip_depth or tag in SKIP_TAGS:
+            return
+        test = dict(attrs).get("data-test") or ""
+        if test.startswith(BUTTON_TEST_PREFIX):
+            self.buttons += 1
+
+    def _close_frame(self, frame):
+        if frame.text is not None:
+            self.capturing.remove(frame)
+            text = " ".join("".join(frame.text).split())
+            for store in frame.on_close:
+                store(text)
+
+    def handle_endtag(self, tag):
+        if self.skip_depth:
+            if tag in SKIP_TAGS:
+                self.skip_depth -= 1
+            return
+        # 标签没有正确嵌套时，关闭到最近的同名元素为止；找不到同名元素则忽略
+        for i in range(len(self.stack) - 1, -1, -1):
+            if self.stack[i].tag == tag:
+                for frame in reversed(self.stack[i:]):
+                    self._close_frame(frame)
+                del self.stack[i:]
+                return
+
+    def handle_data(self, data):
+        if self.skip_depth:
+            return
+        if self.stack:
+            top = self.stack[-1]
+            # XPath contains(text(), 'BO') 只看 div 的第一个直接文本节点
+            if top.tag == "div" and not top.seen_text:
+                top.seen_text = True
+                if BO_TEXT in data:
+                    self.bo = True
+        for frame in self.capturing:
+            frame.text.append(data)
+
+    def close(self):
+        super().close()
+        for frame in reversed(self.stack):
+            self._close_frame(frame)
+        self.stack = []
+
+
+def extract_from_html(html):
+    """从 HTML 中提取队伍名、赔率、时间和 BO 标记，结构与 fetch_odds.extract_page_data 相同"""
+    extractor = OddsExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return extractor.data
+
+
+def extract_from_stream(chunks):
+    """逐块解析（如 HTTP 响应的分块读取），返回 (数据, 赔率按钮数量)"""
+    extractor = OddsExtractor()
+    for chunk in chunks:
+        extractor.feed(chunk)
+    extractor.close()
+    return extractor.data, extractor.buttons
+
+
+def has_odds_buttons(html):
+    """页面上是否已经有赔率按钮（与等待条件 [data-test^="odd-button"] 一致）"""
+    return extract_from_stream([html])[1] > 0
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        print(json.dumps(extract_from_html(f.read()), ensure_ascii=False, indent=2))
@@ -0,0 +1,212 @@
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+
+# 轻量的分阶段计时和计数。没有启用时所有函数都直接返回，几乎没有开销。
+# 启用方式：环境变量 YBB_PROFILE=1（或设为输出目录），或调用 enable()。
+# 每次运行（一次抓取、一次 CLI 命令）有一个 run_id，结束时把事件追加到 profile_events.jsonl，
+# 并把累计值写成 Prometheus 文本格式的 metrics.prom。
+# 不在运行中的阶段和计数（如界面操作）只计入累计值，不缓存事件；长时间的运行缓存满 MAX_BUFFERED_EVENTS 条时先写出一次。
+
+ENV_VAR = "YBB_PROFILE"
+DEFAULT_DIR = "profile_data"
+EVENTS_FILE = "profile_events.jsonl"
+PROMETHEUS_FILE = "metrics.prom"
+METRIC_PREFIX = "ybb"
+MAX_BUFFERED_EVENTS = 10000
+
+_NOOP = nullcontext()
+_profiler = None
+
+
+class Profiler:
+    def __init__(self, output_dir=DEFAULT_DIR):
+        self.output_dir = output_dir
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.events = []
+        self.stage_totals = {}  # (stage, labels) -> [次数, 秒数]
+        self.counters = {}      # (name, labels) -> 累计值
+        self.runs = {}          # kind -> (次数, 最近一次的 run_id, 结束时间)
+
+    @property
+    def run_id(self):
+        return getattr(self.local, "run_id", None)
+
+    def record_stage(self, name, seconds, labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            total = self.stage_totals.setdefault(key, [0, 0.0])
+            total[0] += 1
+            total[1] += seconds
+            full = self._append_event({"type": "stage", "name": name, "seconds": seconds, **labels})
+        if full:
+            self.flush()
+
+    def record_count(self, name, value, labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+            full = self._append_event({"type": "count", "name": name, "value": value, **labels})
+        if full:
+            self.flush()
+
+    def _append_event(self, event):
+        # 调用方持有 self.lock；只有运行中才缓存事件，返回缓存是否已满
+        run_id = self.run_id
+        if run_id is None:
+            return False
+        self.events.append({"run_id": run_id, "ts": time.time(), **event})
+        return len(self.events) >= MAX_BUFFERED_EVENTS
+
+    def finish_run(self, kind):
+        with self.lock:
+            count = self.runs.get(kind, (0,))[0]
+            self.runs[kind] = (count + 1, self.run_id, time.time())
+
+    def flush(self):
+        """把缓存的事件追加到 JSON lines 文件，并重写 Prometheus 文本"""
+        with self.lock:
+            events, self.events = self.events, []
+            text = self.prometheus_text()
+        os.makedirs(self.output_dir, exist_ok=True)
+        if events:
+            with open(os.path.join(self.output_dir, EVENTS_FILE), 'a', encoding='utf-8') as f:
+                for event in events:
+                    f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        path = os.path.join(self.output_dir, PROMETHEUS_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def prometheus_text(self):
+        # 文本格式要求同一指标的所有样本连续出现，所以每个指标单独输出一段
+        stages = sorted(self.stage_totals.items())
+        families = [
+            ("stage_seconds_total", "counter",
+             [(_labels((("stage", name),) + labels), f"{seconds:.6f}") for (name, labels), (_, seconds) in stages]),
+            ("stage_calls_total", "counter",
+             [(_labels((("stage", name),) + labels), calls) for (name, labels), (calls, _) in stages])
+        ]
+        for name in sorted({name for name, _ in self.counters}):
+            families.append((f"{name}_total", "counter",
+                             [(_labels(labels), value) for (counter, labels), value in sorted(self.counters.items())
+                              if counter == name]))
+        runs = sorted(self.runs.items())
+        families.append(("runs_total", "counter",
+                         [(_labels((("kind", kind),)), count) for kind, (count, _, _) in runs]))
+        families.append(("last_run_timestamp_seconds", "gauge",
+                         [(_labels((("kind", kind), ("run_id", run_id))), f"{finished:.3f}")
+                          for kind, (_, run_id, finished) in runs]))
+        lines = []
+        for name, kind, samples in families:
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+            lines.extend(f"{METRIC_PREFIX}_{name}{label_text} {value}" for label_text, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    escaped = []
+    for key, value in pairs:
+        value = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        escaped.append(f'{key}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+class _Stage:
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        profiler = _profiler
+        if profiler is not None:
+            profiler.record_stage(self.name, time.perf_counter() - self.start, self.labels)
+        return False
+
+
+def enable(output_dir=None):
+    global _profiler
+    _profiler = Profiler(output_dir or DEFAULT_DIR)
+    return _profiler
+
+
+def disable():
+    global _profiler
+    if _profiler is not None:
+        _profiler.flush()
+    _profiler = None
+
+
+def enabled():
+    return _profiler is not None
+
+
+def stage(name, **labels):
+    """with profiling.stage("page_get"): ... 记录一个阶段的耗时"""
+    if _profiler is None:
+        return _NOOP
+    return _Stage(name, labels)
+
+
+def clock():
+    """用于不方便包成 with 块的长代码段：started = clock() ... record(name, started)"""
+    return time.perf_counter() if _profiler is not None else None
+
+
+def record(name, started, **labels):
+    if _profiler is not None and started is not None:
+        _profiler.record_stage(name, time.perf_counter() - started, labels)
+
+
+def count(name, value=1, **labels):
+    if _profiler is not None:
+        _profiler.record_count(name, value, labels)
+
+
+@contextmanager
+def run(kind, **labels):
+    """一次运行：生成 run_id，结束时记录总耗时并写出文件。嵌套调用沿用外层的 run_id"""
+    profiler = _profiler
+    if profiler is None or profiler.run_id is not None:
+        yield profiler.run_id if profiler is not None else None
+        return
+    profiler.local.run_id = uuid.uuid4().hex[:12]
+    started = time.perf_counter()
+    try:
+        yield profiler.run_id
+    finally:
+        profiler.record_stage("run", time.perf_counter() - started, dict(labels, kind=kind))
+        profiler.finish_run(kind)
+        profiler.local.run_id = None
+        profiler.flush()
+
+
+def instrument_driver(driver):
+    """统计 WebDriver 命令次数（按命令名）。总是替换实例上的 execute，每次调用时才检查是否启用，
+    之后再 enable() 时池中已有的 driver 也会被统计"""
+    execute = driver.execute
+
+    def counted_execute(driver_command, params=None):
+        if _profiler is not None:
+            count("webdriver_commands", command=driver_command)
+        return execute(driver_command, params)
+
+    driver.execute = counted_execute
+    return driver
+
+
+if os.environ.get(ENV_VAR):
+    enable(DEFAULT_DIR if os.environ[ENV_VAR] in ("1", "true") else os.environ[ENV_VAR])
@@ -1,8 +1,39 @@
-import json
 import os
 from tkinter import ttk, font, Tk, messagebox, StringVar
 import tkinter as tk
 from datetime import datetime, timedelta
+import match_store
+
+SEARCH_GRAM = 3
+SEARCH_LIMIT = 200  # 下拉列表最多显示的比赛数
+
+class TeamSearchIndex:
+    """最近比赛队伍名的搜索索引（不区分大小写）。
+    不超过 3 个字符的子串直接查表；更长的查询用各个 3-gram 的比赛集合求交集，再确认子串。"""
+    def __init__(self, matches):
+        self.matches = matches
+        self.names = [tuple(name.lower() for name in (m["TeamA"], m["TeamB"]) if name) for m in matches]
+        self.labels = [f"{m['MatchTime']} - {m['TeamA']} vs {m['TeamB']}" for m in matches]
+        self.grams = {}
+        for pos, names in enumerate(self.names):
+            for name in names:
+                for n in range(1, SEARCH_GRAM + 1):
+                    for i in range(len(name) - n + 1):
+                        self.grams.setdefault(name[i:i + n], set()).add(pos)
+
+    def search(self, text):
+        """返回匹配的比赛位置，队伍名以查询开头的排在前面"""
+        text = text.lower()
+        if not text:
+            return list(range(len(self.matches)))
+        if len(text) <= SEARCH_GRAM:
+            positions = self.grams.get(text, set())
+        else:
+            postings = sorted((self.grams.get(text[i:i + SEARCH_GRAM], set())
+                               for i in range(len(text) - SEARCH_GRAM + 1)), key=len)
+            positions = {pos for pos in postings[0].intersection(*postings[1:])
+                         if any(text in name for name in self.names[pos])}
+        return sorted(positions, key=lambda pos: (not any(name.startswith(text) for name in self.names[pos]), pos))
 
 class ProfitStatsApp:
     def __init__(self, root, match_folder):
@@ -20,20 +51,18 @@ class ProfitStatsApp:
         self.root.option_add("*Font", self.table_font)
 
     def load_data(self):
-        self.matches_info = self._load_json("matches_info.json")
-        self.exp_variance = self._load_json("expected_profit_variance.json")
-        self.lbb_odds = self._load_json("littleblackbox_odds.json")
+        self.store = match_store.get_store(self.match_folder)
+        self.matches_info = self.store.matches_data
         self.stats_file = os.path.join(self.match_folder, "profit_stats.json")
         self.current_date = datetime(2025, 3, 2)
-
-    def _load_json(self, filename):
-        path = os.path.join(self.match_folder, filename)
-        try:
-            with open(path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            print(f"加载文件 {path} 时出错: {e}")
-            return {}
+        # 最近比赛只在打开窗口时筛选一次，搜索直接查索引
+        self.recent_matches = [m for m in self.matches_info.get("matches", []) if self._is_recent(m["MatchTime"])]
+        self.recent_ids = {m["MatchID"] for m in self.recent_matches}
+        self.search_index = TeamSearchIndex(self.recent_matches)
+        # 每注的统计行和汇总，单注变化时只调整这一注的贡献
+        self.bets = {}
+        self.totals = {"coins": 0.0, "profit": 0.0, "wins": 0, "matches": 0}
+        self.dirty_keys = set()  # coins 输入框修改过、还没有计入 self.bets 的投注
 
     def setup_ui(self):
         main_frame = tk.Frame(self.root)
@@ -92,30 +121,28 @@ class ProfitStatsApp:
         return match_dt and match_dt >= self.current_date - timedelta(days=3)
 
     def _get_kelly(self, match_id, team):
-        profit_data = self.exp_variance.get("profit", [])
-        return next((float(item[f"{team}_Kelly"]) for item in profit_data 
-                    if item["MatchID"] == match_id and item[f"{team}_Kelly"] != "N/A"), 0)
+        item = self.store.get_row("expected_profit_variance", match_id)
+        if item is None or item[f"{team}_Kelly"] == "N/A":
+            return 0
+        return float(item[f"{team}_Kelly"])
 
     def _get_odds(self, match_id, team):
-        odds_data = self.lbb_odds.get("littleblackbox", [])
-        odds = next((float(item[f"{team}_LittleBlackBox_Odds"]) for item in odds_data 
-                    if item["MatchID"] == match_id and item[f"{team}_LittleBlackBox_Odds"] != "N/A"), None)
-        return odds if odds is not None else "N/A"
+        item = self.store.get_row("littleblackbox_odds", match_id)
+        if item is None or item[f"{team}_LittleBlackBox_Odds"] == "N/A":
+            return "N/A"
+        return float(item[f"{team}_LittleBlackBox_Odds"])
 
     def load_existing_data(self):
-        for match in self.matches_info.get("matches", []):
-            if not self._is_recent(match["MatchTime"]):
-                continue
+        for match in self.recent_matches:
             match_id = match["MatchID"]
             for team in ["TeamA", "TeamB"]:
                 kelly = self._get_kelly(match_id, team)
                 if kelly > 0:
                     self._add_match_entry(match, team, kelly)
 
-        stats_data = self._load_json("profit_stats.json")
-        for stat in stats_data.get("stats", []):
-            match = next((m for m in self.matches_info["matches"] if m["MatchID"] == stat["MatchID"]), None)
-            if match and self._is_recent(match["MatchTime"]):
+        for stat in self.store.data["profit_stats"].get("stats", []):
+            match = self.store.get_match(stat["MatchID"])
+            if match and match["MatchID"] in self.recent_ids:
                 team = "TeamA" if stat["Team"] == match["TeamA"] else "TeamB"
                 key = f"{stat['MatchID']}_{team}"
                 if key not in self.match_entries:
@@ -125,6 +152,7 @@ class ProfitStatsApp:
                 entry["coins"].insert(0, str(stat["Coins"]))
                 entry["result"].set(stat["Result"])
                 self._update_radio_style(key)
+                self._update_bet(key)
         self._update_stats_display()
 
     def _add_match_entry(self, match, team, kelly):
@@ -139,37 +167,40 @@ class ProfitStatsApp:
         tk.Label(frame, text=f"{match['MatchTime']} - {team_name} (Kelly: {kelly:.4f}, Odds: {odds})", 
                 font=self.input_font).pack(side=tk.LEFT)
         
-        coins = tk.Entry(frame, width=10, font=self.input_font)
+        coins_var = StringVar()
+        coins_var.trace_add("write", lambda *args: self.dirty_keys.add(key))
+        coins = tk.Entry(frame, width=10, font=self.input_font, textvariable=coins_var)
         coins.pack(side=tk.LEFT)
-        coins.bind("<Return>", lambda e: self.save_and_update())
+        coins.bind("<Return>", lambda e: self.save_and_update(key))
         
         result = StringVar(value="None")
         win = tk.Radiobutton(frame, text="Win", variable=result, value="Win", 
-                           font=self.input_font, command=lambda: self._update_radio_style(key))
+                           font=self.input_font, command=lambda: self._on_result_changed(key))
         lose = tk.Radiobutton(frame, text="Lose", variable=result, value="Lose", 
-                            font=self.input_font, command=lambda: self._update_radio_style(key))
+                            font=self.input_font, command=lambda: self._on_result_changed(key))
         win.pack(side=tk.LEFT)
         lose.pack(side=tk.LEFT)
-        win.bind("<Return>", lambda e: self.save_and_update())
-        lose.bind("<Return>", lambda e: self.save_and_update())
+        win.bind("<Return>", lambda e: self.save_and_update(key))
+        lose.bind("<Return>", lambda e: self.save_and_update(key))
         
         ttk.Button(frame, text="×", command=lambda: self._remove_match(key, frame)).pack(side=tk.RIGHT)
         
         self.match_entries[key] = {"frame": frame, "coins": coins, "result": result, 
                                  "win": win, "lose": lose, "match": match, "team": team}
+        self._update_bet(key)
 
     def _remove_match(self, key, frame):
         frame.destroy()
         del self.match_entries[key]
+        self.dirty_keys.discard(key)
+        self._apply_bet(key, None)
+        self._update_stats_display()
 
     def _update_search(self, event):
-        search_text = self.search_var.get().lower()
         self.search_list.delete(0, tk.END)
-        for match in self.matches_info.get("matches", []):
-            if not self._is_recent(match["MatchTime"]):
-                continue
-            if search_text in match["TeamA"].lower() or (match["TeamB"] and search_text in match["TeamB"].lower()):
-                self.search_list.insert(tk.END, f"{match['MatchTime']} - {match['TeamA']} vs {match['TeamB']}")
+        positions = self.search_index.search(self.search_var.get())
+        if positions:
+            self.search_list.insert(tk.END, *[self.search_index.labels[pos] for pos in positions[:SEARCH_LIMIT]])
 
     def _on_select_match(self, event):
         if self.search_list.curselection():
@@ -184,8 +215,8 @@ class ProfitStatsApp:
         try:
             time, teams = selected.split(" - ", 1)
             team_a, team_b = teams.split(" vs ")
-            match = next((m for m in self.matches_info["matches"] 
-                        if m["MatchTime"] == time and m["TeamA"] == team_a and m["TeamB"] == team_b), None)
+            found = self.store.find(time, team_a)
+            match = found[0] if found and found[0]["TeamA"] == team_a and found[0]["TeamB"] == team_b else None
             if not match:
                 raise ValueError("未找到比赛")
                 
@@ -210,46 +241,66 @@ class ProfitStatsApp:
         entry["lose"].config(font=bold_font if result == "Lose" else normal_font,
                            foreground="red" if result == "Lose" else "black")
 
-    def save_and_update(self):
-        stats = []
-        total_coins = total_profit = wins = matches = 0
-        
-        for key, entry in self.match_entries.items():
-            match_id = key.split("_")[0]
-            coins = float(entry["coins"].get() or 0)
-            result = entry["result"].get()
-            odds = self._get_odds(match_id, entry["team"])
-            profit = (odds * coins if result == "Win" and odds != "N/A" else -coins) if coins > 0 else 0
-            
-            stats.append({
-                "MatchID": match_id,
-                "MatchTime": entry["match"]["MatchTime"],
-                "Team": entry["match"][entry["team"]],
-                "Coins": coins,
-                "Result": result,
-                "Profit": profit
-            })
-            
-            if coins > 0:
-                total_coins += coins
-                total_profit += profit
-                wins += 1 if result == "Win" else 0
-                matches += 1
-                
-        summary = {
-            "TotalCoins": total_coins,
-            "TotalProfit": total_profit,
-            "SuccessRate": wins / matches if matches > 0 else 0
+    def _on_result_changed(self, key):
+        self._update_radio_style(key)
+        self._update_bet(key)
+        self._update_stats_display()
+
+    def _bet_row(self, key):
+        entry = self.match_entries[key]
+        match_id = key.split("_")[0]
+        coins = float(entry["coins"].get() or 0)
+        result = entry["result"].get()
+        odds = self._get_odds(match_id, entry["team"])
+        profit = (odds * coins if result == "Win" and odds != "N/A" else -coins) if coins > 0 else 0
+        return {
+            "MatchID": match_id,
+            "MatchTime": entry["match"]["MatchTime"],
+            "Team": entry["match"][entry["team"]],
+            "Coins": coins,
+            "Result": result,
+            "Profit": profit
         }
-        
-        with open(self.stats_file, 'w', encoding='utf-8') as f:
-            json.dump({"stats": stats, "summary": summary}, f, ensure_ascii=False, indent=2)
-            
+
+    def _apply_bet(self, key, row):
+        """用新的统计行替换旧的（row 为 None 时删除），只调整这一注对汇总的贡献"""
+        for bet, sign in ((self.bets.get(key), -1), (row, 1)):
+            if bet and bet["Coins"] > 0:
+                self.totals["coins"] += sign * bet["Coins"]
+                self.totals["profit"] += sign * bet["Profit"]
+                self.totals["wins"] += sign * (bet["Result"] == "Win")
+                self.totals["matches"] += sign
+        if row is None:
+            self.bets.pop(key, None)
+        else:
+            self.bets[key] = row
+
+    def _update_bet(self, key):
+        self._apply_bet(key, self._bet_row(key))
+        self.dirty_keys.discard(key)
+
+    def summary(self):
+        return {
+            "TotalCoins": self.totals["coins"],
+            "TotalProfit": self.totals["profit"],
+            "SuccessRate": self.totals["wins"] / self.totals["matches"] if self.totals["matches"] > 0 else 0
+        }
+
+    def save_and_update(self, key=None):
+        """保存所有投注：按回车的这一注和其他改过 coins 但还没按回车的投注都重新计算后写入"""
+        if key is not None and key in self.match_entries:
+            self.dirty_keys.add(key)
+        for dirty_key in sorted(self.dirty_keys & self.match_entries.keys()):
+            self._update_bet(dirty_key)
+        self.dirty_keys.clear()
+        with self.store.lock:
+            self.store.data["profit_stats"] = {"stats": list(self.bets.values()), "summary": self.summary()}
+            self.store.reindex()
+            self.store.save(["profit_stats"])
         self._update_stats_display()
 
     def _update_stats_display(self):
-        data = self._load_json("profit_stats.json")
-        s = data.get("summary", {})
+        s = self.summary()
         text = f"统计结果：\n总投入: {s.get('TotalCoins', 0):.2f}\n总收益: {s.get('TotalProfit', 0):.2f}\n" \
               f"成功率: {s.get('SuccessRate', 0):.2%}"
         self.stats_label.config(text=text)
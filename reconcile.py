@@ -0,0 +1,117 @@
+import bisect
+from datetime import datetime
+
+# 比赛对账：每对队伍（TeamA, TeamB）维护一个按开赛时间排序的索引，
+# 新抓取的比赛在时间容差内找到已有比赛时沿用原来的 MatchID（改期只更新 MatchTime），
+# 用 bisect 查找最近的时间，不需要两两比较。
+
+UNKNOWN_TIME = "未知时间"
+DEFAULT_TOLERANCE_MINUTES = 180
+
+
+def time_key(match_time):
+    """把 "MM-DD HH:MM" 转换为一年中的分钟数，无法解析时返回 None"""
+    if not match_time or match_time == UNKNOWN_TIME:
+        return None
+    try:
+        t = datetime.strptime(f"2000-{match_time}", '%Y-%m-%d %H:%M')
+    except ValueError:
+        return None
+    return ((t - datetime(2000, 1, 1)).days * 24 + t.hour) * 60 + t.minute
+
+
+class MatchIndex:
+    def __init__(self, matches, tolerance_minutes=DEFAULT_TOLERANCE_MINUTES):
+        self.matches = matches
+        self.tolerance = tolerance_minutes
+        self.times = {}     # (TeamA, TeamB) -> 按时间排序的 [(分钟数, 在 matches 中的位置)]
+        self.unknown = {}   # (TeamA, TeamB) -> 时间未知的比赛位置
+        self.position = {}  # id(match) -> 在 matches 中的位置
+        self.claimed = set()
+        for pos, match in enumerate(matches):
+            self.position[id(match)] = pos
+            self._insert(pos)
+
+    def _insert(self, pos):
+        match = self.matches[pos]
+        pair = (match["TeamA"], match["TeamB"])
+        key = time_key(match["MatchTime"])
+        if key is None:
+            self.unknown.setdefault(pair, []).append(pos)
+        else:
+            bisect.insort(self.times.setdefault(pair, []), (key, pos))
+
+    def _remove(self, pos):
+        match = self.matches[pos]
+        pair = (match["TeamA"], match["TeamB"])
+        key = time_key(match["MatchTime"])
+        if key is None:
+            self.unknown[pair].remove(pos)
+        else:
+            entries = self.times[pair]
+            del entries[bisect.bisect_left(entries, (key, pos))]
+
+    def find(self, team_a, team_b, match_time):
+        """返回同一对队伍中时间最接近且在容差内、本轮还没有被匹配过的比赛"""
+        pair = (team_a, team_b)
+        key = time_key(match_time)
+        if key is None:
+            for pos in self.unknown.get(pair, []):
+                if pos not in self.claimed:
+                    return self.matches[pos]
+            return None
+        entries = self.times.get(pair, [])
+        lo = bisect.bisect_left(entries, (key - self.tolerance, -1))
+        hi = bisect.bisect_right(entries, (key + self.tolerance, len(self.matches)))
+        candidates = [(abs(entry_key - key), pos) for entry_key, pos in entries[lo:hi] if pos not in self.claimed]
+        return self.matches[min(candidates)[1]] if candidates else None
+
+    def claim(self, match):
+        """标记本轮抓取已经匹配过的比赛，避免同一页上的两场比赛合并到同一个 MatchID"""
+        self.claimed.add(self.position[id(match)])
+
+    def add(self, match):
+        pos = len(self.matches)
+        self.matches.append(match)
+        self.position[id(match)] = pos
+        self._insert(pos)
+        self.claimed.add(pos)
+
+    def move(self, match, new_time):
+        """比赛改期：更新 MatchTime 并调整在索引中的位置"""
+        pos = self.position[id(match)]
+        self._remove(pos)
+        match["MatchTime"] = new_time
+        self._insert(pos)
+
+
+def duplicate_groups(matches, tolerance_minutes=DEFAULT_TOLERANCE_MINUTES):
+    """找出已有数据中同一对队伍、时间在容差内的重复比赛（按时间排序的相邻比较）"""
+    groups = []
+    by_pair = {}
+    for match in matches:
+        key = time_key(match["MatchTime"])
+        if key is not None:
+            by_pair.setdefault((match["TeamA"], match["TeamB"]), []).append((key, match))
+    for entries in by_pair.values():
+        entries.sort(key=lambda e: e[0])
+        group = [entries[0][1]]
+        for (prev_key, _), (key, match) in zip(entries, entries[1:]):
+            if key - prev_key <= tolerance_minutes:
+                group.append(match)
+            else:
+                if len(group) > 1:
+                    groups.append(group)
+                group = [match]
+        if len(group) > 1:
+            groups.append(group)
+    return groups
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+    import match_store
+    folder = sys.argv[1] if len(sys.argv) > 1 else os.path.join("match_data", "esl_pro_league_season_21")
+    for group in duplicate_groups(match_store.get_store(folder).matches):
+        print("可能重复的比赛: " + ", ".join(f"{m['MatchID']} {m['MatchTime']} {m['TeamA']} vs {m['TeamB']}" for m in group))
@@ -0,0 +1,351 @@
+import json
+import os
+import sqlite3
+import match_store
+
+# 所有赛事共用一个 SQLite 文件：比赛、指标、Kelly 分配和投注结果分表保存，按行事务写入。
+# 设置 YBB_STORE=sqlite 后 match_store.get_store 返回 SQLiteMatchStore，各模块的读写都改为读写数据库；
+# 可以从现有的赛事文件夹导入（cli.py store import / migrate），也可以导出回原来的 JSON 文件布局（cli.py store export）。
+
+DB_NAME = "ybb.sqlite3"
+DEFAULT_DB = os.path.join("match_data", DB_NAME)
+
+MATCH_COLUMNS = ["MatchID", "MatchName", "MatchTime", "TeamA", "TeamB", "TeamA_Odds", "TeamB_Odds", "SpecialInfo"]
+
+METRIC_COLUMNS = {
+    "odds_probability": ["TeamA_Odds", "TeamA_Probability", "TeamA_PlatformRake",
+                         "TeamB_Odds", "TeamB_Probability", "TeamB_PlatformRake"],
+    "littleblackbox_odds": ["TeamA_LittleBlackBox_Odds", "TeamA_LittleBlackBox_Rake",
+                            "TeamB_LittleBlackBox_Odds", "TeamB_LittleBlackBox_Rake"],
+    "expected_profit_variance": ["TeamA_Expected_Profit", "TeamA_ProfitVariance", "TeamA_Kelly",
+                                 "TeamB_Expected_Profit", "TeamB_ProfitVariance", "TeamB_Kelly"]
+}
+
+KELLY_COLUMNS = ["MatchID", "Team", "Kelly", "Allocated_Coins", "MatchResult", "Profit"]
+STATS_COLUMNS = ["MatchID", "MatchTime", "Team", "Coins", "Result", "Profit"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    Tournament TEXT NOT NULL,
+    MatchID TEXT NOT NULL,
+    MatchName TEXT,
+    MatchTime TEXT,
+    TeamA TEXT,
+    TeamB TEXT,
+    TeamA_Odds TEXT,
+    TeamB_Odds TEXT,
+    SpecialInfo TEXT,
+    PRIMARY KEY (Tournament, MatchID)
+);
+CREATE INDEX IF NOT EXISTS idx_matches_time ON matches (Tournament, MatchTime);
+CREATE INDEX IF NOT EXISTS idx_matches_team_a ON matches (TeamA);
+CREATE INDEX IF NOT EXISTS idx_matches_team_b ON matches (TeamB);
+
+CREATE TABLE IF NOT EXISTS odds_probability (
+    Tournament TEXT NOT NULL,
+    MatchID TEXT NOT NULL,
+    TeamA_Odds REAL, TeamA_Probability REAL, TeamA_PlatformRake REAL,
+    TeamB_Odds REAL, TeamB_Probability REAL, TeamB_PlatformRake REAL,
+    PRIMARY KEY (Tournament, MatchID)
+);
+
+CREATE TABLE IF NOT EXISTS littleblackbox_odds (
+    Tournament TEXT NOT NULL,
+    MatchID TEXT NOT NULL,
+    TeamA_LittleBlackBox_Odds REAL, TeamA_LittleBlackBox_Rake REAL,
+    TeamB_LittleBlackBox_Odds REAL, TeamB_LittleBlackBox_Rake REAL,
+    PRIMARY KEY (Tournament, MatchID)
+);
+
+CREATE TABLE IF NOT EXISTS expected_profit_variance (
+    Tournament TEXT NOT NULL,
+    MatchID TEXT NOT NULL,
+    TeamA_Expected_Profit REAL, TeamA_ProfitVariance REAL, TeamA_Kelly REAL,
+    TeamB_Expected_Profit REAL, TeamB_ProfitVariance REAL, TeamB_Kelly REAL,
+    PRIMARY KEY (Tournament, MatchID)
+);
+
+CREATE TABLE IF NOT EXISTS kelly (
+    Tournament TEXT NOT NULL,
+    MatchID TEXT NOT NULL,
+    Team TEXT NOT NULL,
+    Kelly REAL,
+    Allocated_Coins TEXT,
+    MatchResult TEXT,
+    Profit TEXT,
+    PRIMARY KEY (Tournament, MatchID, Team)
+);
+
+CREATE TABLE IF NOT EXISTS profit_stats (
+    Tournament TEXT NOT NULL,
+    MatchID TEXT NOT NULL,
+    MatchTime TEXT,
+    Team TEXT NOT NULL,
+    Coins REAL,
+    Result TEXT,
+    Profit REAL,
+    PRIMARY KEY (Tournament, MatchID, Team)
+);
+CREATE INDEX IF NOT EXISTS idx_profit_stats_team ON profit_stats (Team);
+
+CREATE TABLE IF NOT EXISTS versions (
+    Tournament TEXT PRIMARY KEY,
+    Version INTEGER NOT NULL
+);
+"""
+
+# match_store 的数据键 -> (表名, 主键列, 列, 写入时是否把 "N/A" 存为 NULL)
+TABLES = {
+    "matches_info": ("matches", ["MatchID"], MATCH_COLUMNS, False),
+    "kelly": ("kelly", ["MatchID", "Team"], KELLY_COLUMNS, True),
+    "profit_stats": ("profit_stats", ["MatchID", "Team"], STATS_COLUMNS, False)
+}
+for _key, _columns in METRIC_COLUMNS.items():
+    TABLES[_key] = (_key, ["MatchID"], ["MatchID"] + _columns, True)
+
+
+def db_path_for(root):
+    """数据根目录（如 match_data）下的数据库文件"""
+    return os.path.join(root, DB_NAME)
+
+
+def stats_payload(stats):
+    """profit_stats.json 的内容：投注列表和按已下注（Coins > 0）的记录计算的汇总"""
+    placed = [s for s in stats if s["Coins"] and s["Coins"] > 0]
+    wins = sum(1 for s in placed if s["Result"] == "Win")
+    return {"stats": stats, "summary": {
+        "TotalCoins": sum(s["Coins"] for s in placed),
+        "TotalProfit": sum(s["Profit"] or 0 for s in placed),
+        "SuccessRate": wins / len(placed) if placed else 0
+    }}
+
+
+def _to_db(value):
+    return None if value == "N/A" else value
+
+
+def _from_db(value):
+    return "N/A" if value is None else value
+
+
+def _upsert_sql(table, key_columns, columns):
+    all_columns = ["Tournament"] + columns
+    updates = [c for c in columns if c not in key_columns]
+    return (f"INSERT INTO {table} ({', '.join(all_columns)}) VALUES ({', '.join('?' * len(all_columns))}) "
+            f"ON CONFLICT (Tournament, {', '.join(key_columns)}) DO UPDATE SET "
+            + ", ".join(f"{c} = excluded.{c}" for c in updates))
+
+
+class SQLiteStore:
+    def __init__(self, db_path=DEFAULT_DB):
+        self.db_path = db_path
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        # 同一个赛事的读写由 match_store 的文件夹锁串行化，连接可以在抓取线程和界面线程之间共用
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def tournaments(self):
+        return [row[0] for row in self.conn.execute("SELECT DISTINCT Tournament FROM matches ORDER BY Tournament")]
+
+    def upsert_matches(self, tournament, matches):
+        sql = _upsert_sql("matches", ["MatchID"], MATCH_COLUMNS)
+        with self.conn:
+            self.conn.executemany(sql, [[tournament] + [m.get(c) for c in MATCH_COLUMNS] for m in matches])
+
+    def upsert_metric_rows(self, tournament, key, rows):
+        columns = ["MatchID"] + METRIC_COLUMNS[key]
+        sql = _upsert_sql(key, ["MatchID"], columns)
+        with self.conn:
+            self.conn.executemany(sql, [[tournament, row["MatchID"]] + [_to_db(row.get(c, "N/A")) for c in METRIC_COLUMNS[key]]
+                                        for row in rows])
+
+    def upsert_allocations(self, tournament, rows):
+        sql = _upsert_sql("kelly", ["MatchID", "Team"], KELLY_COLUMNS)
+        with self.conn:
+            self.conn.executemany(sql, [[tournament] + [_to_db(row.get(c)) for c in KELLY_COLUMNS] for row in rows])
+
+    def upsert_bet_results(self, tournament, rows):
+        sql = _upsert_sql("profit_stats", ["MatchID", "Team"], STATS_COLUMNS)
+        with self.conn:
+            self.conn.executemany(sql, [[tournament] + [row.get(c) for c in STATS_COLUMNS] for row in rows])
+
+    def version(self, tournament):
+        row = self.conn.execute("SELECT Version FROM versions WHERE Tournament = ?", (tournament,)).fetchone()
+        return row[0] if row else 0
+
+    def _upsert_rows(self, tournament, key, rows):
+        table, key_columns, columns, null_na = TABLES[key]
+        convert = _to_db if null_na else (lambda value: value)
+        self.conn.executemany(_upsert_sql(table, key_columns, columns),
+                              [[tournament] + [convert(row.get(c, "N/A" if null_na else None)) for c in columns]
+                               for row in rows])
+
+    def _delete_rows(self, tournament, key, row_keys):
+        table, key_columns, _, _ = TABLES[key]
+        where = " AND ".join(f"{c} = ?" for c in key_columns)
+        self.conn.executemany(f"DELETE FROM {table} WHERE Tournament = ? AND {where}",
+                              [(tournament,) + tuple(k) for k in row_keys])
+
+    def _bump_version(self, tournament):
+        self.conn.execute("INSERT INTO versions (Tournament, Version) VALUES (?, 1) "
+                          "ON CONFLICT (Tournament) DO UPDATE SET Version = Version + 1", (tournament,))
+
+    def write_rows(self, tournament, changes):
+        """在一个事务中只写入有变化的行：{数据键: (要更新或插入的行, 要删除的主键)}，并递增版本号"""
+        with self.conn:
+            for key, (rows, deleted) in changes.items():
+                if deleted:
+                    self._delete_rows(tournament, key, deleted)
+                if rows:
+                    self._upsert_rows(tournament, key, rows)
+            self._bump_version(tournament)
+
+    def replace_rows(self, tournament, payloads):
+        """在一个事务中把 {数据键: 行列表} 写成该赛事的全部内容：删除不再存在的行，其余按主键更新或插入，并递增版本号。
+        用于导入和迁移；日常保存用 write_rows 只写有变化的行"""
+        with self.conn:
+            for key, rows in payloads.items():
+                table, key_columns, _, _ = TABLES[key]
+                keep = {tuple(row[c] for c in key_columns) for row in rows}
+                existing = self.conn.execute(f"SELECT {', '.join(key_columns)} FROM {table} WHERE Tournament = ?",
+                                             (tournament,)).fetchall()
+                stale = [tuple(row) for row in existing if tuple(row) not in keep]
+                if stale:
+                    self._delete_rows(tournament, key, stale)
+                self._upsert_rows(tournament, key, rows)
+            self._bump_version(tournament)
+
+    def get_matches(self, tournament):
+        rows = self.conn.execute("SELECT * FROM matches WHERE Tournament = ? ORDER BY rowid", (tournament,))
+        matches = []
+        for row in rows:
+            match = {c: row[c] for c in MATCH_COLUMNS if c != "SpecialInfo"}
+            if row["SpecialInfo"]:
+                match["SpecialInfo"] = row["SpecialInfo"]
+            matches.append(match)
+        return matches
+
+    def get_metric_rows(self, tournament, key):
+        rows = self.conn.execute(f"SELECT * FROM {key} WHERE Tournament = ? ORDER BY rowid", (tournament,))
+        result = []
+        for row in rows:
+            item = {"MatchID": row["MatchID"]}
+            for c in METRIC_COLUMNS[key]:
+                value = _from_db(row[c])
+                # Kelly 被截断为 0 时保持与 JSON 文件一致的整数 0
+                item[c] = 0 if c.endswith("_Kelly") and value == 0 else value
+            result.append(item)
+        return result
+
+    def get_allocations(self, tournament):
+        rows = self.conn.execute("SELECT * FROM kelly WHERE Tournament = ? ORDER BY rowid", (tournament,))
+        return [{c: _from_db(row[c]) for c in KELLY_COLUMNS} for row in rows]
+
+    def get_bet_results(self, tournament):
+        rows = self.conn.execute("SELECT * FROM profit_stats WHERE Tournament = ? ORDER BY rowid", (tournament,))
+        return [{c: row[c] for c in STATS_COLUMNS} for row in rows]
+
+    def team_history(self, team):
+        """跨赛事查询某支队伍的所有投注记录"""
+        rows = self.conn.execute(
+            "SELECT Tournament, MatchID, MatchTime, Coins, Result, Profit FROM profit_stats "
+            "WHERE Team = ? ORDER BY Tournament, MatchTime", (team,))
+        return [dict(row) for row in rows]
+
+    def import_folder(self, match_folder, tournament=None):
+        tournament = tournament or os.path.basename(os.path.normpath(match_folder))
+        store = match_store.MatchStore(match_folder)
+        # 导入时整体替换该赛事的内容，数据库中多出来的行一并删除
+        payloads = {"matches_info": store.matches}
+        for key in match_store.RESULT_FILES:
+            payloads[key] = store.data[key][match_store.RESULT_FILES[key][1]]
+        self.replace_rows(tournament, payloads)
+        print(f"已导入 {match_folder} -> {self.db_path} ({len(store.matches)} 场比赛)")
+        return tournament
+
+    def import_all(self, root="match_data"):
+        imported = []
+        for name in sorted(os.listdir(root)):
+            folder = os.path.join(root, name)
+            if os.path.exists(os.path.join(folder, match_store.MATCHES_FILE)):
+                imported.append(self.import_folder(folder, name))
+        return imported
+
+    def export_folder(self, tournament, match_folder):
+        os.makedirs(match_folder, exist_ok=True)
+        payloads = {
+            "matches_info": {"matches": self.get_matches(tournament)},
+            "kelly": {"kelly": self.get_allocations(tournament)}
+        }
+        for key in match_store.METRIC_FILES:
+            payloads[key] = {match_store.RESULT_FILES[key][1]: self.get_metric_rows(tournament, key)}
+
+        stats = self.get_bet_results(tournament)
+        if stats:
+            payloads["profit_stats"] = stats_payload(stats)
+
+        for key, payload in payloads.items():
+            filename = match_store.MATCHES_FILE if key == "matches_info" else match_store.RESULT_FILES[key][0]
+            with open(os.path.join(match_folder, filename), 'w', encoding='utf-8') as f:
+                json.dump(payload, f, ensure_ascii=False, indent=2)
+        print(f"已导出 {tournament} -> {match_folder}")
+
+
+
+class SQLiteMatchStore(match_store.MatchStore):
+    """与 MatchStore 接口相同，数据来自数据库中与文件夹同名的赛事；save() 只在一个事务中写回有变化的表"""
+    def __init__(self, match_folder, db_path=None):
+        self.tournament = os.path.basename(os.path.normpath(match_folder))
+        self.db = SQLiteStore(db_path or db_path_for(os.path.dirname(os.path.normpath(match_folder))))
+        super().__init__(match_folder)
+
+    def _mtimes(self):
+        return self.db.version(self.tournament)
+
+    def reload(self):
+        t = self.tournament
+        self.matches_data = {"matches": self.db.get_matches(t)}
+        self.data = {key: {match_store.RESULT_FILES[key][1]: self.db.get_metric_rows(t, key)}
+                     for key in match_store.METRIC_FILES}
+        self.data["kelly"] = {"kelly": self.db.get_allocations(t)}
+        self.data["profit_stats"] = stats_payload(self.db.get_bet_results(t))
+        self.reset_tracking()
+        self.reindex()
+        self.modified = set()
+        self.mtimes = self._mtimes()
+
+    def save(self, keys=None):
+        """只写回自上次保存以来新增、修改（upsert_row / mark_dirty / reindex 发现的）和删除的行"""
+        if keys is None:
+            keys = [key for key in match_store.DATA_KEYS if self.dirty[key] or self.deleted[key]]
+        row_maps = self.row_maps()
+        changes = {}
+        for key in keys:
+            rows = [row_maps[key][pk] for pk in self.dirty[key] if pk in row_maps[key]]
+            deleted = [pk if isinstance(pk, tuple) else (pk,) for pk in self.deleted[key]]
+            if rows or deleted:
+                changes[key] = (rows, deleted)
+        if changes:
+            self.db.write_rows(self.tournament, changes)
+        self.modified.difference_update(keys)
+        self.mark_saved(keys)
+        self.mtimes = self._mtimes()
+
+
+if __name__ == "__main__":
+    with SQLiteStore() as db:
+        db.import_all()
+        print(f"数据库中的赛事: {db.tournaments()}")
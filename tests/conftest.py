@@ -0,0 +1,35 @@
+import os
+import shutil
+import sys
+import pytest
+
+# 测试从仓库根目录导入模块；需要赛事数据的测试在临时目录中使用 match_data 的副本，不会改动仓库里的文件。
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import match_store
+
+TOURNAMENT = "esl_pro_league_season_21"
+
+
+@pytest.fixture(autouse=True)
+def fresh_stores(monkeypatch):
+    # 共享的 MatchStore 按相对路径缓存，每个测试重新开始并使用默认的 JSON 后端
+    monkeypatch.delenv(match_store.STORE_ENV, raising=False)
+    match_store._stores.clear()
+    yield
+    match_store._stores.clear()
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """切换到临时目录，并复制一份 match_data"""
+    shutil.copytree(os.path.join(ROOT, "match_data"), tmp_path / "match_data")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def match_folder(workdir):
+    return os.path.join("match_data", TOURNAMENT)
@@ -0,0 +1,43 @@
+import change_feed
+import match_store
+
+
+def match(match_id, odds_a="1.5", odds_b="2.5"):
+    return {"MatchID": match_id, "MatchTime": "03-02 12:00", "TeamA": "A", "TeamB": "B",
+            "TeamA_Odds": odds_a, "TeamB_Odds": odds_b}
+
+
+def test_diff_matches_new_and_changed():
+    previous = {"0001": ("1.5", "2.5"), "0002": ("1.5", "2.5")}
+    changes = change_feed.diff_matches(previous, [match("0001"), match("0002", "1.6"), match("0003")])
+    assert [c["MatchID"] for c in changes["new"]] == ["0003"]
+    assert changes["changed"] == [{"MatchID": "0002", "MatchTime": "03-02 12:00", "TeamA": "A", "TeamB": "B",
+                                   "new_odds": ["1.6", "2.5"], "old_odds": ["1.5", "2.5"]}]
+    assert changes["removed"] == []
+    assert change_feed.affected_ids(changes) == ["0003", "0002"]
+
+
+def test_removed_only_for_previous_page_and_unsettled():
+    previous = {"0001": ("1.5", "2.5"), "0002": ("1.5", "2.5"), "0003": ("1.5", "2.5"), "0004": ("1.5", "2.5")}
+    changes = change_feed.diff_matches(previous, [match("0001")], previous_page=["0001", "0002", "0003"],
+                                       settled={"0003"})
+    # 0004 上次就不在页面上，0003 已有赛果
+    assert changes["removed"] == [{"MatchID": "0002", "old_odds": ["1.5", "2.5"]}]
+
+
+def test_removed_is_reported_once(match_folder):
+    store = match_store.get_store(match_folder)
+    open_ids = [m["MatchID"] for m in store.matches if m["MatchID"] in ("0003", "0004")]
+    page = [dict(m) for m in store.matches if m["MatchID"] in open_ids]
+    odds = change_feed.odds_snapshot(store.matches)
+
+    first = change_feed.page_changes(match_folder, odds, page)
+    change_feed.save_changes(match_folder, first)
+    assert first["removed"] == [] and first["page"] == open_ids
+
+    second = change_feed.page_changes(match_folder, odds, page[:1])
+    change_feed.save_changes(match_folder, second)
+    assert [c["MatchID"] for c in second["removed"]] == open_ids[1:]
+
+    third = change_feed.page_changes(match_folder, odds, page[:1])
+    assert third["removed"] == []
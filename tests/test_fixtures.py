@@ -0,0 +1,68 @@
+import copy
+import os
+import urllib.request
+import fetch_odds
+import fixtures
+import match_store
+
+URL = "https://cyber-ggbet.com/cn/esports/tournament/test-cup-2025"
+COMPLETE = {"titles": ["FlyQuest", "Lynn Vision Gaming", "Heroic", "Housebets"],
+            "results": ["1.44", "2.74", "-", "25"],
+            "times": [["17:30", "3月 2"], ["20:00", "3月 2"]], "bo": False}
+
+
+def record_session(root):
+    # 第一次提取时第二场比赛的时间还没有渲染出来
+    incomplete = copy.deepcopy(COMPLETE)
+    incomplete["times"] = incomplete["times"][:1]
+    recorder = fixtures.FixtureRecorder(str(root))
+    recorder.save(URL, 1, incomplete, "script", html="<html></html>")
+    recorder.save(URL, 2, COMPLETE, "script")
+    return fixtures.find_sessions(str(root))[0]
+
+
+def test_load_session_orders_attempts(tmp_path):
+    attempts = fixtures.load_session(record_session(tmp_path / "fx"))
+    assert [a["attempt"] for a in attempts] == [1, 2]
+    assert attempts[0]["html"] == "<html></html>" and attempts[1]["html"] is None
+    assert attempts[1]["page_data"] == COMPLETE
+
+
+def test_parse_and_merge_uses_first_complete_attempt(tmp_path):
+    attempts = fixtures.load_session(record_session(tmp_path / "fx"))
+    n, (merged, fetched, new) = fixtures.parse_and_merge(attempts, [], "test_cup")
+    assert n == 2
+    assert [(m["MatchID"], m["MatchTime"], m["TeamA"], m["TeamB"]) for m in merged] == [
+        ("0001", "03-02 17:30", "FlyQuest", "Lynn Vision Gaming"),
+        ("0002", "03-02 20:00", "Heroic", "Housebets")]
+    assert merged[1]["TeamA_Odds"] == "1.0417"
+    assert len(fetched) == len(new) == 2
+
+
+def test_parse_and_merge_gives_up_when_never_complete(tmp_path):
+    attempts = fixtures.load_session(record_session(tmp_path / "fx"))[:1]
+    assert fixtures.parse_and_merge(attempts, [], "test_cup") == (1, None)
+
+
+def test_replay_retries_incomplete_page_and_saves(tmp_path, monkeypatch):
+    session = record_session(tmp_path / "fx")
+    monkeypatch.chdir(tmp_path)
+
+    status, filename = fixtures.replay(session)
+
+    match_folder = os.path.join("match_data", fetch_odds.extract_match_name(URL))
+    assert status == 0
+    assert os.path.normpath(filename) == os.path.join(match_folder, match_store.MATCHES_FILE)
+    matches = match_store.get_store(match_folder).matches
+    assert [m["TeamA"] for m in matches] == ["FlyQuest", "Heroic"]
+
+    # 再回放一次只更新赔率，不新增比赛
+    assert fixtures.replay(session)[0] == 0
+    assert len(match_store.get_store(match_folder).matches) == 2
+
+
+def test_fixture_server_serves_recorded_html(tmp_path):
+    (tmp_path / "page.html").write_text("<html>赔率</html>", encoding="utf-8")
+    with fixtures.FixtureServer(str(tmp_path)) as server:
+        with urllib.request.urlopen(server.url_for(str(tmp_path / "page.html")), timeout=5) as response:
+            assert response.read().decode("utf-8") == "<html>赔率</html>"
@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+import kelly_processor
+import match_store
+
+
+def expected_log_growth(stakes, probs, odds, bankroll):
+    returns, weights = kelly_processor._scenarios(np.asarray(probs), np.asarray(odds), 0, 0)
+    return float(weights @ np.log(1 + returns @ (np.asarray(stakes) / bankroll)))
+
+
+def test_single_bet_is_classic_kelly():
+    # f* = (p*b - (1 - p)) / b
+    stakes = kelly_processor.allocate_portfolio([0.6], [1.0], 1000, cap=10000)
+    assert stakes[0] == pytest.approx(200, abs=0.01)
+
+
+def test_two_independent_bets_are_solved_jointly():
+    # 两注同时下注时的最优比例小于各自单独的 Kelly 比例 0.4：解 0.49/(1+2f) = 0.09/(1-2f) 得 f = 0.3448
+    stakes = kelly_processor.allocate_portfolio([0.7, 0.7], [1.0, 1.0], 1000, cap=10000)
+    assert stakes == pytest.approx([344.83, 344.83], abs=0.01)
+    for delta in (-5, 5):
+        assert expected_log_growth(stakes + delta, [0.7, 0.7], [1.0, 1.0], 1000) < \
+            expected_log_growth(stakes, [0.7, 0.7], [1.0, 1.0], 1000)
+
+
+def test_fraction_scales_full_kelly():
+    full = kelly_processor.allocate_portfolio([0.7, 0.7], [1.0, 1.0], 1000, cap=10000)
+    half = kelly_processor.allocate_portfolio([0.7, 0.7], [1.0, 1.0], 1000, fraction=0.5, cap=10000)
+    assert half == pytest.approx(full / 2, abs=0.01)
+
+
+def test_cap_and_budget_are_respected():
+    probs, odds = [0.8, 0.75, 0.7], [1.0, 1.2, 1.5]
+    capped = kelly_processor.allocate_portfolio(probs, odds, 1000, cap=100)
+    assert np.all(capped <= 100 + 1e-6)
+    assert capped == pytest.approx([100, 100, 100], abs=0.01)
+
+    limited = kelly_processor.allocate_portfolio(probs, odds, 200, bankroll=1000, cap=10000)
+    assert limited.sum() == pytest.approx(200, abs=0.01)
+    assert np.all(limited >= 0)
+
+
+def test_negative_edge_gets_nothing():
+    stakes = kelly_processor.allocate_portfolio([0.4, 0.7], [1.0, 1.0], 1000, cap=10000)
+    assert stakes[0] == 0
+    assert stakes[1] == pytest.approx(400, abs=0.01)
+    assert kelly_processor.allocate_portfolio([], [], 1000).shape == (0,)
+
+
+def test_sampled_scenarios_keep_wealth_positive():
+    n = kelly_processor.ENUMERATE_LIMIT + 4
+    probs, odds = np.full(n, 0.9), np.full(n, 1.0)
+    stakes = kelly_processor.allocate_portfolio(probs, odds, 1000, cap=10000, samples=2000)
+    assert np.all(stakes >= 0)
+    # 全输时财富仍为正
+    assert stakes.sum() < 1000
+    again = kelly_processor.allocate_portfolio(probs, odds, 1000, cap=10000, samples=2000)
+    assert np.array_equal(stakes, again)
+
+
+def test_allocate_skips_settled_matches_and_keeps_rows(match_folder):
+    store = match_store.get_store(match_folder)
+    before = {(row["MatchID"], row["Team"]): dict(row) for row in store.data["kelly"]["kelly"]}
+    settled = kelly_processor.settled_match_ids(store)
+    assert settled == {"0000", "0001", "0002", "0005", "0007"}
+
+    rows = kelly_processor.allocate(match_folder, 1000)
+
+    assert [(row["MatchID"], row["Team"]) for row in rows] == [("0006", "TeamB")]
+    store = match_store.get_store(match_folder)
+    after = {(row["MatchID"], row["Team"]): row for row in store.data["kelly"]["kelly"]}
+    for key, row in before.items():
+        assert after[key] == row
+    assert float(after[("0006", "TeamB")]["Allocated_Coins"]) > 0
+
+
+def test_allocate_updates_existing_row_in_place(match_folder):
+    store = match_store.get_store(match_folder)
+    store.data["profit_stats"]["stats"] = [row for row in store.data["profit_stats"]["stats"] if row["MatchID"] != "0001"]
+    store.save(["profit_stats"])
+    count = len(store.data["kelly"]["kelly"])
+
+    rows = kelly_processor.allocate(match_folder, 1000)
+
+    assert ("0001", "TeamA") in {(row["MatchID"], row["Team"]) for row in rows}
+    store = match_store.get_store(match_folder)
+    assert len(store.data["kelly"]["kelly"]) == count + 1
+    assert store.kelly_rows[("0001", "TeamA")]["Allocated_Coins"] != "0.00"
+
+
+def test_allocate_clears_rows_that_are_no_longer_candidates(match_folder):
+    store = match_store.get_store(match_folder)
+    assert float(kelly_processor.allocate(match_folder, 1000)[0]["Allocated_Coins"]) > 0
+    # 0006 的 Kelly 降为 0 后不再是候选，之前的分配要清零，已结算的行不变
+    for team in match_store.TEAM_SIDES:
+        store.get_row("expected_profit_variance", "0006")[f"{team}_Kelly"] = 0
+    settled_before = {key: dict(row) for key, row in store.kelly_rows.items() if key[0] != "0006"}
+
+    assert kelly_processor.allocate(match_folder, 1000) == []
+
+    store = match_store.get_store(match_folder)
+    assert store.kelly_rows[("0006", "TeamB")]["Allocated_Coins"] == "0.00"
+    for key, row in settled_before.items():
+        assert store.kelly_rows[key] == row
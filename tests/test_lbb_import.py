@@ -0,0 +1,46 @@
+import pytest
+import lbb_import
+import match_store
+
+
+def test_parse_json_object():
+    text = '{"03-02 20:00_Heroic": 0.17, "03-02 20:00_Housebets": "4.79"}'
+    assert lbb_import.parse_lbb_text(text) == {"03-02 20:00_Heroic": 0.17, "03-02 20:00_Housebets": 4.79}
+
+
+def test_parse_pasted_lines():
+    text = """
+    {
+      "03-02 17:30_Team 3DMAX": 0.28,
+      03-02 17:30_Wildcard = 2.94
+      03-02 20:00_Heroic 0.2
+      not a line
+    }
+    """
+    assert lbb_import.parse_lbb_text(text) == {
+        "03-02 17:30_Team 3DMAX": 0.28,
+        "03-02 17:30_Wildcard": 2.94,
+        "03-02 20:00_Heroic": 0.2
+    }
+
+
+def test_parse_broken_json_falls_back_to_lines():
+    text = '{\n"03-02 20:00_Heroic": 0.17,\n"03-02 20:00_Housebets": 4.79,\n}'
+    assert lbb_import.parse_lbb_text(text) == {"03-02 20:00_Heroic": 0.17, "03-02 20:00_Housebets": 4.79}
+
+
+def test_apply_lbb_odds_updates_and_recomputes(match_folder):
+    store = match_store.get_store(match_folder)
+    match = store.get_match("0002")
+    key_a = f"{match['MatchTime']}_{match['TeamA']}"
+    key_b = f"{match['MatchTime']}_{match['TeamB']}"
+
+    report = lbb_import.apply_lbb_odds(match_folder, {key_a: 0.3, key_b: 3.0, "01-01 00:00_Nobody": 1.0})
+
+    assert report == {"updated": ["0002"], "unmatched": ["01-01 00:00_Nobody"]}
+    store = match_store.get_store(match_folder)
+    row = store.get_row("littleblackbox_odds", "0002")
+    assert row["TeamA_LittleBlackBox_Odds"] == 0.3 and row["TeamB_LittleBlackBox_Odds"] == 3.0
+    # 期望收益用盘口（TeamA 1.0417 / TeamB 25）去抽成后的胜率和新的小黑盒赔率计算
+    prob_a = (1 / 2.0417) / (1 / 2.0417 + 1 / 26)
+    assert store.get_row("expected_profit_variance", "0002")["TeamA_Expected_Profit"] == pytest.approx(1.3 * prob_a - 1)
@@ -0,0 +1,102 @@
+import math
+import numpy as np
+import pytest
+import data_processor
+import match_store
+import metrics_engine
+
+# metrics_engine 的向量化计算要与逐队计算的 data_processor.calculate_team_metrics 结果一致。
+
+CASES = [
+    # (TeamA 盘口, TeamB 盘口, TeamA 小黑盒, TeamB 小黑盒)
+    ("1.44", "2.74", 0.53, 1.53),
+    ("1.02", "14.24", 0.28, 2.94),
+    ("-", "25", 0.17, 4.79),
+    ("0.8", "0.9", 3.0, 0.1),
+    ("1.5", "N/A", 0.5, 1.2),
+    ("1.5", "2.5", None, 1.2),
+]
+
+
+def baseline(odds_a, odds_b, lbb_a, lbb_b):
+    teams = [{"Team": "A", "Odds": odds_a}, {"Team": "B", "Odds": odds_b}]
+    a = data_processor.calculate_team_metrics("A", odds_a, lbb_a, {"team": "B", "lbb_odds": lbb_b}, teams)
+    b = data_processor.calculate_team_metrics("B", odds_b, lbb_b, {"team": "A", "lbb_odds": lbb_a}, teams)
+    return a, b
+
+
+def assert_same(actual, expected):
+    if expected == "N/A":
+        assert math.isnan(actual)
+    else:
+        assert actual == pytest.approx(expected, rel=1e-12, abs=1e-12)
+
+
+@pytest.mark.parametrize("odds_a, odds_b, lbb_a, lbb_b", CASES)
+def test_compute_metrics_matches_calculate_team_metrics(odds_a, odds_b, lbb_a, lbb_b):
+    metrics = metrics_engine.compute_metrics(
+        metrics_engine.to_array([odds_a]), metrics_engine.to_array([odds_b]),
+        metrics_engine.to_array(["N/A" if lbb_a is None else lbb_a]),
+        metrics_engine.to_array(["N/A" if lbb_b is None else lbb_b]))
+    expected_a, expected_b = baseline(odds_a, odds_b, lbb_a, lbb_b)
+    for team, expected in (("TeamA", expected_a), ("TeamB", expected_b)):
+        assert_same(metrics[f"{team}_Expected_Profit"][0], expected["Expected_Profit"])
+        assert_same(metrics[f"{team}_ProfitVariance"][0], expected["ProfitVariance"])
+        assert_same(metrics[f"{team}_Kelly"][0], expected["Kelly"])
+        if expected["Probability"] != "N/A":
+            assert_same(metrics[f"{team}_Probability"][0], expected["Probability"])
+    rake = metrics["LittleBlackBox_Rake"][0]
+    assert_same(round(rake, 5) if not np.isnan(rake) else rake, expected_a["LittleBlackBox_Rake"])
+
+
+def test_parse_odds_special_values():
+    assert metrics_engine.parse_odds("25") == 25.0
+    assert metrics_engine.parse_odds("-") == 1.0417
+    assert metrics_engine.parse_odds("2.5") == 2.5
+    for value in ("N/A", "", None, "abc"):
+        assert math.isnan(metrics_engine.parse_odds(value))
+
+
+def test_to_records_writes_na_and_integer_zero_kelly():
+    data = {"MatchID": ["0001", "0002"],
+            "TeamA_Odds": np.array([1.44, np.nan]), "TeamB_Odds": np.array([2.74, 1.2]),
+            "TeamA_LittleBlackBox_Odds": np.array([0.53, 0.5]), "TeamB_LittleBlackBox_Odds": np.array([1.53, np.nan])}
+    metrics = metrics_engine.compute_metrics(data["TeamA_Odds"], data["TeamB_Odds"],
+                                             data["TeamA_LittleBlackBox_Odds"], data["TeamB_LittleBlackBox_Odds"])
+    records = metrics_engine.to_records(data, metrics)
+
+    profit = records["expected_profit_variance"]
+    assert profit[0]["TeamA_Kelly"] == 0 and isinstance(profit[0]["TeamA_Kelly"], int)
+    assert profit[1]["TeamA_Expected_Profit"] == "N/A"
+    assert records["littleblackbox_odds"][1]["TeamB_LittleBlackBox_Odds"] == "N/A"
+    assert records["odds_probability"][0]["TeamA_PlatformRake"] == 0.04885
+    assert records["odds_probability"][1]["TeamA_Odds"] == "N/A"
+
+
+def test_recompute_folder_reproduces_saved_results(match_folder):
+    store = match_store.get_store(match_folder)
+    saved = {key: {row["MatchID"]: dict(row) for row in store.data[key][match_store.RESULT_FILES[key][1]]}
+             for key in match_store.METRIC_FILES}
+
+    assert metrics_engine.recompute_folder(match_folder) == len(store.matches)
+
+    store = match_store.get_store(match_folder)
+    for key in match_store.METRIC_FILES:
+        for match_id, expected in saved[key].items():
+            actual = store.get_row(key, match_id)
+            for field, value in expected.items():
+                if isinstance(value, float):
+                    assert actual[field] == pytest.approx(value, rel=1e-9)
+                else:
+                    assert actual[field] == value
+
+
+def test_recompute_folder_only_touches_requested_matches(match_folder):
+    store = match_store.get_store(match_folder)
+    store.get_row("expected_profit_variance", "0001")["TeamA_Kelly"] = "stale"
+    store.get_row("expected_profit_variance", "0002")["TeamA_Kelly"] = "stale"
+
+    assert metrics_engine.recompute_folder(match_folder, ["0001"]) == 1
+
+    assert store.get_row("expected_profit_variance", "0001")["TeamA_Kelly"] == pytest.approx(0.4649892401920215)
+    assert store.get_row("expected_profit_variance", "0002")["TeamA_Kelly"] == "stale"
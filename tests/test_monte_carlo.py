@@ -0,0 +1,25 @@
+import pytest
+import kelly_processor
+import match_store
+import monte_carlo
+
+
+def test_load_bets_skips_settled_and_zero_allocations(match_folder):
+    store = match_store.get_store(match_folder)
+    store.kelly_rows[("0002", "TeamA")]["Allocated_Coins"] = "3000.00"
+    kelly_processor.allocate(match_folder, 1000)
+
+    bets = monte_carlo.load_bets(match_folder)
+
+    # 0002 已有赛果，其余已结算的行分配为 0；只剩 allocate 给出的 0006
+    assert [(bet["MatchID"], bet["Team"]) for bet in bets] == [("0006", "TeamB")]
+    assert bets[0]["Stake"] == float(store.kelly_rows[("0006", "TeamB")]["Allocated_Coins"])
+
+
+def test_compare_fractions_uses_unsettled_candidates(match_folder):
+    rows = kelly_processor.allocate(match_folder, 25000, save=False)
+    results = monte_carlo.compare_fractions(match_folder, 25000, fractions=[1.0, 0.5], paths=200, workers=1)
+
+    # 与 allocate 使用同一批盘口：已结算的比赛不参与
+    assert results[0]["total_stake"] == pytest.approx(sum(float(row["Allocated_Coins"]) for row in rows), abs=0.01)
+    assert results[1]["total_stake"] == pytest.approx(results[0]["total_stake"] / 2, abs=0.01)
@@ -0,0 +1,89 @@
+import math
+import numpy as np
+import odds_history
+
+
+def test_record_layout_is_fixed_width_little_endian():
+    assert odds_history.RECORD_DTYPE.itemsize == 20
+    assert odds_history.RECORD_DTYPE.names == ("timestamp", "match_id", "odds_a", "odds_b")
+
+
+def test_append_and_read_back(tmp_path):
+    folder = str(tmp_path)
+    first = [{"MatchID": "0002", "TeamA_Odds": "1.5", "TeamB_Odds": "2.5"},
+             {"MatchID": "0001", "TeamA_Odds": "-", "TeamB_Odds": "N/A"}]
+    assert odds_history.append_snapshot(folder, first, timestamp=100.0) == 2
+    assert odds_history.append_snapshot(folder, [{"MatchID": "0002", "TeamA_Odds": "1.6", "TeamB_Odds": "2.4"}],
+                                        timestamp=200.0) == 1
+
+    raw = (tmp_path / odds_history.HISTORY_FILE).read_bytes()
+    assert len(raw) == 3 * odds_history.RECORD_DTYPE.itemsize
+    first_record = np.frombuffer(raw[:odds_history.RECORD_DTYPE.itemsize], dtype=odds_history.RECORD_DTYPE)[0]
+    assert first_record["timestamp"] == 100.0 and first_record["match_id"] == 2
+
+    history = odds_history.OddsHistory(folder)
+    assert len(history) == 3
+    assert list(history.match_ids()) == [1, 2]
+    assert list(history.snapshot_times()) == [100.0, 200.0]
+
+    rows = history.match_history("0002")
+    assert list(rows["timestamp"]) == [100.0, 200.0]
+    assert list(rows["odds_a"]) == [np.float32(1.5), np.float32(1.6)]
+
+    single = history.match_history(1)[0]
+    assert single["odds_a"] == np.float32(1.0417)
+    assert math.isnan(single["odds_b"])
+    assert len(history.match_history(99)) == 0
+
+
+def test_missing_or_truncated_file(tmp_path):
+    assert len(odds_history.OddsHistory(str(tmp_path))) == 0
+    (tmp_path / odds_history.HISTORY_FILE).write_bytes(b"\0" * (odds_history.RECORD_DTYPE.itemsize - 1))
+    assert len(odds_history.OddsHistory(str(tmp_path))) == 0
+
+
+def snapshot(match_ids, odds):
+    return [{"MatchID": f"{m:04d}", "TeamA_Odds": str(odds), "TeamB_Odds": "2.0"} for m in match_ids]
+
+
+def test_index_is_kept_sorted_on_append(tmp_path, monkeypatch):
+    folder = str(tmp_path)
+    odds_history.append_snapshot(folder, snapshot([3, 1, 2], 1.1), timestamp=1.0)
+    odds_history.append_snapshot(folder, snapshot([2, 3], 1.2), timestamp=2.0)
+    odds_history.append_snapshot(folder, snapshot([1, 3, 4], 1.3), timestamp=3.0)
+
+    index = np.fromfile(tmp_path / odds_history.INDEX_FILE, dtype=odds_history.INDEX_DTYPE)
+    assert list(index["match_id"]) == [1, 1, 2, 2, 3, 3, 3, 4]
+    assert list(index["position"]) == [1, 5, 2, 3, 0, 4, 6, 7]
+
+    # 有索引时读取不再对历史记录排序
+    monkeypatch.setattr(np, "argsort", None)
+    history = odds_history.OddsHistory(folder)
+    assert list(history.match_history(3)["timestamp"]) == [1.0, 2.0, 3.0]
+    assert list(history.match_history(3)["odds_a"]) == [np.float32(1.1), np.float32(1.2), np.float32(1.3)]
+    assert list(history.match_ids()) == [1, 2, 3, 4]
+
+
+def test_history_without_index_is_indexed_once(tmp_path):
+    folder = str(tmp_path)
+    odds_history.append_snapshot(folder, snapshot([2, 1], 1.1), timestamp=1.0)
+    odds_history.append_snapshot(folder, snapshot([1], 1.2), timestamp=2.0)
+    # 旧版本写的历史文件没有索引
+    (tmp_path / odds_history.INDEX_FILE).unlink()
+
+    history = odds_history.OddsHistory(folder)
+    assert list(history.match_history(1)["timestamp"]) == [1.0, 2.0]
+    assert (tmp_path / odds_history.INDEX_FILE).stat().st_size == 3 * odds_history.INDEX_DTYPE.itemsize
+
+
+def test_stale_index_is_rebuilt_on_append(tmp_path):
+    folder = str(tmp_path)
+    odds_history.append_snapshot(folder, snapshot([2, 1], 1.1), timestamp=1.0)
+    # 写入记录后、写索引之前中断：索引少了最后一次追加
+    with open(tmp_path / odds_history.HISTORY_FILE, 'ab') as f:
+        np.array([(1.5, 2, 1.0, 2.0)], dtype=odds_history.RECORD_DTYPE).tofile(f)
+
+    odds_history.append_snapshot(folder, snapshot([2], 1.2), timestamp=2.0)
+
+    history = odds_history.OddsHistory(folder)
+    assert list(history.match_history(2)["timestamp"]) == [1.0, 1.5, 2.0]
@@ -0,0 +1,45 @@
+import page_parser
+
+
+def button(team, odds):
+    return (f'<button data-test="odd-button"><span data-test="odd-button__title"> {team} </span>'
+            f'<span data-test="odd-button__result">{odds}</span></button>')
+
+
+def time_div(time, date):
+    return f'<div class="text-sm text-grey-500 opacity-100"><div>{time}</div><div>{date}</div></div>'
+
+
+PAGE = ("<html><head><script>var x = '<div data-test=\"odd-button__title\">no</div>';</script></head><body>"
+        + time_div("17:30", "3月 2") + button("FlyQuest", "1.44") + button("Lynn Vision Gaming", "2.74")
+        + time_div("20:00", "今天") + button("Heroic", "-") + button("Housebets &amp; Co", "25")
+        + "<img data-test=\"odd-button-icon\"></body></html>")
+
+
+def test_extract_from_html():
+    data = page_parser.extract_from_html(PAGE)
+    assert data == {"titles": ["FlyQuest", "Lynn Vision Gaming", "Heroic", "Housebets & Co"],
+                    "results": ["1.44", "2.74", "-", "25"],
+                    "times": [["17:30", "3月 2"], ["20:00", "今天"]],
+                    "bo": False}
+
+
+def test_stream_chunks_match_whole_document():
+    chunks = [PAGE[i:i + 7] for i in range(0, len(PAGE), 7)]
+    data, buttons = page_parser.extract_from_stream(chunks)
+    assert data == page_parser.extract_from_html(PAGE)
+    # 4 个按钮 + 8 个标题/赔率 span + 1 个 img
+    assert buttons == 13
+
+
+def test_bo_marker_and_unclosed_tags():
+    # 没有闭合的元素在 close() 时结束，文本照常取出
+    html = '<div>BO3 总决赛</div><div class="text-sm text-grey-500"><div>BO3</div><div>决赛'
+    data = page_parser.extract_from_html(html)
+    assert data["bo"] is True
+    assert data["times"] == [["BO3", "决赛"]]
+
+
+def test_has_odds_buttons():
+    assert page_parser.has_odds_buttons(PAGE)
+    assert not page_parser.has_odds_buttons("<div>加载中</div><script>'data-test=\"odd-button\"'</script>")
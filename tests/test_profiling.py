@@ -0,0 +1,107 @@
+import json
+import pytest
+import profiling
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    profiler = profiling.enable(str(tmp_path))
+    yield profiler
+    profiling.disable()
+
+
+def metric_name(line):
+    return line.split("{")[0].split(" ")[0]
+
+
+def test_disabled_calls_are_noops():
+    assert not profiling.enabled()
+    with profiling.stage("x"):
+        pass
+    profiling.count("y")
+    assert profiling.clock() is None
+
+
+def test_prometheus_families_are_contiguous(profiler):
+    with profiling.run("fetch"):
+        with profiling.stage("page_get", backend="http"):
+            pass
+        profiling.count("bytes_written", 10, file="a.json")
+        profiling.count("matches_new", 2)
+        profiling.count("bytes_written", 5, file="b.json")
+        with profiling.stage("merge"):
+            pass
+
+    lines = profiler.prometheus_text().splitlines()
+    types = {}
+    order = []
+    for line in lines:
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split()
+            types[name] = kind
+            order.append(name)
+        else:
+            # 每个样本都属于最近一个 # TYPE 声明的指标
+            assert metric_name(line) == order[-1]
+    assert len(order) == len(set(order))
+    assert types["ybb_last_run_timestamp_seconds"] == "gauge"
+    assert types["ybb_bytes_written_total"] == "counter"
+    assert 'ybb_bytes_written_total{file="a.json"} 10' in lines
+    assert 'ybb_runs_total{kind="fetch"} 1' in lines
+
+
+def test_run_flushes_events_with_run_id(profiler, tmp_path):
+    with profiling.run("report") as run_id:
+        profiling.count("rows", 3)
+    events = [json.loads(line) for line in (tmp_path / profiling.EVENTS_FILE).read_text(encoding="utf-8").splitlines()]
+    assert {e["run_id"] for e in events} == {run_id}
+    assert [e["name"] for e in events] == ["rows", "run"]
+    assert (tmp_path / profiling.PROMETHEUS_FILE).exists()
+
+
+def test_label_escaping():
+    assert profiling._labels((("path", 'a"b\\c\n'),)) == '{path="a\\"b\\\\c\\n"}'
+    assert profiling._labels(()) == ""
+
+
+def test_events_outside_a_run_only_update_totals(profiler):
+    for _ in range(5):
+        with profiling.stage("gui_refresh"):
+            pass
+        profiling.count("rows", 2)
+    assert profiler.events == []
+    assert profiler.stage_totals[("gui_refresh", ())][0] == 5
+    assert profiler.counters[("rows", ())] == 10
+
+
+def test_long_run_flushes_when_buffer_is_full(profiler, tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "MAX_BUFFERED_EVENTS", 3)
+    with profiling.run("watch"):
+        for _ in range(4):
+            profiling.count("markets")
+        assert len(profiler.events) == 1
+        lines = (tmp_path / profiling.EVENTS_FILE).read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 3
+
+
+class FakeDriver:
+    def __init__(self):
+        self.commands = []
+
+    def execute(self, driver_command, params=None):
+        self.commands.append(driver_command)
+        return {"value": None}
+
+
+def test_instrumented_driver_checks_profiling_on_each_call(tmp_path):
+    driver = profiling.instrument_driver(FakeDriver())
+    driver.execute("get")
+    profiler = profiling.enable(str(tmp_path))
+    try:
+        driver.execute("findElements")
+        driver.execute("findElements")
+        assert profiler.counters == {("webdriver_commands", (("command", "findElements"),)): 2}
+    finally:
+        profiling.disable()
+    driver.execute("quit")
+    assert driver.commands == ["get", "findElements", "findElements", "quit"]
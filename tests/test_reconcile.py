@@ -0,0 +1,62 @@
+import reconcile
+
+
+def match(match_id, time, team_a="A", team_b="B"):
+    return {"MatchID": match_id, "MatchTime": time, "TeamA": team_a, "TeamB": team_b}
+
+
+def test_time_key():
+    assert reconcile.time_key("01-01 00:00") == 0
+    assert reconcile.time_key("01-02 01:30") == 24 * 60 + 90
+    assert reconcile.time_key("03-01 00:00") - reconcile.time_key("02-29 23:00") == 60
+    for value in (reconcile.UNKNOWN_TIME, "", None, "bad"):
+        assert reconcile.time_key(value) is None
+
+
+def test_find_nearest_within_tolerance():
+    matches = [match("0001", "03-02 12:00"), match("0002", "03-02 18:00"), match("0003", "03-02 18:00", "A", "C")]
+    index = reconcile.MatchIndex(matches)
+    assert index.find("A", "B", "03-02 17:00")["MatchID"] == "0002"
+    assert index.find("A", "B", "03-02 13:00")["MatchID"] == "0001"
+    assert index.find("A", "B", "03-03 12:00") is None
+    # 队伍顺序不同视为不同的队伍对
+    assert index.find("B", "A", "03-02 18:00") is None
+
+
+def test_claimed_match_is_not_reused():
+    matches = [match("0001", "03-02 12:00"), match("0002", "03-02 13:00")]
+    index = reconcile.MatchIndex(matches)
+    first = index.find("A", "B", "03-02 12:00")
+    index.claim(first)
+    assert index.find("A", "B", "03-02 12:00")["MatchID"] == "0002"
+    index.claim(index.find("A", "B", "03-02 12:00"))
+    assert index.find("A", "B", "03-02 12:00") is None
+
+
+def test_unknown_time_matches():
+    matches = [match("0001", reconcile.UNKNOWN_TIME)]
+    index = reconcile.MatchIndex(matches)
+    assert index.find("A", "B", reconcile.UNKNOWN_TIME)["MatchID"] == "0001"
+    assert index.find("A", "B", "03-02 12:00") is None
+
+
+def test_add_and_move_keep_index_consistent():
+    matches = [match("0001", "03-02 12:00")]
+    index = reconcile.MatchIndex(matches)
+    new = match("0002", "03-05 12:00")
+    index.add(new)
+    assert matches[-1] is new
+    # add 的比赛属于本轮抓取，不能再被匹配
+    assert index.find("A", "B", "03-05 12:00") is None
+
+    index.move(matches[0], "03-04 12:00")
+    assert matches[0]["MatchTime"] == "03-04 12:00"
+    assert index.find("A", "B", "03-02 12:00") is None
+    assert index.find("A", "B", "03-04 13:00")["MatchID"] == "0001"
+
+
+def test_duplicate_groups():
+    matches = [match("0001", "03-02 12:00"), match("0002", "03-02 13:00"), match("0003", "03-03 12:00"),
+               match("0004", "03-02 12:30", "C", "D")]
+    groups = reconcile.duplicate_groups(matches)
+    assert [[m["MatchID"] for m in group] for group in groups] == [["0001", "0002"]]
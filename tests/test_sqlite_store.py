@@ -0,0 +1,129 @@
+import json
+import os
+import pytest
+import cli
+import match_store
+import metrics_engine
+import sqlite_store
+
+
+def read_json(folder, filename):
+    with open(os.path.join(folder, filename), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def db_path(match_folder):
+    path = sqlite_store.db_path_for("match_data")
+    with sqlite_store.SQLiteStore(path) as db:
+        db.import_folder(match_folder)
+    return path
+
+
+def test_import_export_round_trip(match_folder, db_path, tmp_path):
+    out = str(tmp_path / "export")
+    with sqlite_store.SQLiteStore(db_path) as db:
+        assert db.tournaments() == [os.path.basename(match_folder)]
+        db.export_folder(os.path.basename(match_folder), out)
+
+    source = match_store.MatchStore(match_folder)
+    exported = match_store.MatchStore(out)
+    assert sorted(exported.matches, key=lambda m: m["MatchID"]) == sorted(source.matches, key=lambda m: m["MatchID"])
+    for key in match_store.METRIC_FILES + ("kelly",):
+        rows = match_store.RESULT_FILES[key][1]
+        assert sorted(exported.data[key][rows], key=json.dumps) == sorted(source.data[key][rows], key=json.dumps)
+    assert exported.data["profit_stats"]["stats"] == source.data["profit_stats"]["stats"]
+
+
+def test_sqlite_backend_reads_and_writes_database(match_folder, db_path, monkeypatch):
+    monkeypatch.setenv(match_store.STORE_ENV, "sqlite")
+    json_before = read_json(match_folder, "expected_profit_variance.json")
+
+    store = match_store.get_store(match_folder)
+    assert isinstance(store, sqlite_store.SQLiteMatchStore)
+    assert match_store.list_folders("match_data") == [match_folder]
+    store.get_row("expected_profit_variance", "0001")["TeamA_Kelly"] = "stale"
+    store.mark_dirty("expected_profit_variance", store.get_row("expected_profit_variance", "0001"))
+    store.save()
+
+    assert metrics_engine.recompute_folder(match_folder, ["0001"]) == 1
+    # 写入数据库，不改动 JSON 文件
+    assert read_json(match_folder, "expected_profit_variance.json") == json_before
+    with sqlite_store.SQLiteStore(db_path) as db:
+        rows = {row["MatchID"]: row for row in db.get_metric_rows(os.path.basename(match_folder), "expected_profit_variance")}
+    assert rows["0001"]["TeamA_Kelly"] == pytest.approx(0.4649892401920215)
+
+
+def test_store_reloads_after_external_write(match_folder, db_path, monkeypatch):
+    monkeypatch.setenv(match_store.STORE_ENV, "sqlite")
+    store = match_store.get_store(match_folder)
+    other = sqlite_store.SQLiteMatchStore(match_folder)
+    other.matches_data["matches"] = other.matches[:3]
+    other.reindex()
+    other.save(["matches_info"])
+
+    assert store.is_stale()
+    assert len(match_store.get_store(match_folder).matches) == 3
+
+
+def test_cli_migrate_verifies_row_counts(match_folder, capsys):
+    assert cli.main(["store", "migrate"]) == 0
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert records[0]["tournament"] == os.path.basename(match_folder)
+    assert records[0]["verified"] is True
+    assert records[0]["rows"]["matches_info"] == 8
+
+
+def test_save_writes_only_changed_rows(match_folder, db_path, monkeypatch):
+    monkeypatch.setenv(match_store.STORE_ENV, "sqlite")
+    store = match_store.get_store(match_folder)
+    statements = []
+    store.db.conn.set_trace_callback(statements.append)
+
+    # 一个 upsert_row、一处原地修改加 mark_dirty、一场比赛被删除
+    store.upsert_row("littleblackbox_odds", dict(store.get_row("littleblackbox_odds", "0003"),
+                                                 TeamA_LittleBlackBox_Odds=0.9))
+    kelly_row = store.kelly_rows[("0002", "TeamA")]
+    kelly_row["Allocated_Coins"] = "10.00"
+    store.mark_dirty("kelly", kelly_row)
+    store.matches_data["matches"] = [m for m in store.matches if m["MatchID"] != "0004"]
+    store.reindex()
+    store.save(["littleblackbox_odds", "kelly", "matches_info", "odds_probability"])
+
+    writes = [s for s in statements if s.startswith(("INSERT", "DELETE"))]
+    assert len([s for s in writes if "INTO littleblackbox_odds" in s]) == 1
+    assert len([s for s in writes if "INTO kelly" in s]) == 1
+    assert len([s for s in writes if s.startswith("DELETE FROM matches")]) == 1
+    assert not [s for s in writes if "odds_probability" in s or "INTO matches" in s]
+    # 不再读取赛事的全部主键，只查询版本号
+    assert not [s for s in statements if s.startswith("SELECT") and not s.startswith("SELECT Version")]
+
+    # 没有修改时不写数据库，也不递增版本号
+    version = store.db.version(store.tournament)
+    statements.clear()
+    store.save(list(match_store.DATA_KEYS))
+    assert not [s for s in statements if s.startswith(("INSERT", "DELETE"))]
+    assert store.db.version(store.tournament) == version
+
+    with sqlite_store.SQLiteStore(db_path) as db:
+        tournament = os.path.basename(match_folder)
+        assert "0004" not in {m["MatchID"] for m in db.get_matches(tournament)}
+        assert {(r["MatchID"], r["Team"]): r for r in db.get_allocations(tournament)}[("0002", "TeamA")]["Allocated_Coins"] == "10.00"
+        lbb = {r["MatchID"]: r for r in db.get_metric_rows(tournament, "littleblackbox_odds")}
+        assert lbb["0003"]["TeamA_LittleBlackBox_Odds"] == 0.9
+
+
+def test_json_store_tracks_replaced_rows(match_folder):
+    store = match_store.get_store(match_folder)
+    stats = [dict(row) for row in store.data["profit_stats"]["stats"]]
+    stats[0]["Coins"] = 1.0
+    store.data["profit_stats"] = {"stats": stats[1:] + stats[:1]}
+    store.reindex()
+    # 只有内容变化的行被记录，内容相同的副本不算修改
+    assert store.dirty["profit_stats"] == {(stats[0]["MatchID"], stats[0]["Team"])}
+    store.data["profit_stats"] = {"stats": stats[1:]}
+    store.reindex()
+    assert store.deleted["profit_stats"] == {(stats[0]["MatchID"], stats[0]["Team"])}
+    assert not store.dirty["profit_stats"]
+    store.save(["profit_stats"])
+    assert not store.deleted["profit_stats"]
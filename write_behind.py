@@ -0,0 +1,43 @@
+import data_processor
+import match_store
+
+# BettingApp 的延迟写入：按 MatchID 记录被修改的比赛，空闲一段时间后或关闭窗口时统一写盘。
+
+
+class WriteBehindSaver:
+    def __init__(self, root, match_folder, delay_ms=1000):
+        self.root = root
+        self.match_folder = match_folder
+        self.delay_ms = delay_ms
+        self.dirty = {}
+        self._after_id = None
+
+    def mark_dirty(self, match_id, team1, team2):
+        """记录一场比赛的最新结果，并把写盘推迟到 delay_ms 毫秒无新修改之后"""
+        self.dirty[match_id] = (team1, team2)
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+        self._after_id = self.root.after(self.delay_ms, self.flush)
+
+    def flush(self):
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+        if not self.dirty:
+            return 0
+
+        count = len(self.dirty)
+        with match_store.locked(self.match_folder) as store:
+            for match_id, (team1, team2) in self.dirty.items():
+                for key, row in data_processor.build_result_rows(team1, team2, match_id).items():
+                    store.upsert_row(key, row)
+            try:
+                store.save()
+                self.dirty.clear()
+                print(f"已写入 {count} 场比赛的结果到 {self.match_folder}")
+            except Exception as e:
+                print(f"保存文件时出错: {e}")
+        return count